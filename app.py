@@ -1,9 +1,16 @@
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
 from config import config
 from models import db
 from utils.email_service import mail
+from utils.inventory import get_reservation_stats
+from utils.background import start_background_tasks_lazily
+from utils.waiting_room import waiting_room
+from utils.cache import response_cache
+from utils.qr_generator import qr_cache
+from utils.db_routing import db_router
 import os
 
 # Import blueprints
@@ -17,6 +24,9 @@ from routes.seating import seating_bp
 from routes.checkins import checkins_bp
 from routes.payments import payments_bp
 from routes.views import views_bp
+from routes.waiting_room import waiting_room_bp
+from routes.organizers import organizers_bp
+from routes.exports import exports_bp
 
 def create_app(config_name='default'):
     """Create and configure Flask app"""
@@ -26,8 +36,13 @@ def create_app(config_name='default'):
     # Initialize extensions
     db.init_app(app)
     mail.init_app(app)
+    waiting_room.init_app(app)
+    response_cache.init_app(app)
+    qr_cache.init_app(app)
+    db_router.init_app(app)
     jwt = JWTManager(app)
-    CORS(app)
+    Migrate(app, db, compare_type=True)
+    CORS(app, expose_headers=['X-Next-Cursor', 'X-Total-Count'])
     
     # Register blueprints
     app.register_blueprint(auth_bp)
@@ -40,6 +55,9 @@ def create_app(config_name='default'):
     app.register_blueprint(checkins_bp)
     app.register_blueprint(payments_bp)
     app.register_blueprint(views_bp)
+    app.register_blueprint(waiting_room_bp)
+    app.register_blueprint(organizers_bp)
+    app.register_blueprint(exports_bp)
     
     # Error handlers
     @app.errorhandler(404)
@@ -63,12 +81,27 @@ def create_app(config_name='default'):
     def forbidden(error):
         return jsonify({'error': 'Forbidden'}), 403
     
+    # Expose per-request statement counts so N+1 regressions are visible
+    if app.config.get('SQLALCHEMY_RECORD_QUERIES'):
+        from flask_sqlalchemy.record_queries import get_recorded_queries
+        
+        @app.after_request
+        def add_query_count(response):
+            response.headers['X-Query-Count'] = str(len(get_recorded_queries()))
+            return response
+    
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
     def health_check():
         return jsonify({
             'status': 'healthy',
-            'message': 'Event Management API is running'
+            'message': 'Event Management API is running',
+            'inventory': get_reservation_stats(),
+            'cache': response_cache.get_stats(),
+            'database': {
+                'pool': db.engine.pool.status(),
+                'replicas': len(db_router.replica_keys(app))
+            }
         }), 200
     
     # API Root endpoint (for API clients)
@@ -86,66 +119,23 @@ def create_app(config_name='default'):
                 'promo_codes': '/api/promo-codes',
                 'seating': '/api/seating',
                 'check_ins': '/api/check-ins',
-                'payments': '/api/payments'
+                'payments': '/api/payments',
+                'waiting_room': '/api/waiting-room'
             }
         }), 200
     
-    # Create uploads directory if it doesn't exist
-    with app.app_context():
-        # Ensure 'credits' column exists on users table (simple migration)
-        try:
-            from sqlalchemy import inspect, text
-            inspector = inspect(db.engine)
-            cols = [c['name'] for c in inspector.get_columns('users')]
-            if 'credits' not in cols:
-                # Add credits column with default 500.00
-                db.engine.execute(text("ALTER TABLE users ADD COLUMN credits DECIMAL(10,2) NOT NULL DEFAULT 500.00"))
-                print("[OK] Added 'credits' column to users table with default 500.00")
-            # Remove qr_code column from tickets if present (no longer stored)
-            ticket_cols = [c['name'] for c in inspector.get_columns('tickets')]
-            if 'qr_code' in ticket_cols:
-                try:
-                    db.engine.execute(text("ALTER TABLE tickets DROP COLUMN qr_code"))
-                    print("[OK] Dropped 'tickets.qr_code' column")
-                except Exception as e_drop:
-                    print(f"[WARNING] Could not drop tickets.qr_code: {str(e_drop)}")
-        except Exception as e:
-            print(f"[WARNING] Could not ensure 'credits' column: {str(e)}")
-        
-        upload_folder = app.config.get('UPLOAD_FOLDER', 'uploads')
-        # Resolve to absolute path - use the directory where app.py is located
-        # app.root_path might point to the package directory, so use the parent
-        if not os.path.isabs(upload_folder):
-            # Get the directory containing this file (app.py)
-            app_dir = os.path.dirname(os.path.abspath(__file__))
-            upload_folder = os.path.join(app_dir, upload_folder)
-        upload_folder = os.path.abspath(upload_folder)
-        banner_folder = os.path.join(upload_folder, 'banners')
-        
-        # Create directories
-        try:
-            os.makedirs(banner_folder, exist_ok=True)
-            print(f"[OK] Upload folder created: {upload_folder}")
-            print(f"[OK] Banner folder created: {banner_folder}")
-        except Exception as e:
-            print(f"[WARNING] Failed to create upload directories: {str(e)}")
-        
-        # Update config with absolute path for consistency
-        app.config['UPLOAD_FOLDER'] = upload_folder
-        
-        # Create database tables
-        try:
-            # Test database connection
-            db.engine.connect()
-            print("[OK] Database connection established")
-            
-            # Create tables
-            db.create_all()
-            print("[OK] Database tables initialized")
-        except Exception as e:
-            print(f"[WARNING] Database connection warning: {str(e)}")
-            print("[WARNING] Make sure MySQL is running and database is created")
-            print("[WARNING] Run 'python test_db_connection.py' to diagnose issues")
+    # Resolve the upload folder once; directories are created when first written
+    upload_folder = app.config.get('UPLOAD_FOLDER', 'uploads')
+    if not os.path.isabs(upload_folder):
+        # Relative to the directory containing this file (app.py)
+        upload_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), upload_folder)
+    app.config['UPLOAD_FOLDER'] = os.path.abspath(upload_folder)
+    
+    # Schema changes are Alembic migrations applied once per deploy
+    # (`flask db upgrade`), so creating the app never touches the database.
+    # Periodic maintenance tasks start with this process's first request.
+    if app.config.get('BACKGROUND_TASKS_ENABLED'):
+        start_background_tasks_lazily(app)
     
     # Serve uploaded files
     @app.route('/uploads/<path:filename>')
@@ -0,0 +1,161 @@
+"""
+Checkout Latency Benchmark
+Times checkout (create_order) for 1 and 10-ticket orders against a
+throwaway SQLite database and an in-process SMTP sink that waits
+`smtp_delay` seconds per message, like a remote mail provider. Email is
+delivered two ways:
+
+- synchronous: the confirmation and ticket emails are sent inside the
+  checkout, one SMTP session per message, as before the email outbox
+- outbox: checkout only queues the emails; the outbox worker pool
+  delivers them afterwards, over one session per batch, timed separately
+
+    python bench_checkout.py [orders] [smtp_delay]
+"""
+import os
+import sys
+import math
+import tempfile
+import time
+import uuid
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from smtp_sink import SMTPSink
+
+ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+SMTP_DELAY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+GROUP_SIZES = [1, 10]
+
+SINK = SMTPSink(('localhost', 0), quiet=True, delay=SMTP_DELAY)
+SQLITE_FILE = os.path.join(tempfile.mkdtemp(), 'bench_checkout.db')
+os.environ['DATABASE_URI'] = f"sqlite:///{SQLITE_FILE}"
+os.environ['MAIL_SERVER'] = 'localhost'
+os.environ['MAIL_PORT'] = str(SINK.server_address[1])
+os.environ['MAIL_USE_TLS'] = 'False'
+os.environ.setdefault('BACKGROUND_TASKS_ENABLED', 'False')
+os.environ.setdefault('SQLALCHEMY_ECHO', 'False')
+
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+from app import create_app
+from models import db, User, Venue, Event, TicketType, EmailNotification
+from utils.order_generator import create_order
+from utils.email_service import send_email, process_email_outbox
+from utils.credits import open_account
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY columns
+    return 'INTEGER'
+
+def create_fixtures():
+    """Attendee with enough credits and an event with one ticket type; returns their ids"""
+    tag = uuid.uuid4().hex[:8]
+    organizer = User(email=f"bench-organizer-{tag}@example.com", first_name='Bench', last_name='Organizer',
+                     user_type='organizer', password_hash='-')
+    attendee = User(email=f"bench-attendee-{tag}@example.com", first_name='Bench', last_name='Attendee',
+                    user_type='attendee', password_hash='-', credits=10 ** 7)
+    venue = Venue(venue_name=f"Bench Venue {tag}", address='1 Bench Street', city='Bench City',
+                  country='Benchland', capacity=100000)
+    db.session.add_all([organizer, attendee, venue])
+    db.session.flush()
+    open_account(organizer)
+    open_account(attendee)
+    
+    start = datetime.utcnow() + timedelta(days=30)
+    event = Event(organizer_id=organizer.user_id, venue_id=venue.venue_id, event_name=f"Bench Event {tag}",
+                  start_datetime=start, end_datetime=start + timedelta(hours=3), status='published')
+    db.session.add(event)
+    db.session.flush()
+    quantity = 2 * sum(GROUP_SIZES) * ORDERS
+    ticket_type = TicketType(event_id=event.event_id, type_name='General Admission', price=10.00,
+                             quantity_total=quantity, quantity_available=quantity,
+                             sale_start=datetime.utcnow() - timedelta(days=1), sale_end=start,
+                             max_purchase=max(GROUP_SIZES))
+    db.session.add(ticket_type)
+    db.session.commit()
+    return attendee.user_id, event.event_id, ticket_type.ticket_type_id
+
+def send_synchronously(order_id):
+    """What checkout did before the outbox: send every email of the order in the request"""
+    notifications = EmailNotification.query.filter_by(order_id=order_id, status='pending').all()
+    for notification in notifications:
+        sent, message = send_email(notification.recipient_email, notification.subject,
+                                   notification.body, notification.html_body)
+        if not sent:
+            raise RuntimeError(f"Sending email failed: {message}")
+        notification.status = 'sent'
+        notification.sent_at = datetime.utcnow()
+    db.session.commit()
+
+def checkout(attendee_id, event_id, ticket_type_id, size, synchronous):
+    """One checkout; returns its latency in ms"""
+    db.session.remove()
+    started = time.perf_counter()
+    success, message, order = create_order(
+        user_id=attendee_id,
+        event_id=event_id,
+        ticket_items=[{
+            'ticket_type_id': ticket_type_id,
+            'quantity': size,
+            'attendees': [{'name': 'Bench Attendee', 'email': 'bench-attendee@example.com'}]
+        }]
+    )
+    if not success:
+        raise RuntimeError(f"{size}-ticket order failed: {message}")
+    if synchronous:
+        send_synchronously(order.order_id)
+    return (time.perf_counter() - started) * 1000
+
+def drain_outbox(app):
+    """Deliver everything queued; returns (messages, SMTP sessions, seconds)"""
+    messages, sessions = SINK.messages, SINK.sessions
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=app.config.get('EMAIL_WORKERS', 4)) as executor:
+        process_email_outbox(app, executor)
+    return SINK.messages - messages, SINK.sessions - sessions, time.perf_counter() - started
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(math.ceil(len(values) * fraction)) - 1)] if values else 0.0
+
+def run_benchmark(app):
+    attendee_id, event_id, ticket_type_id = create_fixtures()
+    results = {}
+    for size in GROUP_SIZES:
+        for synchronous in (True, False):
+            sessions = SINK.sessions
+            latencies = [
+                checkout(attendee_id, event_id, ticket_type_id, size, synchronous) for _ in range(ORDERS)
+            ]
+            results[(size, synchronous)] = (latencies, SINK.sessions - sessions)
+        results[(size, 'drain')] = drain_outbox(app)
+    return results
+
+if __name__ == '__main__':
+    threading.Thread(target=SINK.serve_forever, daemon=True).start()
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    # smtplib would echo every SMTP line in debug mode
+    app.extensions['mail'].debug = 0
+    with app.app_context():
+        db.create_all()
+        print("=" * 60)
+        print(f"Checkout Latency Benchmark ({ORDERS} orders per size, "
+              f"SMTP {SMTP_DELAY * 1000:g} ms per message)")
+        print("=" * 60)
+        results = run_benchmark(app)
+    SINK.shutdown()
+    
+    print(f"\n{'tickets':>8} {'email':>12} {'median ms':>10} {'p95 ms':>9} {'SMTP sessions':>14}")
+    for size in GROUP_SIZES:
+        for synchronous in (True, False):
+            latencies, sessions = results[(size, synchronous)]
+            print(f"{size:>8} {'synchronous' if synchronous else 'outbox':>12} {statistics.median(latencies):>10.1f} "
+                  f"{percentile(latencies, 0.95):>9.1f} {sessions:>14}")
+        messages, sessions, seconds = results[(size, 'drain')]
+        print(f"{'':>8} outbox worker delivered {messages} message(s) over {sessions} session(s) "
+              f"in {seconds:.2f} s")
+    os.remove(SQLITE_FILE)
@@ -0,0 +1,131 @@
+"""
+Order Issuance Benchmark
+Places group orders of 1, 10 and 500 tickets through create_order and
+reports SQL statements and latency per order. Runs against the configured
+database with throwaway fixtures (a venue, event, ticket type, organizer
+and attendee) that are deleted again at the end, so point DATABASE_URI at
+a development database.
+
+    python bench_order_issuance.py [repeats]
+"""
+import os
+import sys
+import time
+import uuid
+import statistics
+from datetime import datetime, timedelta
+
+os.environ.setdefault('BACKGROUND_TASKS_ENABLED', 'False')
+os.environ.setdefault('SQLALCHEMY_ECHO', 'False')
+
+from sqlalchemy import event as sa_event
+from app import create_app
+from models import (
+    db, User, Venue, Event, TicketType, Order, Ticket, Payment, EmailNotification, CreditLedgerEntry
+)
+from utils.order_generator import create_order
+from utils.credits import open_account
+
+GROUP_SIZES = [1, 10, 500]
+
+class StatementCounter:
+    """Counts statements sent to the database (an executemany counts once)"""
+    
+    def __init__(self):
+        self.count = 0
+    
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+def create_fixtures(repeats):
+    """Organizer, attendee with enough credits, venue, event and ticket type"""
+    tag = uuid.uuid4().hex[:8]
+    organizer = User(email=f"bench-organizer-{tag}@example.com", first_name='Bench', last_name='Organizer',
+                     user_type='organizer')
+    organizer.set_password(tag)
+    attendee = User(email=f"bench-attendee-{tag}@example.com", first_name='Bench', last_name='Attendee',
+                    user_type='attendee', credits=10 ** 7)
+    attendee.set_password(tag)
+    venue = Venue(venue_name=f"Bench Venue {tag}", address='1 Bench Street', city='Bench City',
+                  country='Benchland', capacity=100000)
+    db.session.add_all([organizer, attendee, venue])
+    db.session.flush()
+    open_account(organizer)
+    open_account(attendee)
+    
+    start = datetime.utcnow() + timedelta(days=30)
+    event = Event(organizer_id=organizer.user_id, venue_id=venue.venue_id, event_name=f"Bench Event {tag}",
+                  start_datetime=start, end_datetime=start + timedelta(hours=3), status='published')
+    db.session.add(event)
+    db.session.flush()
+    
+    quantity = sum(GROUP_SIZES) * repeats
+    ticket_type = TicketType(event_id=event.event_id, type_name='General Admission', price=10.00,
+                             quantity_total=quantity, quantity_available=quantity,
+                             sale_start=datetime.utcnow() - timedelta(days=1), sale_end=start,
+                             max_purchase=max(GROUP_SIZES))
+    db.session.add(ticket_type)
+    db.session.commit()
+    return organizer.user_id, attendee.user_id, venue.venue_id, event.event_id, ticket_type.ticket_type_id
+
+def delete_fixtures(organizer_id, attendee_id, venue_id, event_id):
+    """Remove everything the benchmark created"""
+    db.session.rollback()
+    order_ids = [row[0] for row in db.session.query(Order.order_id).filter(Order.event_id == event_id)]
+    if order_ids:
+        EmailNotification.query.filter(EmailNotification.order_id.in_(order_ids)).delete(synchronize_session=False)
+        CreditLedgerEntry.query.filter(CreditLedgerEntry.order_id.in_(order_ids)).delete(synchronize_session=False)
+        Payment.query.filter(Payment.order_id.in_(order_ids)).delete(synchronize_session=False)
+        Ticket.query.filter(Ticket.order_id.in_(order_ids)).delete(synchronize_session=False)
+        Order.query.filter(Order.order_id.in_(order_ids)).delete(synchronize_session=False)
+    EmailNotification.query.filter(EmailNotification.user_id.in_([organizer_id, attendee_id])).delete(
+        synchronize_session=False
+    )
+    Event.query.filter_by(event_id=event_id).delete(synchronize_session=False)
+    Venue.query.filter_by(venue_id=venue_id).delete(synchronize_session=False)
+    User.query.filter(User.user_id.in_([organizer_id, attendee_id])).delete(synchronize_session=False)
+    db.session.commit()
+
+def run_benchmark(repeats):
+    organizer_id, attendee_id, venue_id, event_id, ticket_type_id = create_fixtures(repeats)
+    counter = StatementCounter()
+    sa_event.listen(db.engine, 'before_cursor_execute', counter)
+    results = {}
+    try:
+        for size in GROUP_SIZES:
+            statements = []
+            latencies = []
+            for _ in range(repeats):
+                db.session.remove()
+                counter.count = 0
+                started = time.perf_counter()
+                success, message, order = create_order(
+                    user_id=attendee_id,
+                    event_id=event_id,
+                    ticket_items=[{
+                        'ticket_type_id': ticket_type_id,
+                        'quantity': size,
+                        'attendees': [{'name': 'Bench Attendee', 'email': 'bench-attendee@example.com'}]
+                    }]
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+                statements.append(counter.count)
+                if not success:
+                    raise RuntimeError(f"{size}-ticket order failed: {message}")
+            results[size] = (statistics.median(statements), statistics.median(latencies), max(latencies))
+    finally:
+        sa_event.remove(db.engine, 'before_cursor_execute', counter)
+        delete_fixtures(organizer_id, attendee_id, venue_id, event_id)
+    return results
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        print("=" * 60)
+        print(f"Order Issuance Benchmark ({repeats} orders per size)")
+        print("=" * 60)
+        results = run_benchmark(repeats)
+        print(f"\n{'tickets':>8} {'statements':>11} {'median ms':>10} {'max ms':>9}")
+        for size, (statements, median, worst) in results.items():
+            print(f"{size:>8} {statements:>11.0f} {median:>10.1f} {worst:>9.1f}")
@@ -0,0 +1,68 @@
+"""
+Seat Allocation Benchmark
+Times best-available allocation on a synthetic 50,000-seat venue (20
+sections of 50 rows x 50 seats) as it fills up, without touching the
+database: the venue layout and seat map are built in memory.
+
+    python bench_seat_allocation.py [allocations]
+"""
+import sys
+import time
+import random
+import statistics
+from collections import namedtuple
+
+from utils.seat_maps import VenueLayout, set_bits
+from utils.seat_allocator import get_row_index, find_best_seats
+
+SECTIONS, ROWS, SEATS_PER_ROW = 20, 50, 50
+SectionRow = namedtuple('SectionRow', 'section_id section_name capacity section_type layout_config')
+SeatRow = namedtuple('SeatRow', 'seat_id section_id row_number seat_number seat_type')
+
+def build_layout():
+    sections = [
+        SectionRow(section_id, f"Section {section_id}", ROWS * SEATS_PER_ROW, 'seated', {'aisles_after': ['25']})
+        for section_id in range(1, SECTIONS + 1)
+    ]
+    seats = []
+    for section in sections:
+        for row in range(1, ROWS + 1):
+            for number in range(1, SEATS_PER_ROW + 1):
+                seats.append(SeatRow(len(seats) + 1, section.section_id, str(row), str(number), 'regular'))
+    return VenueLayout(1, sections, seats)
+
+def run_benchmark(allocations):
+    layout = build_layout()
+    started = time.perf_counter()
+    index = get_row_index(layout)
+    index_ms = (time.perf_counter() - started) * 1000
+    
+    taken = bytearray((len(layout) + 7) // 8)
+    sold = 0
+    latencies = []
+    for _ in range(allocations):
+        quantity = random.randint(1, 8)
+        section_id = random.choice([None, random.randint(1, SECTIONS)])
+        started = time.perf_counter()
+        ordinals = find_best_seats(index, taken, quantity, section_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if ordinals is None:
+            continue
+        set_bits(taken, ordinals, True)
+        sold += len(ordinals)
+    return len(layout), index_ms, sold, latencies
+
+if __name__ == '__main__':
+    allocations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    random.seed(7)
+    print("=" * 60)
+    print(f"Seat Allocation Benchmark ({allocations} allocations)")
+    print("=" * 60)
+    seat_count, index_ms, sold, latencies = run_benchmark(allocations)
+    latencies.sort()
+    print(f"Venue seats:      {seat_count}")
+    print(f"Row index build:  {index_ms:.1f} ms (once per venue layout)")
+    print(f"Seats sold:       {sold} ({sold / seat_count:.0%} of the venue)")
+    print(f"Median:           {statistics.median(latencies):.3f} ms")
+    print(f"p99:              {latencies[int(len(latencies) * 0.99) - 1]:.3f} ms")
+    print(f"Max:              {latencies[-1]:.3f} ms")
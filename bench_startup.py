@@ -0,0 +1,93 @@
+"""
+Worker Startup Benchmark
+Measures how long a fresh worker process takes to import the app and run
+create_app, the cost every gunicorn worker pays on boot. Each run is a
+new interpreter so nothing is warm.
+
+    python bench_startup.py [runs] [git-ref]
+
+With a git ref (e.g. the commit before a change) the same measurement is
+taken on that revision, checked out into a temporary worktree, and the
+two are compared.
+"""
+import os
+import sys
+import json
+import shutil
+import statistics
+import subprocess
+import tempfile
+
+# Runs inside the fresh interpreter; prints timings in milliseconds as JSON
+BOOT_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app(os.environ.get('FLASK_CONFIG', 'development'))
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'total_ms': (created - started) * 1000
+}))
+"""
+
+def boot_once(directory):
+    """Time one worker boot in `directory`"""
+    env = dict(os.environ, SQLALCHEMY_ECHO='False')
+    result = subprocess.run(
+        [sys.executable, '-c', BOOT_SCRIPT],
+        cwd=directory,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'boot failed')
+    # Older revisions print status lines while booting; the timings are last
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def benchmark(directory, runs):
+    """Median and max of each timing over `runs` boots"""
+    samples = [boot_once(directory) for _ in range(runs)]
+    return {
+        key: (statistics.median(s[key] for s in samples), max(s[key] for s in samples))
+        for key in ('import_ms', 'create_app_ms', 'total_ms')
+    }
+
+def print_results(label, results):
+    print(f"\n{label}")
+    for key, (median, worst) in results.items():
+        print(f"  {key:<15} median {median:8.1f} ms   max {worst:8.1f} ms")
+
+def benchmark_ref(ref, runs):
+    """Benchmark a git revision checked out into a temporary worktree"""
+    worktree = tempfile.mkdtemp(prefix='startup-bench-')
+    try:
+        subprocess.run(['git', 'worktree', 'add', '--detach', worktree, ref], check=True, capture_output=True)
+        if os.path.exists('.env'):
+            shutil.copy('.env', worktree)
+        return benchmark(worktree, runs)
+    finally:
+        subprocess.run(['git', 'worktree', 'remove', '--force', worktree], capture_output=True)
+        shutil.rmtree(worktree, ignore_errors=True)
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    ref = sys.argv[2] if len(sys.argv) > 2 else None
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(here)
+    
+    print("=" * 60)
+    print(f"Worker Startup Benchmark ({runs} boots each)")
+    print("=" * 60)
+    
+    current = benchmark(here, runs)
+    print_results("Working tree", current)
+    
+    if ref:
+        before = benchmark_ref(ref, runs)
+        print_results(f"Revision {ref}", before)
+        saved = before['total_ms'][0] - current['total_ms'][0]
+        print(f"\nMedian boot time change: {saved:+.1f} ms saved per worker")
@@ -0,0 +1,175 @@
+"""
+Query Count Check
+Calls the list endpoints and the order-creation path against an in-memory
+SQLite database (the testing config) and counts the SQL statements each
+request sends, from the X-Query-Count header. Every endpoint is measured
+twice, once over a small and once over a large data set (more events,
+orders, tickets, check-ins and refunds). The check fails (exit code 1) when
+a count grows with the data, i.e. an N+1 query crept back in, or when an
+endpoint goes over its statement budget. Run in CI:
+
+    python check_query_counts.py
+"""
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+# Counted responses must come from the views, not the response cache
+os.environ.setdefault('CACHE_ENABLED', 'False')
+os.environ.setdefault('BACKGROUND_TASKS_ENABLED', 'False')
+
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+from flask_jwt_extended import create_access_token
+from app import create_app
+from models import db, User, Venue, Event, TicketType, SeatingSection, Seat, Payment, Ticket
+
+SMALL, LARGE = 2, 8
+
+# Most statements each request may send, whatever the data size
+STATEMENT_BUDGETS = {
+    'POST /api/orders': 24,
+    'GET /api/events': 3,
+    'GET /api/events/<id>': 10,
+    'GET /api/orders': 5,
+    'GET /api/orders/<id>': 10,
+    'GET /api/orders/<id>/tickets': 9,
+    'GET /api/check-ins/events/<id>': 4,
+    'GET /api/payments/refunds': 3,
+    'GET /api/organizers/me/dashboard': 9,
+    'GET /api/seating/venues/<id>/chart': 8,
+    'GET /api/seating/events/<id>/available-seats': 9,
+}
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY columns
+    return 'INTEGER'
+
+def add_user(user_type, tag):
+    user = User(email=f"query-{user_type}-{tag}@example.com", first_name='Query', last_name=user_type.title(),
+                user_type=user_type, password_hash='-', credits=10 ** 6)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+def create_world(size):
+    """`size` events (each at its own venue with `size` seats) of one organizer, plus an attendee"""
+    tag = uuid.uuid4().hex[:8]
+    organizer = add_user('organizer', tag)
+    attendee = add_user('attendee', tag)
+    start = datetime.utcnow() + timedelta(days=30)
+    events = []
+    for i in range(size):
+        venue = Venue(venue_name=f"Query Venue {tag} {i}", address='1 Query Street', city='Query City',
+                      country='Queryland', capacity=size)
+        db.session.add(venue)
+        db.session.flush()
+        section = SeatingSection(venue_id=venue.venue_id, section_name='Floor', capacity=size)
+        db.session.add(section)
+        db.session.flush()
+        db.session.add_all([
+            Seat(section_id=section.section_id, row_number='A', seat_number=str(n + 1)) for n in range(size)
+        ])
+        event = Event(organizer_id=organizer.user_id, venue_id=venue.venue_id, event_name=f"Query Event {tag} {i}",
+                      category=tag, start_datetime=start + timedelta(days=i),
+                      end_datetime=start + timedelta(days=i, hours=3), status='published')
+        db.session.add(event)
+        db.session.flush()
+        db.session.add(TicketType(event_id=event.event_id, type_name='General Admission', price=10.00,
+                                  quantity_total=size * 10, quantity_available=size * 10,
+                                  sale_start=datetime.utcnow() - timedelta(days=1), sale_end=start,
+                                  max_purchase=size))
+        events.append(event.event_id)
+    db.session.commit()
+    return {
+        'tag': tag,
+        'organizer': create_access_token(identity=str(organizer.user_id)),
+        'attendee': create_access_token(identity=str(attendee.user_id)),
+        'events': events
+    }
+
+def request_count(client, method, url, token, **kwargs):
+    """Statements sent while serving one request"""
+    response = client.open(url, method=method, headers={'Authorization': f"Bearer {token}"}, **kwargs)
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.get_json()}")
+    return int(response.headers['X-Query-Count']), response.get_json()
+
+def measure_world(app, admin_token, size):
+    """Statement counts of every checked endpoint over a data set of `size`"""
+    client = app.test_client()
+    with app.app_context():
+        world = create_world(size)
+    counts = {}
+    
+    # One order of `size` tickets per event; the last one is measured
+    orders = []
+    for event_id in world['events']:
+        with app.app_context():
+            ticket_type_id = TicketType.query.filter_by(event_id=event_id).first().ticket_type_id
+        counts['POST /api/orders'], body = request_count(client, 'POST', '/api/orders', world['attendee'], json={
+            'event_id': event_id,
+            'ticket_items': [{'ticket_type_id': ticket_type_id, 'quantity': size}]
+        })
+        orders.append(body['order']['order_id'])
+        
+    first_event = world['events'][0]
+    with app.app_context():
+        ticket_ids = [row[0] for row in db.session.query(Ticket.ticket_id).filter(Ticket.order_id == orders[0])]
+        payment_ids = [row[0] for row in db.session.query(Payment.payment_id).filter(Payment.order_id.in_(orders[1:]))]
+        venue_id = Event.query.get(first_event).venue_id
+    for ticket_id in ticket_ids:
+        request_count(client, 'POST', '/api/check-ins', world['organizer'],
+                      json={'ticket_id': ticket_id, 'event_id': first_event})
+    for payment_id in payment_ids:
+        request_count(client, 'POST', f"/api/payments/{payment_id}/refund", admin_token, json={})
+        
+    checks = [
+        ('GET /api/events', f"/api/events?category={world['tag']}", world['attendee']),
+        ('GET /api/events/<id>', f"/api/events/{first_event}", world['attendee']),
+        ('GET /api/orders', '/api/orders', world['attendee']),
+        ('GET /api/orders/<id>', f"/api/orders/{orders[0]}", admin_token),
+        ('GET /api/orders/<id>/tickets', f"/api/orders/{orders[0]}/tickets", admin_token),
+        ('GET /api/check-ins/events/<id>', f"/api/check-ins/events/{first_event}", admin_token),
+        ('GET /api/payments/refunds', '/api/payments/refunds', admin_token),
+        ('GET /api/organizers/me/dashboard', '/api/organizers/me/dashboard', world['organizer']),
+        ('GET /api/seating/venues/<id>/chart', f"/api/seating/venues/{venue_id}/chart", world['attendee']),
+        ('GET /api/seating/events/<id>/available-seats', f"/api/seating/events/{first_event}/available-seats",
+         world['attendee']),
+    ]
+    for name, url, token in checks:
+        counts[name], _ = request_count(client, 'GET', url, token)
+    return counts
+
+def check_query_counts():
+    """Measure every endpoint at both sizes; returns the number of failures"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        admin = add_user('admin', uuid.uuid4().hex[:8])
+        db.session.commit()
+        admin_token = create_access_token(identity=str(admin.user_id))
+        
+    small = measure_world(app, admin_token, SMALL)
+    large = measure_world(app, admin_token, LARGE)
+    
+    print("=" * 60)
+    print(f"Query Count Check (statements per request, {SMALL} vs {LARGE} rows)")
+    print("=" * 60)
+    failures = 0
+    for name, budget in STATEMENT_BUDGETS.items():
+        problems = []
+        if large[name] > small[name]:
+            problems.append(f"grows with the data ({small[name]} -> {large[name]})")
+        if max(small[name], large[name]) > budget:
+            problems.append(f"over budget ({budget})")
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok':<5} {name:<46} {small[name]:>3} {large[name]:>3}  {'; '.join(problems)}")
+    return failures
+
+if __name__ == '__main__':
+    failures = check_query_counts()
+    print("\nAll statement counts within budget" if not failures else f"\n{failures} endpoint(s) failed")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,218 @@
+"""
+Query Plan Check
+Runs EXPLAIN on every hot query against the configured MySQL database and
+fails (exit code 1) when one of them scans a whole table or does not use
+the composite index it was designed for. Run after `flask db upgrade` and
+in CI:
+
+    python check_query_plans.py
+
+The optimizer happily scans tables of a few rows, so the check first
+seeds SEED_ROWS rows into every table it explains, inside a transaction
+that is rolled back at the end; nothing is left behind.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Plans only; keep the app from starting workers or echoing every statement
+os.environ.setdefault('BACKGROUND_TASKS_ENABLED', 'False')
+os.environ.setdefault('SQLALCHEMY_ECHO', 'False')
+
+from sqlalchemy import select, insert, func, text
+from sqlalchemy.dialects import mysql
+from app import create_app
+from models import (
+    db, User, Venue, Event, TicketType, Order, Ticket, Payment, CheckIn, TicketHold, EmailNotification,
+    AnalyticsDelta, EventMetricBucket
+)
+
+SEED_ROWS = 5000
+SEED_PARENTS = 100
+
+def hot_queries():
+    """(name, statement, index it must use) for the query shapes the composite indexes serve"""
+    now = datetime.utcnow()
+    return [
+        ('cancellation chunk: orders by event + status', select(Order.order_id, Order.total_amount).where(
+            Order.event_id == 1, Order.status == 'completed', Order.order_id > 0
+        ).order_by(Order.order_id).limit(500), 'ix_orders_event_status'),
+        ('order list ETag: orders by user', select(func.max(Order.updated_at), func.count(Order.order_id)).where(
+            Order.user_id == 1
+        ), 'ix_orders_user_updated'),
+        ('order ETag: tickets by order + status', select(Ticket.status, func.count(Ticket.ticket_id)).where(
+            Ticket.order_id == 1
+        ).group_by(Ticket.status), 'ix_tickets_order_status'),
+        ('refunds: tickets of orders still to refund', select(Ticket.ticket_id).where(
+            Ticket.order_id.in_([1, 2, 3]), Ticket.status != 'refunded'
+        ), 'ix_tickets_order_status'),
+        ('refunds: completed payment per order', select(Payment.order_id, func.min(Payment.payment_id)).where(
+            Payment.order_id.in_([1, 2, 3]), Payment.status == 'completed'
+        ).group_by(Payment.order_id), 'ix_payments_order_status'),
+        ('event listing by status', select(Event.event_id).where(
+            Event.status == 'published'
+        ).order_by(Event.start_datetime, Event.event_id).limit(20), 'ix_events_status_start'),
+        ('organizer dashboard page', select(Event.event_id).where(
+            Event.organizer_id == 1
+        ).order_by(Event.start_datetime, Event.event_id).limit(50), 'ix_events_organizer_start'),
+        ('event check-in list', select(CheckIn.check_in_id).where(
+            CheckIn.event_id == 1
+        ).order_by(CheckIn.check_in_time.desc()), 'ix_check_ins_event_time'),
+        ('hold sweeper', select(TicketHold.hold_id).where(
+            TicketHold.status == 'active', TicketHold.expires_at <= now
+        ).order_by(TicketHold.hold_id).limit(500), 'ix_ticket_holds_status_expires'),
+        ('email outbox claim', select(EmailNotification.notification_id).where(
+            EmailNotification.status == 'pending', EmailNotification.next_attempt_at <= now
+        ).order_by(EmailNotification.next_attempt_at).limit(100), 'ix_email_outbox_due'),
+        ('analytics snapshot: pending deltas', select(func.count(AnalyticsDelta.delta_id)).where(
+            AnalyticsDelta.event_id == 1
+        ), 'ix_analytics_deltas_event_created'),
+        ('time series: pending deltas in range', select(AnalyticsDelta.delta_id).where(
+            AnalyticsDelta.event_id == 1, AnalyticsDelta.created_at >= now
+        ), 'ix_analytics_deltas_event_created'),
+        ('time series: bucket range', select(EventMetricBucket.bucket_id).where(
+            EventMetricBucket.event_id == 1,
+            EventMetricBucket.resolution == 'minute',
+            EventMetricBucket.bucket_start >= now
+        ).order_by(EventMetricBucket.bucket_start), 'unique_event_metric_bucket'),
+    ]
+
+def next_ids(connection, column, count):
+    """`count` ids above the current maximum of a primary key column"""
+    start = connection.scalar(select(func.coalesce(func.max(column), 0))) + 1
+    return list(range(start, start + count))
+
+def seed(connection):
+    """Insert enough rows, spread over many keys and statuses, that a scan costs more than an index"""
+    now = datetime.utcnow()
+    tag = now.strftime('%Y%m%d%H%M%S%f')
+    user_ids = next_ids(connection, User.user_id, SEED_PARENTS)
+    connection.execute(insert(User), [{
+        'user_id': user_id, 'email': f"plan-check-{tag}-{user_id}@example.com", 'password_hash': '-',
+        'first_name': 'Plan', 'last_name': 'Check', 'user_type': 'organizer'
+    } for user_id in user_ids])
+    venue_id = next_ids(connection, Venue.venue_id, 1)[0]
+    connection.execute(insert(Venue), [{
+        'venue_id': venue_id, 'venue_name': f"Plan Check {tag}", 'address': '-', 'city': '-',
+        'country': '-', 'capacity': SEED_ROWS
+    }])
+    
+    event_ids = next_ids(connection, Event.event_id, SEED_PARENTS)
+    event_statuses = ['draft', 'published', 'cancelled', 'completed']
+    connection.execute(insert(Event), [{
+        'event_id': event_id, 'organizer_id': user_ids[i], 'venue_id': venue_id,
+        'event_name': f"Plan Check {i}", 'status': event_statuses[i % len(event_statuses)],
+        'start_datetime': now + timedelta(hours=i), 'end_datetime': now + timedelta(hours=i + 3)
+    } for i, event_id in enumerate(event_ids)])
+    ticket_type_ids = next_ids(connection, TicketType.ticket_type_id, SEED_PARENTS)
+    connection.execute(insert(TicketType), [{
+        'ticket_type_id': ticket_type_id, 'event_id': event_ids[i], 'type_name': 'General Admission',
+        'price': 10, 'quantity_total': SEED_ROWS, 'quantity_available': SEED_ROWS,
+        'sale_start': now, 'sale_end': now + timedelta(days=30)
+    } for i, ticket_type_id in enumerate(ticket_type_ids)])
+    
+    order_ids = next_ids(connection, Order.order_id, SEED_ROWS)
+    statuses = ['pending', 'completed', 'failed', 'refunded']
+    connection.execute(insert(Order), [{
+        'order_id': order_id, 'user_id': user_ids[i % SEED_PARENTS], 'event_id': event_ids[i % SEED_PARENTS],
+        'order_number': f"PLAN-{tag}-{order_id}", 'subtotal': 10, 'total_amount': 10,
+        'status': statuses[i % len(statuses)]
+    } for i, order_id in enumerate(order_ids)])
+    ticket_ids = next_ids(connection, Ticket.ticket_id, SEED_ROWS)
+    ticket_statuses = ['valid', 'used', 'cancelled', 'refunded']
+    connection.execute(insert(Ticket), [{
+        'ticket_id': ticket_id, 'order_id': order_ids[i], 'ticket_type_id': ticket_type_ids[i % SEED_PARENTS],
+        'ticket_number': f"PLAN-{tag}-{ticket_id}", 'attendee_name': 'Plan Check',
+        'attendee_email': 'plan-check@example.com', 'price_paid': 10,
+        'status': ticket_statuses[i % len(ticket_statuses)]
+    } for i, ticket_id in enumerate(ticket_ids)])
+    connection.execute(insert(Payment), [{
+        'order_id': order_id, 'payment_method': 'credit_card', 'amount': 10,
+        'transaction_id': f"PLAN-{tag}-{order_id}", 'payment_gateway': 'plan-check',
+        'status': statuses[i % len(statuses)]
+    } for i, order_id in enumerate(order_ids)])
+    connection.execute(insert(CheckIn), [{
+        'ticket_id': ticket_id, 'event_id': event_ids[i % SEED_PARENTS], 'check_in_method': 'manual',
+        'checked_in_by': user_ids[0], 'check_in_time': now - timedelta(minutes=i)
+    } for i, ticket_id in enumerate(ticket_ids)])
+    
+    # Only a few holds and emails are due at any time, like in production
+    hold_statuses = ['converted', 'released', 'expired', 'converted', 'released', 'expired', 'active']
+    connection.execute(insert(TicketHold), [{
+        'hold_token': f"plan-{tag}-{i}", 'user_id': user_ids[i % SEED_PARENTS],
+        'event_id': event_ids[i % SEED_PARENTS], 'status': hold_statuses[i % len(hold_statuses)],
+        'expires_at': now + timedelta(minutes=i - SEED_ROWS // 2)
+    } for i in range(SEED_ROWS)])
+    email_statuses = ['sent', 'sent', 'sent', 'failed', 'bounced', 'pending']
+    connection.execute(insert(EmailNotification), [{
+        'user_id': user_ids[i % SEED_PARENTS], 'email_type': 'order_confirmation',
+        'recipient_email': 'plan-check@example.com', 'subject': 'Plan check',
+        'status': email_statuses[i % len(email_statuses)],
+        'next_attempt_at': now + timedelta(minutes=i - SEED_ROWS // 2)
+    } for i in range(SEED_ROWS)])
+    
+    connection.execute(insert(AnalyticsDelta), [{
+        'event_id': event_ids[i % SEED_PARENTS], 'kind': 'sale', 'tickets_sold': 1, 'revenue': 10,
+        'created_at': now - timedelta(minutes=i)
+    } for i in range(SEED_ROWS)])
+    resolutions = ['minute', 'hour', 'day']
+    connection.execute(insert(EventMetricBucket), [{
+        'event_id': event_ids[i % SEED_PARENTS], 'resolution': resolutions[i % len(resolutions)],
+        'bucket_start': now - timedelta(minutes=i)
+    } for i in range(SEED_ROWS)])
+
+def explain(connection, statement):
+    """EXPLAIN rows of a statement as dicts"""
+    sql = str(statement.compile(dialect=mysql.dialect(), compile_kwargs={'literal_binds': True}))
+    result = connection.execute(text(f"EXPLAIN {sql}"))
+    return [dict(row._mapping) for row in result]
+
+def check_query_plans():
+    """Check every hot query; returns the number of failures"""
+    print("=" * 60)
+    print("Query Plan Check")
+    print("=" * 60)
+    
+    failures = 0
+    with db.engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            # InnoDB row estimates count the uncommitted rows of this transaction
+            seed(connection)
+            for name, statement, expected_key in hot_queries():
+                rows = explain(connection, statement)
+                problems = []
+                for row in rows:
+                    table = row.get('table')
+                    if not table or table.startswith('<'):
+                        continue
+                    if row.get('type') == 'ALL':
+                        problems.append(f"{table}: full table scan (possible keys: {row.get('possible_keys')})")
+                    elif row.get('key') != expected_key:
+                        problems.append(f"{table}: uses {row.get('key')} instead of {expected_key}")
+                        
+                if problems:
+                    failures += 1
+                    print(f"✗ {name}")
+                    for problem in problems:
+                        print(f"    {problem}")
+                else:
+                    print(f"✓ {name} (key: {expected_key})")
+        finally:
+            transaction.rollback()
+            
+    print("\n" + "=" * 60)
+    if failures:
+        print(f"✗ {failures} hot query(ies) do not use their index")
+    else:
+        print("✓ Every hot query uses its index")
+    print("=" * 60)
+    return failures
+
+if __name__ == '__main__':
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        if db.engine.dialect.name != 'mysql':
+            print("⚠ EXPLAIN checks need the MySQL database configured in DATABASE_URI")
+            sys.exit(2)
+        sys.exit(1 if check_query_plans() else 0)
@@ -0,0 +1,173 @@
+"""
+Seat Sale Check
+Plays the seat sale scenarios that must never end with one seat promised
+to two buyers through the whole app, against an in-memory SQLite database
+(the testing config). Exits with code 1 when any scenario fails:
+
+- a seat in another buyer's active hold cannot be bought outright, and
+  the hold can still be checked out afterwards
+- a refunded seat can be sold again, and the refunded ticket no longer
+  gets in, so the seat never has two valid tickets
+
+    python check_seat_sales.py
+"""
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault('CACHE_ENABLED', 'False')
+os.environ.setdefault('BACKGROUND_TASKS_ENABLED', 'False')
+
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+from flask_jwt_extended import create_access_token
+from app import create_app
+from models import db, User, Venue, Event, TicketType, SeatingSection, Seat, Order, Payment, Ticket
+
+SEATS = 4
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY columns
+    return 'INTEGER'
+
+def add_user(user_type, tag):
+    user = User(email=f"seats-{user_type}-{tag}@example.com", first_name='Seats', last_name=user_type.title(),
+                user_type=user_type, password_hash='-', credits=10 ** 6)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+def create_world():
+    """A seated event with one ticket type, two attendees and an admin; returns ids and tokens"""
+    tag = uuid.uuid4().hex[:8]
+    organizer = add_user('organizer', tag)
+    buyers = [add_user('attendee', f"{tag}-{i}") for i in range(2)]
+    admin = add_user('admin', tag)
+    venue = Venue(venue_name=f"Seats Venue {tag}", address='1 Seat Street', city='Seat City',
+                  country='Seatland', capacity=SEATS)
+    db.session.add(venue)
+    db.session.flush()
+    section = SeatingSection(venue_id=venue.venue_id, section_name='Stalls', capacity=SEATS)
+    db.session.add(section)
+    db.session.flush()
+    seats = [Seat(section_id=section.section_id, row_number='A', seat_number=str(n + 1)) for n in range(SEATS)]
+    db.session.add_all(seats)
+    start = datetime.utcnow() + timedelta(days=30)
+    event = Event(organizer_id=organizer.user_id, venue_id=venue.venue_id, event_name=f"Seats Event {tag}",
+                  start_datetime=start, end_datetime=start + timedelta(hours=3), status='published')
+    db.session.add(event)
+    db.session.flush()
+    ticket_type = TicketType(event_id=event.event_id, section_id=section.section_id, type_name='Stalls',
+                             price=10.00, quantity_total=SEATS * 2, quantity_available=SEATS * 2,
+                             sale_start=datetime.utcnow() - timedelta(days=1), sale_end=start)
+    db.session.add(ticket_type)
+    db.session.commit()
+    return {
+        'event_id': event.event_id,
+        'ticket_type_id': ticket_type.ticket_type_id,
+        'seat_ids': [seat.seat_id for seat in seats],
+        'buyers': [create_access_token(identity=str(buyer.user_id)) for buyer in buyers],
+        'admin': create_access_token(identity=str(admin.user_id))
+    }
+
+def call(client, method, url, token, body=None):
+    """(status code, JSON body) of one request"""
+    response = client.open(url, method=method, headers={'Authorization': f"Bearer {token}"}, json=body)
+    return response.status_code, response.get_json() or {}
+
+def seat_items(world, seat_id):
+    return [{'ticket_type_id': world['ticket_type_id'], 'quantity': 1, 'seat_ids': [seat_id]}]
+
+def held_seat_not_sold(app, client):
+    """A holds a seat, B tries to buy it outright, then A checks the hold out"""
+    with app.app_context():
+        world = create_world()
+    holder, buyer = world['buyers']
+    seat_id = world['seat_ids'][0]
+    failures = []
+    
+    status, body = call(client, 'POST', '/api/orders/holds', holder,
+                        {'event_id': world['event_id'], 'ticket_items': seat_items(world, seat_id)})
+    if status != 201:
+        return [f"holding seat {seat_id} failed ({status}: {body.get('error')})"]
+    hold_token = body['hold']['hold_token']
+    
+    status, body = call(client, 'POST', '/api/orders', buyer,
+                        {'event_id': world['event_id'], 'ticket_items': seat_items(world, seat_id)})
+    if status < 400:
+        failures.append(f"seat {seat_id} was sold ({status}) while another buyer held it")
+        
+    status, body = call(client, 'POST', f"/api/orders/holds/{hold_token}/checkout", holder, {})
+    if status != 201:
+        failures.append(f"checking out the hold failed ({status}: {body.get('error')})")
+    return failures
+
+def refunded_seat_resold_once(app, client):
+    """A buys a seat and is refunded, B buys the seat again; only B's ticket may get in"""
+    with app.app_context():
+        world = create_world()
+    first, second = world['buyers']
+    seat_id = world['seat_ids'][0]
+    order = {'event_id': world['event_id'], 'ticket_items': seat_items(world, seat_id)}
+    failures = []
+    
+    status, body = call(client, 'POST', '/api/orders', first, order)
+    if status != 201:
+        return [f"buying seat {seat_id} failed ({status}: {body.get('error')})"]
+    refunded_ticket_id = body['order']['tickets'][0]['ticket_id']
+    with app.app_context():
+        payment_id = db.session.query(Payment.payment_id).filter(
+            Payment.order_id == body['order']['order_id']
+        ).scalar()
+    status, body = call(client, 'POST', f"/api/payments/{payment_id}/refund", world['admin'], {})
+    if status >= 400:
+        return [f"refunding the order failed ({status}: {body.get('error')})"]
+        
+    status, body = call(client, 'POST', '/api/orders', second, order)
+    if status != 201:
+        failures.append(f"seat {seat_id} could not be sold again after the refund ({status}: {body.get('error')})")
+    status, body = call(client, 'POST', '/api/check-ins', world['admin'],
+                        {'ticket_id': refunded_ticket_id, 'event_id': world['event_id']})
+    if status < 400:
+        failures.append(f"the refunded ticket was checked in ({status})")
+        
+    with app.app_context():
+        holding = db.session.query(Ticket.ticket_id).join(Order, Order.order_id == Ticket.order_id).filter(
+            Order.event_id == world['event_id'],
+            Ticket.seat_id == seat_id,
+            Ticket.status.in_(['valid', 'used'])
+        ).count()
+    if holding > 1:
+        failures.append(f"seat {seat_id} has {holding} valid tickets")
+    return failures
+
+SCENARIOS = [
+    ('held seat cannot be bought by another buyer', held_seat_not_sold),
+    ('refunded seat is sold again only once', refunded_seat_resold_once),
+]
+
+def check_seat_sales():
+    """Run every scenario; returns the number of failed scenarios"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    
+    print("=" * 60)
+    print("Seat Sale Check")
+    print("=" * 60)
+    failed = 0
+    for name, scenario in SCENARIOS:
+        failures = scenario(app, client)
+        failed += bool(failures)
+        print(f"{'FAIL' if failures else 'ok':<5} {name}")
+        for failure in failures:
+            print(f"      {failure}")
+    return failed
+
+if __name__ == '__main__':
+    failed = check_seat_sales()
+    print("\nAll seat sale scenarios passed" if not failed else f"\n{failed} scenario(s) failed")
+    sys.exit(1 if failed else 0)
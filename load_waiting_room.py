@@ -0,0 +1,227 @@
+"""
+Waiting Room Load Test
+Drives buyers at 10x an event's admit rate through the whole app, in
+process, against a throwaway SQLite database, twice: once straight into
+POST /api/orders and once through the waiting room. A fixed pool of
+checkout workers stands in for the server's workers, so checkout latency
+counts the time a request waits for a free worker.
+
+Without the room, checkout latency climbs as the backlog grows. With it,
+buyers wait in the queue instead and p99 checkout latency stays flat.
+The room is opened a few seconds before the surge, and the test exits
+with code 1 if the room ever admits faster than the admit rate (idle time
+banked as a burst) or if an admitted buyer cannot check out.
+
+    python load_waiting_room.py [admit_rate] [seconds] [workers]
+"""
+import os
+import sys
+import math
+import tempfile
+import threading
+import time
+import uuid
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+SQLITE_FILE = os.path.join(tempfile.mkdtemp(), 'load_waiting_room.db')
+os.environ['DATABASE_URI'] = f"sqlite:///{SQLITE_FILE}"
+os.environ.setdefault('BACKGROUND_TASKS_ENABLED', 'False')
+os.environ.setdefault('SQLALCHEMY_ECHO', 'False')
+
+from sqlalchemy import BigInteger, insert
+from sqlalchemy.ext.compiler import compiles
+from flask_jwt_extended import create_access_token
+from app import create_app
+from models import db, User, Venue, Event, TicketType
+from utils.waiting_room import waiting_room, QUEUE_TOKEN_HEADER
+
+ARRIVAL_MULTIPLIER = 10
+EARLY_OPEN_SECONDS = 3  # the room idles this long before the surge
+POLL_INTERVAL = 0.02
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY columns
+    return 'INTEGER'
+
+def create_fixtures(buyers):
+    """Event with plenty of stock and `buyers` attendees; returns (event id, ticket type id, user ids)"""
+    tag = uuid.uuid4().hex[:8]
+    organizer = User(email=f"load-organizer-{tag}@example.com", first_name='Load', last_name='Organizer',
+                     user_type='organizer', password_hash='-')
+    venue = Venue(venue_name=f"Load Venue {tag}", address='1 Load Street', city='Load City',
+                  country='Loadland', capacity=buyers)
+    db.session.add_all([organizer, venue])
+    db.session.flush()
+    
+    start = datetime.utcnow() + timedelta(days=30)
+    event = Event(organizer_id=organizer.user_id, venue_id=venue.venue_id, event_name=f"Load Event {tag}",
+                  start_datetime=start, end_datetime=start + timedelta(hours=3), status='published')
+    db.session.add(event)
+    db.session.flush()
+    ticket_type = TicketType(event_id=event.event_id, type_name='General Admission', price=10.00,
+                             quantity_total=buyers, quantity_available=buyers,
+                             sale_start=datetime.utcnow() - timedelta(days=1), sale_end=start)
+    db.session.add(ticket_type)
+    
+    db.session.execute(insert(User), [
+        {'email': f"load-buyer-{tag}-{i}@example.com", 'password_hash': '-', 'first_name': 'Load',
+         'last_name': f"Buyer {i}", 'user_type': 'attendee', 'credits': 500}
+        for i in range(buyers)
+    ])
+    db.session.commit()
+    user_ids = [row[0] for row in db.session.query(User.user_id).filter(
+        User.email.like(f"load-buyer-{tag}-%")
+    ).order_by(User.user_id)]
+    return event.event_id, ticket_type.ticket_type_id, user_ids
+
+class Recorder:
+    """Checkout latencies and admission times across threads"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = []  # (started relative to the surge, latency ms)
+        self.failures = []
+        self.admitted_at = []
+        self.queue_waits = []
+    
+    def checkout(self, started, latency_ms, status, body):
+        with self.lock:
+            self.checkouts.append((started, latency_ms))
+            if status != 201:
+                self.failures.append(f"{status}: {body.get('error')}")
+
+def run_phase(app, event_id, ticket_type_id, user_ids, rate, seconds, workers, use_room):
+    """Send `rate` x 10 buyers per second for `seconds`; returns a Recorder"""
+    recorder = Recorder()
+    with app.app_context():
+        tokens = {user_id: create_access_token(identity=str(user_id)) for user_id in user_ids}
+        if use_room:
+            waiting_room.open_room(event_id, rate)
+    if use_room:
+        time.sleep(EARLY_OPEN_SECONDS)
+    
+    def checkout(user_id, queue_token, requested_at, surge_start):
+        headers = {'Authorization': f"Bearer {tokens[user_id]}"}
+        if queue_token:
+            headers[QUEUE_TOKEN_HEADER] = queue_token
+        response = app.test_client().post('/api/orders', headers=headers, json={
+            'event_id': event_id,
+            'ticket_items': [{'ticket_type_id': ticket_type_id, 'quantity': 1}]
+        })
+        finished = time.perf_counter()
+        recorder.checkout(requested_at - surge_start, (finished - requested_at) * 1000,
+                          response.status_code, response.get_json() or {})
+                          
+    waiting = {}
+    waiting_lock = threading.Lock()
+    arrivals_done = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    surge_start = time.perf_counter()
+    
+    def poll_admissions():
+        """Send admitted buyers to checkout, the way their clients poll the status endpoint"""
+        with app.app_context():
+            while not (arrivals_done.is_set() and not waiting):
+                with waiting_lock:
+                    queued = list(waiting.items())
+                # Buyers are admitted in join order: stop at the first still queued
+                for user_id, (queue_token, joined_at) in queued:
+                    status, error = waiting_room.status(event_id, user_id, queue_token)
+                    if not error and not status['admitted']:
+                        break
+                    now = time.perf_counter()
+                    with waiting_lock:
+                        del waiting[user_id]
+                    recorder.admitted_at.append(now - surge_start)
+                    recorder.queue_waits.append(now - joined_at)
+                    pool.submit(checkout, user_id, queue_token, now, surge_start)
+                time.sleep(POLL_INTERVAL)
+                
+    poller = threading.Thread(target=poll_admissions)
+    if use_room:
+        poller.start()
+    interval = 1.0 / (rate * ARRIVAL_MULTIPLIER)
+    client = app.test_client()
+    for i, user_id in enumerate(user_ids):
+        arrival = surge_start + i * interval
+        time.sleep(max(0.0, arrival - time.perf_counter()))
+        if not use_room:
+            pool.submit(checkout, user_id, None, time.perf_counter(), surge_start)
+            continue
+        response = client.post(f"/api/waiting-room/events/{event_id}/join",
+                               headers={'Authorization': f"Bearer {tokens[user_id]}"})
+        with waiting_lock:
+            waiting[user_id] = (response.get_json()['queue_token'], time.perf_counter())
+    arrivals_done.set()
+    if use_room:
+        poller.join()
+        with app.app_context():
+            waiting_room.close_room(event_id)
+    pool.shutdown(wait=True)
+    return recorder
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(math.ceil(len(values) * fraction)) - 1)] if values else 0.0
+
+def max_admitted_per_second(admitted_at):
+    """Most admissions in any one-second window"""
+    admitted_at = sorted(admitted_at)
+    most = 0
+    first = 0
+    for last, moment in enumerate(admitted_at):
+        while moment - admitted_at[first] >= 1.0:
+            first += 1
+        most = max(most, last - first + 1)
+    return most
+
+def print_phase(label, recorder):
+    latencies = [latency for _, latency in recorder.checkouts]
+    print(f"\n{label}")
+    print(f"  checkouts {len(latencies)}, failed {len(recorder.failures)}")
+    print(f"  p50 {statistics.median(latencies):.1f} ms, p99 {percentile(latencies, 0.99):.1f} ms, "
+          f"max {max(latencies):.1f} ms")
+    by_second = {}
+    for started, latency in recorder.checkouts:
+        by_second.setdefault(int(started), []).append(latency)
+    print("  p99 ms by second: " + ' '.join(
+        f"{percentile(by_second[second], 0.99):.0f}" for second in sorted(by_second)
+    ))
+    if recorder.queue_waits:
+        print(f"  queue wait p50 {statistics.median(recorder.queue_waits):.1f} s, "
+              f"max {max(recorder.queue_waits):.1f} s")
+
+if __name__ == '__main__':
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 40.0
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 4.0
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    buyers = int(rate * ARRIVAL_MULTIPLIER * seconds)
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        db.create_all()
+        event_id, ticket_type_id, user_ids = create_fixtures(2 * buyers)
+        
+    print("=" * 60)
+    print(f"Waiting Room Load Test (admit {rate:g}/s, arrivals {rate * ARRIVAL_MULTIPLIER:g}/s "
+          f"for {seconds:g} s, {workers} workers)")
+    print("=" * 60)
+    direct = run_phase(app, event_id, ticket_type_id, user_ids[:buyers], rate, seconds, workers, False)
+    print_phase("Without waiting room", direct)
+    queued = run_phase(app, event_id, ticket_type_id, user_ids[buyers:], rate, seconds, workers, True)
+    print_phase("With waiting room", queued)
+    
+    failures = [f"checkout failed after admission ({failure})" for failure in sorted(set(queued.failures))]
+    most = max_admitted_per_second(queued.admitted_at)
+    # One poll interval of slack for admissions observed late
+    allowed = math.ceil(rate * (1 + POLL_INTERVAL)) + 1
+    print(f"\n  most admitted in one second: {most} (admit rate {rate:g}/s)")
+    if most > allowed:
+        failures.append(f"{most} buyers admitted within one second at {rate:g}/s")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("PASS" if not failures else f"{len(failures)} check(s) failed")
+    os.remove(SQLITE_FILE)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,35 @@
+"""venue layout version
+
+Revision ID: 0b6e4c8d2f53
+Revises: f7b1d3e95a26
+Create Date: 2026-10-17 19:48:37.000000
+
+Counter bumped whenever a venue's sections or seats change, so every
+worker's cached venue layout is rebuilt, not only the writer's.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6e4c8d2f53'
+down_revision = 'f7b1d3e95a26'
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return [column['name'] for column in inspector.get_columns(table)]
+
+
+def upgrade():
+    columns = _columns('venues')
+    if columns is not None and 'layout_version' not in columns:
+        op.add_column('venues', sa.Column('layout_version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('venues', 'layout_version')
@@ -0,0 +1,82 @@
+"""columns added since first release
+
+Revision ID: 3c7a1e9b2d48
+Revises: 8d4f6a2c9e15
+Create Date: 2026-10-17 11:05:27.000000
+
+These changes used to be applied by create_app on every process start
+(inspect + ALTER TABLE). Tables created by the baseline revision already
+have them, so every step checks the live schema first.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7a1e9b2d48'
+down_revision = '8d4f6a2c9e15'
+branch_labels = None
+depends_on = None
+
+
+def _email_outbox_columns():
+    return [
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('html_body', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+    ]
+
+
+def _columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return [column['name'] for column in inspector.get_columns(table)]
+
+
+def upgrade():
+    columns = _columns('users')
+    if columns is not None and 'credits' not in columns:
+        op.add_column('users', sa.Column('credits', sa.Numeric(10, 2), nullable=False, server_default='500.00'))
+
+    # QR codes are rendered on demand, no longer stored
+    columns = _columns('tickets')
+    if columns is not None and 'qr_code' in columns:
+        op.drop_column('tickets', 'qr_code')
+
+    columns = _columns('email_notifications')
+    if columns is not None:
+        for column in _email_outbox_columns():
+            if column.name not in columns:
+                op.add_column('email_notifications', column)
+        indexes = sa.inspect(op.get_bind()).get_indexes('email_notifications')
+        if not any(index['name'] == 'ix_email_outbox_due' for index in indexes):
+            op.create_index('ix_email_outbox_due', 'email_notifications', ['status', 'next_attempt_at'])
+
+    columns = _columns('event_analytics')
+    if columns is not None and 'total_checked_in' not in columns:
+        op.add_column(
+            'event_analytics',
+            sa.Column('total_checked_in', sa.Integer(), nullable=False, server_default='0')
+        )
+        op.execute(
+            "UPDATE event_analytics SET total_checked_in = "
+            "(SELECT COUNT(*) FROM check_ins WHERE check_ins.event_id = event_analytics.event_id)"
+        )
+
+    # Order counter feeding the sales time series
+    columns = _columns('analytics_deltas')
+    if columns is not None and 'orders' not in columns:
+        op.add_column('analytics_deltas', sa.Column('orders', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('analytics_deltas', 'orders')
+    op.drop_column('event_analytics', 'total_checked_in')
+    op.drop_index('ix_email_outbox_due', table_name='email_notifications')
+    for column in reversed(_email_outbox_columns()):
+        op.drop_column('email_notifications', column.name)
+    op.add_column('tickets', sa.Column('qr_code', sa.Text(), nullable=True))
+    op.drop_column('users', 'credits')
@@ -0,0 +1,448 @@
+"""baseline schema
+
+Revision ID: 5b2e9c1a7f30
+Revises: 
+Create Date: 2026-10-17 09:12:44.000000
+
+The schema as it stood when migrations were introduced, written out
+table by table so the revision does not change when the models do.
+Tables that already exist are skipped, so both an empty database and one
+built by init_db.py / create_all can be brought under migration control
+with `flask db upgrade`. Later schema changes get their own revisions.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e9c1a7f30'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table):
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if not _has_table('users'):
+        op.create_table(
+            'users',
+            sa.Column('user_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('email', sa.String(255), nullable=False),
+            sa.Column('password_hash', sa.String(255), nullable=False),
+            sa.Column('first_name', sa.String(100), nullable=False),
+            sa.Column('last_name', sa.String(100), nullable=False),
+            sa.Column('phone', sa.String(20), nullable=True),
+            sa.Column('date_of_birth', sa.Date(), nullable=True),
+            sa.Column('user_type', sa.Enum('organizer', 'attendee', 'admin'), nullable=False),
+            sa.Column('credits', sa.Numeric(10, 2), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+        op.create_index('ix_users_user_type', 'users', ['user_type'])
+
+    if not _has_table('venues'):
+        op.create_table(
+            'venues',
+            sa.Column('venue_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('venue_name', sa.String(200), nullable=False),
+            sa.Column('address', sa.String(255), nullable=False),
+            sa.Column('city', sa.String(100), nullable=False),
+            sa.Column('state', sa.String(100), nullable=True),
+            sa.Column('country', sa.String(100), nullable=False),
+            sa.Column('postal_code', sa.String(20), nullable=True),
+            sa.Column('capacity', sa.Integer(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('amenities', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('venue_id')
+        )
+        op.create_index('ix_venues_capacity', 'venues', ['capacity'])
+        op.create_index('ix_venues_city', 'venues', ['city'])
+
+    if not _has_table('events'):
+        op.create_table(
+            'events',
+            sa.Column('event_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('organizer_id', sa.BigInteger(), nullable=False),
+            sa.Column('venue_id', sa.BigInteger(), nullable=False),
+            sa.Column('event_name', sa.String(200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('category', sa.String(100), nullable=True),
+            sa.Column('start_datetime', sa.DateTime(), nullable=False),
+            sa.Column('end_datetime', sa.DateTime(), nullable=False),
+            sa.Column('status', sa.Enum('draft', 'published', 'cancelled', 'completed'), nullable=False),
+            sa.Column('banner_image', sa.String(255), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['organizer_id'], ['users.user_id'], ondelete='RESTRICT'),
+            sa.ForeignKeyConstraint(['venue_id'], ['venues.venue_id'], ondelete='RESTRICT'),
+            sa.PrimaryKeyConstraint('event_id')
+        )
+        op.create_index('ft_event_search', 'events', ['event_name', 'description'], mysql_prefix='FULLTEXT')
+        op.create_index('ix_events_category', 'events', ['category'])
+        op.create_index('ix_events_organizer_start', 'events', ['organizer_id', 'start_datetime'])
+        op.create_index('ix_events_start_datetime', 'events', ['start_datetime'])
+        op.create_index('ix_events_status_start', 'events', ['status', 'start_datetime'])
+        op.create_index('ix_events_venue_id', 'events', ['venue_id'])
+
+    if not _has_table('seating_sections'):
+        op.create_table(
+            'seating_sections',
+            sa.Column('section_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('venue_id', sa.BigInteger(), nullable=False),
+            sa.Column('section_name', sa.String(100), nullable=False),
+            sa.Column('capacity', sa.Integer(), nullable=False),
+            sa.Column('section_type', sa.Enum('seated', 'standing', 'vip'), nullable=False),
+            sa.Column('layout_config', sa.JSON(), nullable=True),
+            sa.ForeignKeyConstraint(['venue_id'], ['venues.venue_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('section_id'),
+            sa.UniqueConstraint('venue_id', 'section_name', name='unique_venue_section')
+        )
+        op.create_index('ix_seating_sections_venue_id', 'seating_sections', ['venue_id'])
+
+    if not _has_table('analytics_deltas'):
+        op.create_table(
+            'analytics_deltas',
+            sa.Column('delta_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('kind', sa.Enum('sale', 'refund', 'check_in'), nullable=False),
+            sa.Column('type_name', sa.String(100), nullable=True),
+            sa.Column('tickets_sold', sa.Integer(), nullable=False),
+            sa.Column('revenue', sa.Numeric(12, 2), nullable=False),
+            sa.Column('type_revenue', sa.Numeric(12, 2), nullable=False),
+            sa.Column('checked_in', sa.Integer(), nullable=False),
+            sa.Column('orders', sa.Integer(), nullable=False),
+            sa.Column('promo_code', sa.String(50), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('delta_id')
+        )
+        op.create_index('ix_analytics_deltas_event_created', 'analytics_deltas', ['event_id', 'created_at'])
+
+    if not _has_table('cancellation_jobs'):
+        op.create_table(
+            'cancellation_jobs',
+            sa.Column('job_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('requested_by', sa.BigInteger(), nullable=True),
+            sa.Column('status', sa.Enum('pending', 'running', 'completed', 'failed'), nullable=False),
+            sa.Column('last_order_id', sa.BigInteger(), nullable=False),
+            sa.Column('orders_total', sa.Integer(), nullable=False),
+            sa.Column('orders_refunded', sa.Integer(), nullable=False),
+            sa.Column('orders_skipped', sa.Integer(), nullable=False),
+            sa.Column('amount_refunded', sa.Numeric(14, 2), nullable=False),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['requested_by'], ['users.user_id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('job_id')
+        )
+        op.create_index('ix_cancellation_jobs_event_id', 'cancellation_jobs', ['event_id'])
+        op.create_index('ix_cancellation_jobs_status', 'cancellation_jobs', ['status'])
+
+    if not _has_table('event_analytics'):
+        op.create_table(
+            'event_analytics',
+            sa.Column('analytics_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('total_tickets_sold', sa.Integer(), nullable=True),
+            sa.Column('total_revenue', sa.Numeric(12, 2), nullable=True),
+            sa.Column('total_attendees', sa.Integer(), nullable=True),
+            sa.Column('tickets_by_type', sa.JSON(), nullable=True),
+            sa.Column('revenue_by_type', sa.JSON(), nullable=True),
+            sa.Column('promo_codes_used', sa.JSON(), nullable=True),
+            sa.Column('attendance_rate', sa.Numeric(5, 2), nullable=True),
+            sa.Column('total_checked_in', sa.Integer(), nullable=False),
+            sa.Column('last_updated', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('analytics_id')
+        )
+        op.create_index('ix_event_analytics_event_id', 'event_analytics', ['event_id'], unique=True)
+
+    if not _has_table('event_metric_buckets'):
+        op.create_table(
+            'event_metric_buckets',
+            sa.Column('bucket_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('resolution', sa.Enum('minute', 'hour', 'day'), nullable=False),
+            sa.Column('bucket_start', sa.DateTime(), nullable=False),
+            sa.Column('orders', sa.Integer(), nullable=False),
+            sa.Column('tickets_sold', sa.Integer(), nullable=False),
+            sa.Column('revenue', sa.Numeric(12, 2), nullable=False),
+            sa.Column('check_ins', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('bucket_id'),
+            sa.UniqueConstraint('event_id', 'resolution', 'bucket_start', name='unique_event_metric_bucket')
+        )
+        op.create_index('ix_metric_bucket_retention', 'event_metric_buckets', ['resolution', 'bucket_start'])
+
+    if not _has_table('promotional_codes'):
+        op.create_table(
+            'promotional_codes',
+            sa.Column('promo_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=True),
+            sa.Column('code', sa.String(50), nullable=False),
+            sa.Column('discount_type', sa.Enum('percentage', 'fixed_amount'), nullable=False),
+            sa.Column('discount_value', sa.Numeric(10, 2), nullable=False),
+            sa.Column('usage_limit', sa.Integer(), nullable=True),
+            sa.Column('usage_count', sa.Integer(), nullable=True),
+            sa.Column('valid_from', sa.DateTime(), nullable=False),
+            sa.Column('valid_until', sa.DateTime(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('promo_id')
+        )
+        op.create_index('ix_promotional_codes_code', 'promotional_codes', ['code'], unique=True)
+        op.create_index('ix_promotional_codes_event_id', 'promotional_codes', ['event_id'])
+        op.create_index('ix_promotional_codes_is_active', 'promotional_codes', ['is_active'])
+        op.create_index('ix_promotional_codes_valid_from', 'promotional_codes', ['valid_from'])
+        op.create_index('ix_promotional_codes_valid_until', 'promotional_codes', ['valid_until'])
+
+    if not _has_table('seats'):
+        op.create_table(
+            'seats',
+            sa.Column('seat_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('section_id', sa.BigInteger(), nullable=False),
+            sa.Column('seat_number', sa.String(20), nullable=False),
+            sa.Column('row_number', sa.String(10), nullable=False),
+            sa.Column('seat_type', sa.Enum('regular', 'accessible', 'premium'), nullable=False),
+            sa.ForeignKeyConstraint(['section_id'], ['seating_sections.section_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('seat_id'),
+            sa.UniqueConstraint('section_id', 'row_number', 'seat_number', name='unique_section_seat')
+        )
+        op.create_index('ix_seats_section_id', 'seats', ['section_id'])
+
+    if not _has_table('ticket_types'):
+        op.create_table(
+            'ticket_types',
+            sa.Column('ticket_type_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('section_id', sa.BigInteger(), nullable=True),
+            sa.Column('type_name', sa.String(100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('price', sa.Numeric(10, 2), nullable=False),
+            sa.Column('quantity_total', sa.Integer(), nullable=False),
+            sa.Column('quantity_available', sa.Integer(), nullable=False),
+            sa.Column('sale_start', sa.DateTime(), nullable=False),
+            sa.Column('sale_end', sa.DateTime(), nullable=False),
+            sa.Column('min_purchase', sa.Integer(), nullable=True),
+            sa.Column('max_purchase', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['section_id'], ['seating_sections.section_id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('ticket_type_id')
+        )
+        op.create_index('ix_ticket_types_event_id', 'ticket_types', ['event_id'])
+        op.create_index('ix_ticket_types_sale_end', 'ticket_types', ['sale_end'])
+        op.create_index('ix_ticket_types_sale_start', 'ticket_types', ['sale_start'])
+        op.create_index('ix_ticket_types_section_id', 'ticket_types', ['section_id'])
+
+    if not _has_table('venue_bookings'):
+        op.create_table(
+            'venue_bookings',
+            sa.Column('booking_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('venue_id', sa.BigInteger(), nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=True),
+            sa.Column('booking_start', sa.DateTime(), nullable=False),
+            sa.Column('booking_end', sa.DateTime(), nullable=False),
+            sa.Column('status', sa.Enum('pending', 'confirmed', 'cancelled'), nullable=False),
+            sa.Column('booking_cost', sa.Numeric(10, 2), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='SET NULL'),
+            sa.ForeignKeyConstraint(['venue_id'], ['venues.venue_id'], ondelete='RESTRICT'),
+            sa.PrimaryKeyConstraint('booking_id')
+        )
+        op.create_index('ix_venue_bookings_booking_end', 'venue_bookings', ['booking_end'])
+        op.create_index('ix_venue_bookings_booking_start', 'venue_bookings', ['booking_start'])
+        op.create_index('ix_venue_bookings_event_id', 'venue_bookings', ['event_id'])
+        op.create_index('ix_venue_bookings_status', 'venue_bookings', ['status'])
+        op.create_index('ix_venue_bookings_venue_id', 'venue_bookings', ['venue_id'])
+
+    if not _has_table('orders'):
+        op.create_table(
+            'orders',
+            sa.Column('order_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.BigInteger(), nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('promo_id', sa.BigInteger(), nullable=True),
+            sa.Column('order_number', sa.String(50), nullable=False),
+            sa.Column('subtotal', sa.Numeric(10, 2), nullable=False),
+            sa.Column('discount_amount', sa.Numeric(10, 2), nullable=True),
+            sa.Column('tax_amount', sa.Numeric(10, 2), nullable=True),
+            sa.Column('total_amount', sa.Numeric(10, 2), nullable=False),
+            sa.Column('status', sa.Enum('pending', 'completed', 'failed', 'refunded'), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='RESTRICT'),
+            sa.ForeignKeyConstraint(['promo_id'], ['promotional_codes.promo_id'], ondelete='SET NULL'),
+            sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='RESTRICT'),
+            sa.PrimaryKeyConstraint('order_id')
+        )
+        op.create_index('ix_orders_created_at', 'orders', ['created_at'])
+        op.create_index('ix_orders_event_status', 'orders', ['event_id', 'status'])
+        op.create_index('ix_orders_order_number', 'orders', ['order_number'], unique=True)
+        op.create_index('ix_orders_user_updated', 'orders', ['user_id', 'updated_at'])
+
+    if not _has_table('email_notifications'):
+        op.create_table(
+            'email_notifications',
+            sa.Column('notification_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.BigInteger(), nullable=False),
+            sa.Column('order_id', sa.BigInteger(), nullable=True),
+            sa.Column('event_id', sa.BigInteger(), nullable=True),
+            sa.Column('email_type', sa.Enum('order_confirmation', 'ticket_issued', 'event_reminder', 'refund_processed', 'event_cancelled'), nullable=False),
+            sa.Column('recipient_email', sa.String(255), nullable=False),
+            sa.Column('subject', sa.String(255), nullable=False),
+            sa.Column('body', sa.Text(), nullable=True),
+            sa.Column('html_body', sa.Text(), nullable=True),
+            sa.Column('status', sa.Enum('pending', 'sent', 'failed', 'bounced'), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('sent_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='SET NULL'),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], ondelete='SET NULL'),
+            sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='RESTRICT'),
+            sa.PrimaryKeyConstraint('notification_id')
+        )
+        op.create_index('ix_email_notifications_created_at', 'email_notifications', ['created_at'])
+        op.create_index('ix_email_notifications_event_id', 'email_notifications', ['event_id'])
+        op.create_index('ix_email_notifications_order_id', 'email_notifications', ['order_id'])
+        op.create_index('ix_email_notifications_user_id', 'email_notifications', ['user_id'])
+        op.create_index('ix_email_outbox_due', 'email_notifications', ['status', 'next_attempt_at'])
+
+    if not _has_table('payments'):
+        op.create_table(
+            'payments',
+            sa.Column('payment_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('order_id', sa.BigInteger(), nullable=False),
+            sa.Column('payment_method', sa.Enum('credit_card', 'debit_card', 'paypal', 'bank_transfer'), nullable=False),
+            sa.Column('amount', sa.Numeric(10, 2), nullable=False),
+            sa.Column('currency', sa.String(3), nullable=False),
+            sa.Column('transaction_id', sa.String(255), nullable=False),
+            sa.Column('status', sa.Enum('pending', 'completed', 'failed', 'refunded'), nullable=False),
+            sa.Column('payment_gateway', sa.String(50), nullable=False),
+            sa.Column('processed_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], ondelete='RESTRICT'),
+            sa.PrimaryKeyConstraint('payment_id')
+        )
+        op.create_index('ix_payments_order_status', 'payments', ['order_id', 'status'])
+        op.create_index('ix_payments_processed_at', 'payments', ['processed_at'])
+        op.create_index('ix_payments_transaction_id', 'payments', ['transaction_id'], unique=True)
+
+    if not _has_table('ticket_holds'):
+        op.create_table(
+            'ticket_holds',
+            sa.Column('hold_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('hold_token', sa.String(64), nullable=False),
+            sa.Column('user_id', sa.BigInteger(), nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('order_id', sa.BigInteger(), nullable=True),
+            sa.Column('status', sa.Enum('active', 'converted', 'released', 'expired'), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], ondelete='SET NULL'),
+            sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('hold_id')
+        )
+        op.create_index('ix_ticket_holds_event_id', 'ticket_holds', ['event_id'])
+        op.create_index('ix_ticket_holds_hold_token', 'ticket_holds', ['hold_token'], unique=True)
+        op.create_index('ix_ticket_holds_status_expires', 'ticket_holds', ['status', 'expires_at'])
+        op.create_index('ix_ticket_holds_user_id', 'ticket_holds', ['user_id'])
+
+    if not _has_table('tickets'):
+        op.create_table(
+            'tickets',
+            sa.Column('ticket_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('order_id', sa.BigInteger(), nullable=False),
+            sa.Column('ticket_type_id', sa.BigInteger(), nullable=False),
+            sa.Column('seat_id', sa.BigInteger(), nullable=True),
+            sa.Column('ticket_number', sa.String(100), nullable=False),
+            sa.Column('attendee_name', sa.String(200), nullable=False),
+            sa.Column('attendee_email', sa.String(255), nullable=False),
+            sa.Column('price_paid', sa.Numeric(10, 2), nullable=False),
+            sa.Column('status', sa.Enum('valid', 'used', 'cancelled', 'refunded'), nullable=False),
+            sa.Column('checked_in_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], ondelete='RESTRICT'),
+            sa.ForeignKeyConstraint(['seat_id'], ['seats.seat_id'], ondelete='SET NULL'),
+            sa.ForeignKeyConstraint(['ticket_type_id'], ['ticket_types.ticket_type_id'], ondelete='RESTRICT'),
+            sa.PrimaryKeyConstraint('ticket_id')
+        )
+        op.create_index('ix_tickets_attendee_email', 'tickets', ['attendee_email'])
+        op.create_index('ix_tickets_order_status', 'tickets', ['order_id', 'status'])
+        op.create_index('ix_tickets_seat_id', 'tickets', ['seat_id'])
+        op.create_index('ix_tickets_ticket_number', 'tickets', ['ticket_number'], unique=True)
+        op.create_index('ix_tickets_ticket_type_id', 'tickets', ['ticket_type_id'])
+
+    if not _has_table('check_ins'):
+        op.create_table(
+            'check_ins',
+            sa.Column('check_in_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('ticket_id', sa.BigInteger(), nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('check_in_time', sa.DateTime(), nullable=True),
+            sa.Column('check_in_method', sa.Enum('qr_scan', 'manual', 'mobile_app'), nullable=False),
+            sa.Column('checked_in_by', sa.BigInteger(), nullable=False),
+            sa.Column('location', sa.String(100), nullable=True),
+            sa.ForeignKeyConstraint(['checked_in_by'], ['users.user_id'], ondelete='RESTRICT'),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='RESTRICT'),
+            sa.ForeignKeyConstraint(['ticket_id'], ['tickets.ticket_id'], ondelete='RESTRICT'),
+            sa.PrimaryKeyConstraint('check_in_id'),
+            sa.UniqueConstraint('ticket_id', name='unique_ticket_checkin')
+        )
+        op.create_index('ix_check_ins_check_in_time', 'check_ins', ['check_in_time'])
+        op.create_index('ix_check_ins_event_time', 'check_ins', ['event_id', 'check_in_time'])
+
+    if not _has_table('refunds'):
+        op.create_table(
+            'refunds',
+            sa.Column('refund_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('payment_id', sa.BigInteger(), nullable=False),
+            sa.Column('ticket_id', sa.BigInteger(), nullable=True),
+            sa.Column('amount', sa.Numeric(10, 2), nullable=False),
+            sa.Column('reason', sa.Text(), nullable=True),
+            sa.Column('status', sa.Enum('pending', 'completed', 'failed'), nullable=False),
+            sa.Column('processed_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['payment_id'], ['payments.payment_id'], ondelete='RESTRICT'),
+            sa.ForeignKeyConstraint(['ticket_id'], ['tickets.ticket_id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('refund_id')
+        )
+        op.create_index('ix_refunds_payment_id', 'refunds', ['payment_id'])
+        op.create_index('ix_refunds_status', 'refunds', ['status'])
+        op.create_index('ix_refunds_ticket_id', 'refunds', ['ticket_id'])
+
+    if not _has_table('ticket_hold_items'):
+        op.create_table(
+            'ticket_hold_items',
+            sa.Column('hold_item_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('hold_id', sa.BigInteger(), nullable=False),
+            sa.Column('ticket_type_id', sa.BigInteger(), nullable=False),
+            sa.Column('seat_id', sa.BigInteger(), nullable=True),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['hold_id'], ['ticket_holds.hold_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['seat_id'], ['seats.seat_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['ticket_type_id'], ['ticket_types.ticket_type_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('hold_item_id')
+        )
+        op.create_index('ix_ticket_hold_items_hold_id', 'ticket_hold_items', ['hold_id'])
+        op.create_index('ix_ticket_hold_items_seat_id', 'ticket_hold_items', ['seat_id'])
+        op.create_index('ix_ticket_hold_items_ticket_type_id', 'ticket_hold_items', ['ticket_type_id'])
+
+
+def downgrade():
+    # Never drop the whole schema from a migration
+    pass
@@ -0,0 +1,95 @@
+"""composite indexes for hot queries
+
+Revision ID: 8d4f6a2c9e15
+Revises: 5b2e9c1a7f30
+Create Date: 2026-10-17 09:40:03.000000
+
+Each composite index matches the WHERE / ORDER BY shape of a hot query
+(see check_query_plans.py). The single-column indexes they make redundant
+are dropped to cut write amplification; InnoDB accepts the composite as
+the foreign key's index because it leads with the FK column.
+
+Existing databases differ in how their indexes were named (create_all,
+init_db.py, setup_database.py), so indexes are matched by columns rather
+than by name and every step is skipped when already applied.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4f6a2c9e15'
+down_revision = '5b2e9c1a7f30'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, hot query)
+COMPOSITE_INDEXES = [
+    ('ix_orders_event_status', 'orders', ['event_id', 'status'], 'cancellation refunds, event cancelled emails'),
+    ('ix_orders_user_updated', 'orders', ['user_id', 'updated_at'], 'order list and its ETag'),
+    ('ix_tickets_order_status', 'tickets', ['order_id', 'status'], 'order tickets, refunds'),
+    ('ix_payments_order_status', 'payments', ['order_id', 'status'], 'completed payment per order'),
+    ('ix_events_status_start', 'events', ['status', 'start_datetime'], 'event listing by status'),
+    ('ix_events_organizer_start', 'events', ['organizer_id', 'start_datetime'], 'organizer dashboard'),
+    ('ix_check_ins_event_time', 'check_ins', ['event_id', 'check_in_time'], 'event check-in list'),
+    ('ix_ticket_holds_status_expires', 'ticket_holds', ['status', 'expires_at'], 'hold sweeper'),
+    ('ix_analytics_deltas_event_created', 'analytics_deltas', ['event_id', 'created_at'], 'analytics snapshot, time series'),
+]
+
+# (table, column) single-column indexes now covered by a composite or unique key
+REDUNDANT_INDEXES = [
+    ('orders', 'event_id'),
+    ('orders', 'user_id'),
+    ('orders', 'status'),
+    ('tickets', 'order_id'),
+    ('tickets', 'status'),
+    ('payments', 'order_id'),
+    ('payments', 'status'),
+    ('events', 'status'),
+    ('events', 'organizer_id'),
+    ('check_ins', 'event_id'),
+    ('check_ins', 'ticket_id'),
+    ('ticket_holds', 'status'),
+    ('ticket_holds', 'expires_at'),
+    ('email_notifications', 'status'),
+    ('analytics_deltas', 'event_id'),
+    ('analytics_deltas', 'created_at'),
+]
+
+
+def _indexes(table):
+    return sa.inspect(op.get_bind()).get_indexes(table)
+
+
+def _has_table(table):
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    for name, table, columns, _ in COMPOSITE_INDEXES:
+        if not _has_table(table):
+            continue
+        if any(index['column_names'] == columns for index in _indexes(table)):
+            continue
+        op.create_index(name, table, columns)
+
+    for table, column in REDUNDANT_INDEXES:
+        if not _has_table(table):
+            continue
+        for index in _indexes(table):
+            if index['column_names'] == [column] and not index.get('unique'):
+                op.drop_index(index['name'], table_name=table)
+
+
+def downgrade():
+    for table, column in REDUNDANT_INDEXES:
+        if not _has_table(table):
+            continue
+        if not any(index['column_names'] == [column] for index in _indexes(table)):
+            op.create_index(f'ix_{table}_{column}', table, [column])
+
+    for name, table, columns, _ in COMPOSITE_INDEXES:
+        if not _has_table(table):
+            continue
+        if any(index['name'] == name for index in _indexes(table)):
+            op.drop_index(name, table_name=table)
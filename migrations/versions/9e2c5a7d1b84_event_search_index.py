@@ -0,0 +1,56 @@
+"""event search index
+
+Revision ID: 9e2c5a7d1b84
+Revises: 0b6e4c8d2f53
+Create Date: 2026-10-17 21:14:52.000000
+
+Event search needs a FULLTEXT index on MySQL and an FTS5 mirror table on
+SQLite. The baseline revision only creates them for new tables, so
+databases that already had an events table get them here, and the SQLite
+mirror is filled with every event not indexed yet.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e2c5a7d1b84'
+down_revision = '0b6e4c8d2f53'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = ['event_name', 'description']
+
+
+def _has_table(table):
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not _has_table('events'):
+        return
+
+    if bind.dialect.name == 'mysql':
+        indexes = sa.inspect(bind).get_indexes('events')
+        if not any(index['column_names'] == SEARCH_COLUMNS for index in indexes):
+            op.create_index('ft_event_search', 'events', SEARCH_COLUMNS, mysql_prefix='FULLTEXT')
+
+    elif bind.dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts "
+            "USING fts5(event_id UNINDEXED, event_name, description)"
+        )
+        op.execute(
+            "INSERT INTO events_fts (event_id, event_name, description) "
+            "SELECT event_id, COALESCE(event_name, ''), COALESCE(description, '') FROM events "
+            "WHERE event_id NOT IN (SELECT event_id FROM events_fts)"
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql':
+        op.drop_index('ft_event_search', table_name='events')
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS events_fts")
@@ -0,0 +1,65 @@
+"""credits ledger
+
+Revision ID: a41f7c3e5b92
+Revises: 3c7a1e9b2d48
+Create Date: 2026-10-17 13:22:10.000000
+
+Adds the append-only credit ledger and balance snapshots, and opens the
+ledger for existing users with one 'opening' entry equal to their current
+balance, so reconciliation holds from the first run.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f7c3e5b92'
+down_revision = '3c7a1e9b2d48'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table):
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if not _has_table('credit_ledger'):
+        op.create_table(
+            'credit_ledger',
+            sa.Column('entry_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.BigInteger(), nullable=False),
+            sa.Column('amount', sa.Numeric(10, 2), nullable=False),
+            sa.Column('kind', sa.Enum('opening', 'purchase', 'refund', 'event_refund', 'adjustment'), nullable=False),
+            sa.Column('order_id', sa.BigInteger(), nullable=True),
+            sa.Column('payment_id', sa.BigInteger(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], ondelete='SET NULL'),
+            sa.ForeignKeyConstraint(['payment_id'], ['payments.payment_id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('entry_id')
+        )
+        op.create_index('ix_credit_ledger_user_entry', 'credit_ledger', ['user_id', 'entry_id'])
+        op.create_index('ix_credit_ledger_order_id', 'credit_ledger', ['order_id'])
+
+    if not _has_table('credit_balance_snapshots'):
+        op.create_table(
+            'credit_balance_snapshots',
+            sa.Column('user_id', sa.BigInteger(), nullable=False),
+            sa.Column('balance', sa.Numeric(12, 2), nullable=False),
+            sa.Column('last_entry_id', sa.BigInteger(), nullable=False),
+            sa.Column('taken_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+
+    op.execute(
+        "INSERT INTO credit_ledger (user_id, amount, kind, created_at) "
+        "SELECT users.user_id, users.credits, 'opening', CURRENT_TIMESTAMP FROM users "
+        "WHERE NOT EXISTS (SELECT 1 FROM credit_ledger WHERE credit_ledger.user_id = users.user_id)"
+    )
+
+
+def downgrade():
+    op.drop_table('credit_balance_snapshots')
+    op.drop_table('credit_ledger')
@@ -0,0 +1,69 @@
+"""bulk order jobs
+
+Revision ID: c6d2b8f41e07
+Revises: a41f7c3e5b92
+Create Date: 2026-10-17 15:48:36.000000
+
+Group orders imported from a CSV / NDJSON attendee list: the job with its
+progress cursor, and the validated rows staged until their tickets are
+issued.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6d2b8f41e07'
+down_revision = 'a41f7c3e5b92'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table):
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if not _has_table('bulk_order_jobs'):
+        op.create_table(
+            'bulk_order_jobs',
+            sa.Column('job_id', sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column('user_id', sa.BigInteger(), nullable=False),
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('ticket_type_id', sa.BigInteger(), nullable=False),
+            sa.Column('order_id', sa.BigInteger(), nullable=True),
+            sa.Column('source_format', sa.Enum('csv', 'ndjson'), nullable=False),
+            sa.Column('unit_price', sa.Numeric(10, 2), nullable=False),
+            sa.Column('status', sa.Enum('pending', 'running', 'completed', 'failed'), nullable=False),
+            sa.Column('rows_total', sa.Integer(), nullable=False),
+            sa.Column('tickets_issued', sa.Integer(), nullable=False),
+            sa.Column('last_row', sa.Integer(), nullable=False),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['ticket_type_id'], ['ticket_types.ticket_type_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('job_id')
+        )
+        op.create_index('ix_bulk_order_jobs_user_id', 'bulk_order_jobs', ['user_id'])
+        op.create_index('ix_bulk_order_jobs_status', 'bulk_order_jobs', ['status'])
+
+    if not _has_table('bulk_order_rows'):
+        op.create_table(
+            'bulk_order_rows',
+            sa.Column('job_id', sa.BigInteger(), nullable=False),
+            sa.Column('row_number', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('attendee_name', sa.String(200), nullable=False),
+            sa.Column('attendee_email', sa.String(255), nullable=False),
+            sa.ForeignKeyConstraint(['job_id'], ['bulk_order_jobs.job_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('job_id', 'row_number')
+        )
+
+
+def downgrade():
+    op.drop_table('bulk_order_rows')
+    op.drop_table('bulk_order_jobs')
@@ -0,0 +1,77 @@
+"""event seat maps
+
+Revision ID: e3a9f5c72b14
+Revises: c6d2b8f41e07
+Create Date: 2026-10-17 17:05:42.000000
+
+Per-event sold-seat bitmaps indexed by seat ordinal (position among the
+venue's seats in seat_id order), built here for every existing event from
+its tickets.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9f5c72b14'
+down_revision = 'c6d2b8f41e07'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(table):
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def _backfill_seat_maps(bind):
+    layouts = {}
+    events = bind.execute(sa.text(
+        "SELECT event_id, venue_id FROM events "
+        "WHERE event_id NOT IN (SELECT event_id FROM event_seat_maps)"
+    )).fetchall()
+    for event_id, venue_id in events:
+        if venue_id not in layouts:
+            seat_ids = bind.execute(sa.text(
+                "SELECT seats.seat_id FROM seats "
+                "JOIN seating_sections ON seating_sections.section_id = seats.section_id "
+                "WHERE seating_sections.venue_id = :venue_id ORDER BY seats.seat_id"
+            ), {'venue_id': venue_id}).scalars().all()
+            layouts[venue_id] = {seat_id: ordinal for ordinal, seat_id in enumerate(seat_ids)}
+        ordinals = layouts[venue_id]
+
+        bitmap = bytearray((len(ordinals) + 7) // 8)
+        taken = bind.execute(sa.text(
+            "SELECT tickets.seat_id FROM tickets "
+            "JOIN orders ON orders.order_id = tickets.order_id "
+            "WHERE orders.event_id = :event_id AND orders.status = 'completed' "
+            "AND tickets.status IN ('valid', 'used') AND tickets.seat_id IS NOT NULL"
+        ), {'event_id': event_id}).scalars().all()
+        for seat_id in taken:
+            ordinal = ordinals.get(seat_id)
+            if ordinal is not None:
+                bitmap[ordinal >> 3] |= 1 << (ordinal & 7)
+
+        bind.execute(sa.text(
+            "INSERT INTO event_seat_maps (event_id, seat_count, taken, version, updated_at) "
+            "VALUES (:event_id, :seat_count, :taken, 1, CURRENT_TIMESTAMP)"
+        ), {'event_id': event_id, 'seat_count': len(ordinals), 'taken': bytes(bitmap)})
+
+
+def upgrade():
+    if not _has_table('event_seat_maps'):
+        op.create_table(
+            'event_seat_maps',
+            sa.Column('event_id', sa.BigInteger(), nullable=False),
+            sa.Column('seat_count', sa.Integer(), nullable=False),
+            sa.Column('taken', sa.LargeBinary(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['event_id'], ['events.event_id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('event_id')
+        )
+
+    _backfill_seat_maps(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('event_seat_maps')
@@ -0,0 +1,36 @@
+"""venue updated_at
+
+Revision ID: f7b1d3e95a26
+Revises: e3a9f5c72b14
+Create Date: 2026-10-17 19:20:11.000000
+
+Venues get an updated_at column so the event listing's conditional GET
+validator notices venue edits. Existing rows start at their created_at.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b1d3e95a26'
+down_revision = 'e3a9f5c72b14'
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return [column['name'] for column in inspector.get_columns(table)]
+
+
+def upgrade():
+    columns = _columns('venues')
+    if columns is not None and 'updated_at' not in columns:
+        op.add_column('venues', sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute("UPDATE venues SET updated_at = created_at")
+
+
+def downgrade():
+    op.drop_column('venues', 'updated_at')
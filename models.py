@@ -1,9 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from utils.db_routing import RoutingSession
 import json
 
-db = SQLAlchemy()
+# Reads of @db_router.read_only views may be routed to a replica
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     """User model"""
@@ -65,6 +67,8 @@ class Venue(db.Model):
     description = db.Column(db.Text)
     amenities = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    layout_version = db.Column(db.Integer, nullable=False, default=1)  # bumped when sections or seats change
     
     # Relationships
     events = db.relationship('Event', backref='venue', lazy=True)
@@ -84,7 +88,8 @@ class Venue(db.Model):
             'capacity': self.capacity,
             'description': self.description,
             'amenities': self.amenities,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 class Event(db.Model):
@@ -92,14 +97,14 @@ class Event(db.Model):
     __tablename__ = 'events'
     
     event_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
-    organizer_id = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='RESTRICT'), nullable=False, index=True)
+    organizer_id = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='RESTRICT'), nullable=False)
     venue_id = db.Column(db.BigInteger, db.ForeignKey('venues.venue_id', ondelete='RESTRICT'), nullable=False, index=True)
     event_name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     category = db.Column(db.String(100), index=True)
     start_datetime = db.Column(db.DateTime, nullable=False, index=True)
     end_datetime = db.Column(db.DateTime, nullable=False)
-    status = db.Column(db.Enum('draft', 'published', 'cancelled', 'completed'), nullable=False, default='draft', index=True)
+    status = db.Column(db.Enum('draft', 'published', 'cancelled', 'completed'), nullable=False, default='draft')
     banner_image = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -113,6 +118,13 @@ class Event(db.Model):
     event_analytics = db.relationship('EventAnalytics', backref='event', lazy=True, uselist=False, cascade='all, delete-orphan')
     venue_bookings = db.relationship('VenueBooking', backref='event', lazy=True)
     
+    # Full-text index used by event search on MySQL (see utils/search.py)
+    __table_args__ = (
+        db.Index('ft_event_search', 'event_name', 'description', mysql_prefix='FULLTEXT'),
+        db.Index('ix_events_status_start', 'status', 'start_datetime'),
+        db.Index('ix_events_organizer_start', 'organizer_id', 'start_datetime'),
+    )
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -280,15 +292,15 @@ class Order(db.Model):
     __tablename__ = 'orders'
     
     order_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='RESTRICT'), nullable=False, index=True)
-    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='RESTRICT'), nullable=False, index=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='RESTRICT'), nullable=False)
+    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='RESTRICT'), nullable=False)
     promo_id = db.Column(db.BigInteger, db.ForeignKey('promotional_codes.promo_id', ondelete='SET NULL'), nullable=True)
     order_number = db.Column(db.String(50), nullable=False, unique=True, index=True)
     subtotal = db.Column(db.Numeric(10, 2), nullable=False)
     discount_amount = db.Column(db.Numeric(10, 2), default=0.00)
     tax_amount = db.Column(db.Numeric(10, 2), default=0.00)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
-    status = db.Column(db.Enum('pending', 'completed', 'failed', 'refunded'), nullable=False, default='pending', index=True)
+    status = db.Column(db.Enum('pending', 'completed', 'failed', 'refunded'), nullable=False, default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -297,6 +309,11 @@ class Order(db.Model):
     payments = db.relationship('Payment', backref='order', lazy=True)
     email_notifications = db.relationship('EmailNotification', backref='order', lazy=True)
     
+    __table_args__ = (
+        db.Index('ix_orders_event_status', 'event_id', 'status'),
+        db.Index('ix_orders_user_updated', 'user_id', 'updated_at'),
+    )
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -314,19 +331,75 @@ class Order(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class TicketHold(db.Model):
+    """Ticket Hold model"""
+    __tablename__ = 'ticket_holds'
+    
+    hold_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    hold_token = db.Column(db.String(64), nullable=False, unique=True, index=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False, index=True)
+    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='CASCADE'), nullable=False, index=True)
+    order_id = db.Column(db.BigInteger, db.ForeignKey('orders.order_id', ondelete='SET NULL'), nullable=True)
+    status = db.Column(db.Enum('active', 'converted', 'released', 'expired'), nullable=False, default='active')
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    items = db.relationship('TicketHoldItem', backref='hold', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (db.Index('ix_ticket_holds_status_expires', 'status', 'expires_at'),)
+    
+    def is_expired(self):
+        """Check if the hold has passed its expiry time"""
+        return datetime.utcnow() >= self.expires_at
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'hold_id': self.hold_id,
+            'hold_token': self.hold_token,
+            'user_id': self.user_id,
+            'event_id': self.event_id,
+            'order_id': self.order_id,
+            'status': self.status,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'items': [item.to_dict() for item in self.items]
+        }
+
+class TicketHoldItem(db.Model):
+    """Ticket Hold Item model"""
+    __tablename__ = 'ticket_hold_items'
+    
+    hold_item_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    hold_id = db.Column(db.BigInteger, db.ForeignKey('ticket_holds.hold_id', ondelete='CASCADE'), nullable=False, index=True)
+    ticket_type_id = db.Column(db.BigInteger, db.ForeignKey('ticket_types.ticket_type_id', ondelete='CASCADE'), nullable=False, index=True)
+    seat_id = db.Column(db.BigInteger, db.ForeignKey('seats.seat_id', ondelete='CASCADE'), nullable=True, index=True)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'hold_item_id': self.hold_item_id,
+            'hold_id': self.hold_id,
+            'ticket_type_id': self.ticket_type_id,
+            'seat_id': self.seat_id,
+            'quantity': self.quantity
+        }
+
 class Ticket(db.Model):
     """Ticket model"""
     __tablename__ = 'tickets'
     
     ticket_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
-    order_id = db.Column(db.BigInteger, db.ForeignKey('orders.order_id', ondelete='RESTRICT'), nullable=False, index=True)
+    order_id = db.Column(db.BigInteger, db.ForeignKey('orders.order_id', ondelete='RESTRICT'), nullable=False)
     ticket_type_id = db.Column(db.BigInteger, db.ForeignKey('ticket_types.ticket_type_id', ondelete='RESTRICT'), nullable=False, index=True)
     seat_id = db.Column(db.BigInteger, db.ForeignKey('seats.seat_id', ondelete='SET NULL'), nullable=True, index=True)
     ticket_number = db.Column(db.String(100), nullable=False, unique=True, index=True)
     attendee_name = db.Column(db.String(200), nullable=False)
     attendee_email = db.Column(db.String(255), nullable=False, index=True)
     price_paid = db.Column(db.Numeric(10, 2), nullable=False)
-    status = db.Column(db.Enum('valid', 'used', 'cancelled', 'refunded'), nullable=False, default='valid', index=True)
+    status = db.Column(db.Enum('valid', 'used', 'cancelled', 'refunded'), nullable=False, default='valid')
     checked_in_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -334,6 +407,8 @@ class Ticket(db.Model):
     check_ins = db.relationship('CheckIn', backref='ticket', lazy=True, uselist=False)
     refunds = db.relationship('Refund', backref='ticket', lazy=True)
     
+    __table_args__ = (db.Index('ix_tickets_order_status', 'order_id', 'status'),)
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -355,12 +430,12 @@ class Payment(db.Model):
     __tablename__ = 'payments'
     
     payment_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
-    order_id = db.Column(db.BigInteger, db.ForeignKey('orders.order_id', ondelete='RESTRICT'), nullable=False, index=True)
+    order_id = db.Column(db.BigInteger, db.ForeignKey('orders.order_id', ondelete='RESTRICT'), nullable=False)
     payment_method = db.Column(db.Enum('credit_card', 'debit_card', 'paypal', 'bank_transfer'), nullable=False)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     currency = db.Column(db.String(3), nullable=False, default='USD')
     transaction_id = db.Column(db.String(255), nullable=False, unique=True, index=True)
-    status = db.Column(db.Enum('pending', 'completed', 'failed', 'refunded'), nullable=False, default='pending', index=True)
+    status = db.Column(db.Enum('pending', 'completed', 'failed', 'refunded'), nullable=False, default='pending')
     payment_gateway = db.Column(db.String(50), nullable=False)
     processed_at = db.Column(db.DateTime, nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -368,6 +443,8 @@ class Payment(db.Model):
     # Relationships
     refunds = db.relationship('Refund', backref='payment', lazy=True)
     
+    __table_args__ = (db.Index('ix_payments_order_status', 'order_id', 'status'),)
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -414,14 +491,17 @@ class CheckIn(db.Model):
     __tablename__ = 'check_ins'
     
     check_in_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
-    ticket_id = db.Column(db.BigInteger, db.ForeignKey('tickets.ticket_id', ondelete='RESTRICT'), nullable=False, index=True)
-    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='RESTRICT'), nullable=False, index=True)
+    ticket_id = db.Column(db.BigInteger, db.ForeignKey('tickets.ticket_id', ondelete='RESTRICT'), nullable=False)
+    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='RESTRICT'), nullable=False)
     check_in_time = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     check_in_method = db.Column(db.Enum('qr_scan', 'manual', 'mobile_app'), nullable=False)
     checked_in_by = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='RESTRICT'), nullable=False)
     location = db.Column(db.String(100))
     
-    __table_args__ = (db.UniqueConstraint('ticket_id', name='unique_ticket_checkin'),)
+    __table_args__ = (
+        db.UniqueConstraint('ticket_id', name='unique_ticket_checkin'),
+        db.Index('ix_check_ins_event_time', 'event_id', 'check_in_time'),
+    )
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -436,8 +516,11 @@ class CheckIn(db.Model):
         }
 
 class EmailNotification(db.Model):
-    """Email Notification model"""
+    """Email Notification model (doubles as the outgoing mail outbox)"""
     __tablename__ = 'email_notifications'
+    __table_args__ = (
+        db.Index('ix_email_outbox_due', 'status', 'next_attempt_at'),
+    )
     
     notification_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='RESTRICT'), nullable=False, index=True)
@@ -446,7 +529,12 @@ class EmailNotification(db.Model):
     email_type = db.Column(db.Enum('order_confirmation', 'ticket_issued', 'event_reminder', 'refund_processed', 'event_cancelled'), nullable=False)
     recipient_email = db.Column(db.String(255), nullable=False)
     subject = db.Column(db.String(255), nullable=False)
-    status = db.Column(db.Enum('pending', 'sent', 'failed', 'bounced'), nullable=False, default='pending', index=True)
+    body = db.Column(db.Text, nullable=True)
+    html_body = db.Column(db.Text, nullable=True)
+    status = db.Column(db.Enum('pending', 'sent', 'failed', 'bounced'), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
     sent_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
@@ -461,6 +549,9 @@ class EmailNotification(db.Model):
             'recipient_email': self.recipient_email,
             'subject': self.subject,
             'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
             'sent_at': self.sent_at.isoformat() if self.sent_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
@@ -478,6 +569,7 @@ class EventAnalytics(db.Model):
     revenue_by_type = db.Column(db.JSON)
     promo_codes_used = db.Column(db.JSON)
     attendance_rate = db.Column(db.Numeric(5, 2), default=0.00)
+    total_checked_in = db.Column(db.Integer, nullable=False, default=0)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
@@ -492,9 +584,57 @@ class EventAnalytics(db.Model):
             'revenue_by_type': self.revenue_by_type,
             'promo_codes_used': self.promo_codes_used,
             'attendance_rate': float(self.attendance_rate) if self.attendance_rate else None,
+            'total_checked_in': self.total_checked_in,
             'last_updated': self.last_updated.isoformat() if self.last_updated else None
         }
 
+class AnalyticsDelta(db.Model):
+    """Append-only analytics change log, compacted into EventAnalytics by the rollup"""
+    __tablename__ = 'analytics_deltas'
+    
+    delta_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.Enum('sale', 'refund', 'check_in'), nullable=False)
+    type_name = db.Column(db.String(100), nullable=True)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0.00)
+    type_revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0.00)
+    checked_in = db.Column(db.Integer, nullable=False, default=0)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    promo_code = db.Column(db.String(50), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_analytics_deltas_event_created', 'event_id', 'created_at'),)
+
+class EventMetricBucket(db.Model):
+    """Per-event sales and check-in counters at minute, hour and day resolution"""
+    __tablename__ = 'event_metric_buckets'
+    
+    bucket_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='CASCADE'), nullable=False)
+    resolution = db.Column(db.Enum('minute', 'hour', 'day'), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0.00)
+    check_ins = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Range scans for one event and resolution read straight off the unique key
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'resolution', 'bucket_start', name='unique_event_metric_bucket'),
+        db.Index('ix_metric_bucket_retention', 'resolution', 'bucket_start'),
+    )
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'orders': self.orders,
+            'tickets_sold': self.tickets_sold,
+            'revenue': float(self.revenue) if self.revenue is not None else 0.0,
+            'check_ins': self.check_ins
+        }
+
 class VenueBooking(db.Model):
     """Venue Booking model"""
     __tablename__ = 'venue_bookings'
@@ -523,3 +663,139 @@ class VenueBooking(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+
+class CancellationJob(db.Model):
+    """Event cancellation and mass refund job, processed in chunks"""
+    __tablename__ = 'cancellation_jobs'
+    
+    job_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='CASCADE'), nullable=False, index=True)
+    requested_by = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='SET NULL'), nullable=True)
+    status = db.Column(db.Enum('pending', 'running', 'completed', 'failed'), nullable=False, default='pending', index=True)
+    last_order_id = db.Column(db.BigInteger, nullable=False, default=0)  # resume cursor
+    orders_total = db.Column(db.Integer, nullable=False, default=0)
+    orders_refunded = db.Column(db.Integer, nullable=False, default=0)
+    orders_skipped = db.Column(db.Integer, nullable=False, default=0)
+    amount_refunded = db.Column(db.Numeric(14, 2), nullable=False, default=0.00)
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        processed = (self.orders_refunded or 0) + (self.orders_skipped or 0)
+        return {
+            'job_id': self.job_id,
+            'event_id': self.event_id,
+            'requested_by': self.requested_by,
+            'status': self.status,
+            'orders_total': self.orders_total,
+            'orders_refunded': self.orders_refunded,
+            'orders_skipped': self.orders_skipped,
+            'amount_refunded': float(self.amount_refunded) if self.amount_refunded else 0.0,
+            'progress': round(min(1.0, processed / self.orders_total), 4) if self.orders_total else 1.0,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class CreditLedgerEntry(db.Model):
+    """Append-only record of every change to a user's wallet credits"""
+    __tablename__ = 'credit_ledger'
+    
+    entry_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)  # signed; debits are negative
+    kind = db.Column(db.Enum('opening', 'purchase', 'refund', 'event_refund', 'adjustment'), nullable=False)
+    order_id = db.Column(db.BigInteger, db.ForeignKey('orders.order_id', ondelete='SET NULL'), nullable=True, index=True)
+    payment_id = db.Column(db.BigInteger, db.ForeignKey('payments.payment_id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # A user's history and the entries after their snapshot are one range scan
+    __table_args__ = (db.Index('ix_credit_ledger_user_entry', 'user_id', 'entry_id'),)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'entry_id': self.entry_id,
+            'user_id': self.user_id,
+            'amount': float(self.amount) if self.amount is not None else 0.0,
+            'kind': self.kind,
+            'order_id': self.order_id,
+            'payment_id': self.payment_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class CreditBalanceSnapshot(db.Model):
+    """A user's balance as of a ledger entry; the sum of later entries brings it current"""
+    __tablename__ = 'credit_balance_snapshots'
+    
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='CASCADE'), primary_key=True)
+    balance = db.Column(db.Numeric(12, 2), nullable=False, default=0.00)
+    last_entry_id = db.Column(db.BigInteger, nullable=False, default=0)
+    taken_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class BulkOrderJob(db.Model):
+    """Group order whose tickets are issued in chunks from an imported attendee list"""
+    __tablename__ = 'bulk_order_jobs'
+    
+    job_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False, index=True)
+    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='CASCADE'), nullable=False)
+    ticket_type_id = db.Column(db.BigInteger, db.ForeignKey('ticket_types.ticket_type_id', ondelete='CASCADE'), nullable=False)
+    order_id = db.Column(db.BigInteger, db.ForeignKey('orders.order_id', ondelete='SET NULL'), nullable=True)
+    source_format = db.Column(db.Enum('csv', 'ndjson'), nullable=False)
+    unit_price = db.Column(db.Numeric(10, 2), nullable=False)  # price the order was charged at
+    status = db.Column(db.Enum('pending', 'running', 'completed', 'failed'), nullable=False, default='pending', index=True)
+    rows_total = db.Column(db.Integer, nullable=False, default=0)
+    tickets_issued = db.Column(db.Integer, nullable=False, default=0)
+    last_row = db.Column(db.Integer, nullable=False, default=0)  # resume cursor
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'job_id': self.job_id,
+            'user_id': self.user_id,
+            'event_id': self.event_id,
+            'ticket_type_id': self.ticket_type_id,
+            'order_id': self.order_id,
+            'source_format': self.source_format,
+            'unit_price': float(self.unit_price) if self.unit_price is not None else None,
+            'status': self.status,
+            'rows_total': self.rows_total,
+            'tickets_issued': self.tickets_issued,
+            'progress': round(min(1.0, (self.tickets_issued or 0) / self.rows_total), 4) if self.rows_total else 1.0,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class BulkOrderRow(db.Model):
+    """Validated attendee row of a bulk order, staged until its ticket is issued"""
+    __tablename__ = 'bulk_order_rows'
+    
+    job_id = db.Column(db.BigInteger, db.ForeignKey('bulk_order_jobs.job_id', ondelete='CASCADE'), primary_key=True)
+    row_number = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    attendee_name = db.Column(db.String(200), nullable=False)
+    attendee_email = db.Column(db.String(255), nullable=False)
+
+class EventSeatMap(db.Model):
+    """Sold-seat bitmap of an event, indexed by seat ordinal within its venue"""
+    __tablename__ = 'event_seat_maps'
+    
+    event_id = db.Column(db.BigInteger, db.ForeignKey('events.event_id', ondelete='CASCADE'), primary_key=True)
+    seat_count = db.Column(db.Integer, nullable=False, default=0)
+    taken = db.Column(db.LargeBinary, nullable=False)  # bit i set = seat ordinal i is sold
+    version = db.Column(db.Integer, nullable=False, default=1)  # bumped on every change
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
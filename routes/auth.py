@@ -2,9 +2,16 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from models import db, User
 from datetime import datetime
+from utils.conditional import conditional
+from utils.credits import open_account
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+def profile_version():
+    """Conditional GET validator for the current user's profile"""
+    updated_at = db.session.query(User.updated_at).filter(User.user_id == int(get_jwt_identity())).scalar()
+    return (updated_at, None) if updated_at else None
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user"""
@@ -33,6 +40,8 @@ def register():
         user.set_password(data['password'])
         
         db.session.add(user)
+        db.session.flush()
+        open_account(user)
         db.session.commit()
         
         # Generate access token (identity must be a string for PyJWT)
@@ -76,6 +85,7 @@ def login():
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
+@conditional(profile_version)
 def get_profile():
     """Get current user profile"""
     try:
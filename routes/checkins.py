@@ -1,10 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
 from models import db, CheckIn, Ticket, User, Event
 from datetime import datetime
+from utils.checkins import build_event_manifest, manifest_version, record_check_in_batch
+from utils.analytics import record_check_ins
+from utils.conditional import conditional
 
 checkins_bp = Blueprint('checkins', __name__, url_prefix='/api/check-ins')
 
+def can_manage_event(user, event):
+    """Admins and the event's organizer run its gates"""
+    return user is not None and (user.user_type == 'admin' or event.organizer_id == user.user_id)
+
+def event_manifest_version(event_id):
+    """Conditional GET validator for a gate manifest (authorized users only)"""
+    user = User.query.get(int(get_jwt_identity()))
+    event = Event.query.get(event_id)
+    if not event or not can_manage_event(user, event):
+        return None
+    return manifest_version(event_id)
+
 @checkins_bp.route('', methods=['POST'])
 @jwt_required()
 def create_check_in():
@@ -39,6 +55,8 @@ def create_check_in():
         # Check if ticket is already checked in
         if ticket.status == 'used':
             return jsonify({'error': 'Ticket already checked in'}), 400
+        if ticket.status != 'valid':
+            return jsonify({'error': f'Ticket has been {ticket.status}'}), 400
         
         # Check if check-in already exists
         existing_checkin = CheckIn.query.filter_by(ticket_id=ticket.ticket_id).first()
@@ -58,6 +76,7 @@ def create_check_in():
         # Update ticket status (simulating trigger)
         ticket.status = 'used'
         ticket.checked_in_at = datetime.utcnow()
+        record_check_ins(event.event_id)
         
         db.session.commit()
         
@@ -86,7 +105,10 @@ def get_event_check_ins(event_id):
         if user.user_type != 'admin' and event.organizer_id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        check_ins = CheckIn.query.filter_by(event_id=event_id).all()
+        check_ins = CheckIn.query.filter_by(event_id=event_id).options(
+            joinedload(CheckIn.ticket),
+            joinedload(CheckIn.checked_in_by_user)
+        ).all()
         
         check_ins_list = []
         for check_in in check_ins:
@@ -130,3 +152,70 @@ def get_ticket_check_in(ticket_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+@checkins_bp.route('/events/<int:event_id>/manifest', methods=['GET'])
+@jwt_required()
+@conditional(event_manifest_version)
+def get_event_manifest(event_id):
+    """Download the ticket manifest scanners validate against offline"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        
+        if not can_manage_event(user, event):
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        return jsonify(build_event_manifest(event_id)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@checkins_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def create_check_in_batch():
+    """Record a batch of gate scans in one transaction"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        
+        data = request.get_json() or {}
+        
+        if 'event_id' not in data:
+            return jsonify({'error': 'event_id is required'}), 400
+        
+        scans = data.get('scans')
+        if not isinstance(scans, list) or not scans:
+            return jsonify({'error': 'scans must be a non-empty list'}), 400
+        
+        max_size = current_app.config.get('CHECKIN_BATCH_MAX_SIZE', 1000)
+        if len(scans) > max_size:
+            return jsonify({'error': f'At most {max_size} scans per batch'}), 400
+        
+        event = Event.query.get(data['event_id'])
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        
+        if not can_manage_event(user, event):
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        try:
+            results, summary = record_check_in_batch(event.event_id, scans, user_id)
+        except (ValueError, TypeError, AttributeError) as e:
+            db.session.rollback()
+            return jsonify({'error': f'Invalid scan: {str(e)}'}), 400
+        
+        db.session.commit()
+        
+        return jsonify({
+            'event_id': event.event_id,
+            'summary': summary,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
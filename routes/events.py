@@ -1,23 +1,79 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Event, User, Venue, TicketType, EventAnalytics, Order, Payment, Ticket, Refund
+from models import db, Event, User, Venue, TicketType, EventAnalytics, Ticket
 from datetime import datetime
-from sqlalchemy import or_
+from sqlalchemy import func
+from sqlalchemy.orm import load_only, joinedload, selectinload
 import os
 import uuid
 from werkzeug.utils import secure_filename
 from utils.payment_processor import process_refund
-from utils.email_service import send_event_cancelled
+from utils.cancellation import start_event_cancellation, get_active_job
+from utils.pagination import encode_cursor, decode_cursor, keyset_after, parse_limit, parse_fields
+from utils.search import match_subquery, search_events as run_event_search, index_event
+from utils.cache import response_cache
+from utils.db_routing import db_router
+from utils.conditional import conditional
+from utils.analytics import analytics_state, get_analytics_snapshot
+from utils.timeseries import RESOLUTIONS, choose_resolution, is_retained, retention_days, query_event_timeseries
+from utils.checkins import parse_scan_time
+from utils.seat_maps import create_seat_map
 
 events_bp = Blueprint('events', __name__, url_prefix='/api/events')
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
+# Fields that can be requested through `fields=` on the event listing
+EVENT_LIST_FIELDS = [
+    'event_id', 'organizer_id', 'venue_id', 'event_name', 'description', 'category',
+    'start_datetime', 'end_datetime', 'status', 'banner_image', 'created_at', 'updated_at', 'venue'
+]
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def project_event(event, fields):
+    """Serialize only the requested fields of an event"""
+    event_dict = {}
+    for field in fields:
+        if field == 'venue':
+            event_dict['venue'] = event.venue.to_dict() if event.venue else None
+        else:
+            value = getattr(event, field)
+            event_dict[field] = value.isoformat() if isinstance(value, datetime) else value
+    return event_dict
+
+def event_list_version():
+    """Conditional GET validator for the event listing and the venues embedded in it"""
+    last_modified, count, venues_updated = db.session.query(
+        func.max(Event.updated_at),
+        func.count(Event.event_id),
+        func.max(Venue.updated_at)
+    ).outerjoin(Venue, Venue.venue_id == Event.venue_id).one()
+    return last_modified, (count, venues_updated)
+
+def event_version(event_id):
+    """Conditional GET validator for an event, its venue, stock levels and analytics"""
+    row = db.session.query(Event.updated_at, Venue.updated_at).outerjoin(
+        Venue, Venue.venue_id == Event.venue_id
+    ).filter(Event.event_id == event_id).first()
+    if row is None:
+        return None
+    updated_at, venue_updated = row
+    stock = db.session.query(
+        func.count(TicketType.ticket_type_id),
+        func.sum(TicketType.quantity_available)
+    ).filter(TicketType.event_id == event_id).one()
+    return updated_at, (tuple(stock), venue_updated, analytics_state(event_id))
+
+def analytics_version(event_id):
+    """Conditional GET validator for an event's analytics row and pending deltas"""
+    return analytics_state(event_id)
+
 @events_bp.route('', methods=['GET'])
+@db_router.read_only
+@conditional(event_list_version)
 def get_events():
     """Get all events with optional filters"""
     try:
@@ -28,6 +84,25 @@ def get_events():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
+        # Keyset pagination: ?limit=N, then follow the X-Next-Cursor header
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        try:
+            fields = parse_fields(request.args.get('fields'), EVENT_LIST_FIELDS)
+            if limit is not None or cursor:
+                limit = parse_limit(
+                    limit,
+                    current_app.config.get('EVENTS_PAGE_SIZE', 20),
+                    current_app.config.get('EVENTS_MAX_PAGE_SIZE', 100)
+                )
+            after = None
+            if cursor:
+                after_start, after_id = decode_cursor(cursor)
+                after = [datetime.fromisoformat(after_start), int(after_id)]
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e) or 'Invalid cursor'}), 400
+        
         query = Event.query
         
         if status:
@@ -37,36 +112,111 @@ def get_events():
         if city:
             query = query.join(Venue).filter(Venue.city.ilike(f'%{city}%'))
         if search:
-            query = query.filter(
-                or_(
-                    Event.event_name.ilike(f'%{search}%'),
-                    Event.description.ilike(f'%{search}%')
-                )
-            )
+            matches = match_subquery(search)
+            if matches is None:
+                return jsonify([]), 200
+            query = query.filter(Event.event_id.in_(db.session.query(matches.c.event_id)))
         if start_date:
             query = query.filter(Event.start_datetime >= datetime.fromisoformat(start_date))
         if end_date:
             query = query.filter(Event.start_datetime <= datetime.fromisoformat(end_date))
         
-        events = query.all()
+        # Total is a separate COUNT, so only run it when asked for
+        total = query.order_by(None).count() if include_total else None
+        
+        if fields:
+            columns = [getattr(Event, field) for field in fields if field != 'venue']
+            if 'venue' in fields:
+                columns.append(Event.venue_id)
+            query = query.options(load_only(Event.start_datetime, *columns))
+        if not fields or 'venue' in fields:
+            query = query.options(joinedload(Event.venue))
+        if after:
+            query = query.filter(keyset_after([Event.start_datetime, Event.event_id], after))
+        query = query.order_by(Event.start_datetime, Event.event_id)
+        
+        has_more = False
+        if limit:
+            events = query.limit(limit + 1).all()
+            has_more = len(events) > limit
+            events = events[:limit]
+        else:
+            events = query.all()
         
         # Include venue information for each event
         events_list = []
         for event in events:
+            if fields:
+                events_list.append(project_event(event, fields))
+                continue
             event_dict = event.to_dict()
             event_dict['venue'] = event.venue.to_dict() if event.venue else None
             events_list.append(event_dict)
         
-        return jsonify(events_list), 200
+        response = jsonify(events_list)
+        if has_more:
+            response.headers['X-Next-Cursor'] = encode_cursor(events[-1].start_datetime, events[-1].event_id)
+        if total is not None:
+            response.headers['X-Total-Count'] = str(total)
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@events_bp.route('/search', methods=['GET'])
+@db_router.read_only
+def search_events():
+    """Full-text event search with relevance ranking and facet counts"""
+    try:
+        query_text = request.args.get('q', '')
+        status = request.args.get('status', 'published')
+        category = request.args.get('category')
+        city = request.args.get('city')
+        limit = parse_limit(
+            request.args.get('limit', type=int),
+            current_app.config.get('EVENTS_PAGE_SIZE', 20),
+            current_app.config.get('EVENTS_MAX_PAGE_SIZE', 100)
+        )
+        offset = max(0, request.args.get('offset', 0, type=int))
+        
+        results, total, facets = run_event_search(
+            query_text,
+            status=status or None,
+            category=category,
+            city=city,
+            limit=limit,
+            offset=offset
+        )
+        
+        events_list = []
+        for event, score in results:
+            event_dict = event.to_dict()
+            event_dict['venue'] = event.venue.to_dict() if event.venue else None
+            event_dict['score'] = float(score) if score is not None else None
+            events_list.append(event_dict)
+        
+        return jsonify({
+            'query': query_text,
+            'total': total,
+            'results': events_list,
+            'facets': facets
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @events_bp.route('/<int:event_id>', methods=['GET'])
+@db_router.read_only
+@conditional(event_version)
+@response_cache.cached(lambda event_id: [f'event:{event_id}'])
 def get_event(event_id):
     """Get event by ID with details"""
     try:
-        event = Event.query.get(event_id)
+        event = Event.query.options(
+            joinedload(Event.venue),
+            joinedload(Event.organizer),
+            selectinload(Event.ticket_types)
+        ).get(event_id)
         
         if not event:
             return jsonify({'error': 'Event not found'}), 404
@@ -76,9 +226,10 @@ def get_event(event_id):
         event_dict['organizer'] = event.organizer.to_dict() if event.organizer else None
         event_dict['ticket_types'] = [tt.to_dict() for tt in event.ticket_types]
         
-        # Get analytics if available
-        if event.event_analytics:
-            event_dict['analytics'] = event.event_analytics.to_dict()
+        # Get analytics if available (compacted row plus pending deltas)
+        analytics = get_analytics_snapshot(event.event_id)
+        if analytics:
+            event_dict['analytics'] = analytics
         
         return jsonify(event_dict), 200
         
@@ -200,7 +351,10 @@ def create_event():
         else:
             print(f"Warning: Analytics record already exists for event {event.event_id}")
         
-        # Commit event and analytics together
+        create_seat_map(event)
+        index_event(event)
+        
+        # Commit event, analytics and seat map together
         db.session.commit()
         
         return jsonify({
@@ -248,7 +402,9 @@ def update_event(event_id):
         if 'banner_image' in data:
             event.banner_image = data['banner_image']
         
+        index_event(event)
         db.session.commit()
+        response_cache.invalidate(f'event:{event_id}')
         
         return jsonify({
             'message': 'Event updated successfully',
@@ -260,6 +416,8 @@ def update_event(event_id):
         return jsonify({'error': str(e)}), 500
 
 @events_bp.route('/<int:event_id>/ticket-types', methods=['GET'])
+@conditional(event_version)
+@response_cache.cached(lambda event_id: [f'event:{event_id}'])
 def get_ticket_types(event_id):
     """Get all ticket types for an event"""
     try:
@@ -310,7 +468,10 @@ def create_ticket_type(event_id):
         )
         
         db.session.add(ticket_type)
+        # Ticket types have no timestamp of their own, so they age the event
+        event.updated_at = datetime.utcnow()
         db.session.commit()
+        response_cache.invalidate(f'event:{event_id}')
         
         return jsonify({
             'message': 'Ticket type created successfully',
@@ -365,7 +526,9 @@ def update_ticket_type(event_id, ticket_type_id):
         if 'max_purchase' in data:
             ticket_type.max_purchase = data['max_purchase']
         
+        event.updated_at = datetime.utcnow()
         db.session.commit()
+        response_cache.invalidate(f'event:{event_id}')
         
         return jsonify({
             'message': 'Ticket type updated successfully',
@@ -401,7 +564,9 @@ def delete_ticket_type(event_id, ticket_type_id):
             return jsonify({'error': f'Cannot delete ticket type. {tickets_sold} ticket(s) have already been sold.'}), 400
         
         db.session.delete(ticket_type)
+        event.updated_at = datetime.utcnow()
         db.session.commit()
+        response_cache.invalidate(f'event:{event_id}')
         
         return jsonify({
             'message': 'Ticket type deleted successfully'
@@ -413,6 +578,7 @@ def delete_ticket_type(event_id, ticket_type_id):
 
 @events_bp.route('/<int:event_id>/analytics', methods=['GET'])
 @jwt_required()
+@conditional(analytics_version)
 def get_event_analytics(event_id):
     """Get event analytics (organizer/admin only)"""
     try:
@@ -426,21 +592,64 @@ def get_event_analytics(event_id):
         if user.user_type != 'admin' and event.organizer_id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        analytics = event.event_analytics
-        if not analytics:
-            # Backfill a default analytics row for legacy events
-            analytics = EventAnalytics(
-                event_id=event.event_id,
-                total_tickets_sold=0,
-                total_revenue=0.00,
-                total_attendees=0,
-                tickets_by_type={},
-                revenue_by_type={}
-            )
-            db.session.add(analytics)
-            db.session.commit()
+        # Legacy events without a row read as zeroes until the rollup creates one
+        analytics = get_analytics_snapshot(event.event_id) or EventAnalytics(
+            event_id=event.event_id,
+            total_tickets_sold=0,
+            total_revenue=0.00,
+            total_attendees=0,
+            total_checked_in=0,
+            tickets_by_type={},
+            revenue_by_type={}
+        ).to_dict()
+        
+        return jsonify(analytics), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@events_bp.route('/<int:event_id>/timeseries', methods=['GET'])
+@jwt_required()
+@conditional(analytics_version)
+def get_event_timeseries(event_id):
+    """Get sales and check-in time series (organizer/admin only)"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        
+        if user.user_type != 'admin' and event.organizer_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        # ?start=&end= (ISO-8601, UTC) default to the event's whole sales history
+        try:
+            end = parse_scan_time(request.args['end']) if request.args.get('end') else datetime.utcnow()
+            start = parse_scan_time(request.args['start']) if request.args.get('start') else (event.created_at or end)
+        except ValueError:
+            return jsonify({'error': 'Invalid start or end, expected ISO-8601'}), 400
+        if start >= end:
+            return jsonify({'error': 'start must be before end'}), 400
+        
+        resolution = request.args.get('resolution') or choose_resolution(start, end)
+        if resolution not in RESOLUTIONS:
+            return jsonify({'error': f"Invalid resolution. Must be one of: {', '.join(RESOLUTIONS)}"}), 400
+        if not is_retained(resolution, start):
+            return jsonify({'error': f'{resolution.title()} buckets are only kept for '
+                                     f'{retention_days()[resolution]} days; use a coarser resolution'}), 400
+        max_points = current_app.config.get('TIMESERIES_MAX_POINTS', 2000)
+        if (end - start) / RESOLUTIONS[resolution] > max_points:
+            return jsonify({'error': f'Range too large for {resolution} resolution (max {max_points} points)'}), 400
         
-        return jsonify(analytics.to_dict()), 200
+        return jsonify({
+            'event_id': event_id,
+            'resolution': resolution,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'points': query_event_timeseries(event_id, resolution, start, end)
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -555,101 +764,37 @@ def cancel_event(event_id):
         
         # Check if event is already cancelled
         if event.status == 'cancelled':
-            return jsonify({'error': 'Event is already cancelled'}), 400
+            job = get_active_job(event_id)
+            if job and job.status == 'failed':
+                # Resume the refund job from its cursor
+                job.status = 'pending'
+                job.error = None
+                db.session.commit()
+                return jsonify({
+                    'message': 'Cancellation job resumed',
+                    'job': job.to_dict()
+                }), 202
+            return jsonify({
+                'error': 'Event is already cancelled',
+                'job': job.to_dict() if job else None
+            }), 400
         
         # Check if event is already completed
         if event.status == 'completed':
             return jsonify({'error': 'Cannot cancel a completed event'}), 400
         
-        # Get all completed orders for this event
-        orders = Order.query.filter_by(event_id=event_id, status='completed').all()
-        
-        refunded_orders = []
-        refund_errors = []
-        
-        # Process refunds for each order in a single transaction
-        for order in orders:
-            try:
-                # Get the payment for this order
-                payment = Payment.query.filter_by(order_id=order.order_id, status='completed').first()
-                
-                if not payment:
-                    refund_errors.append(f"Order {order.order_number}: No completed payment found")
-                    continue
-                
-                # Skip if payment is already refunded
-                if payment.status == 'refunded':
-                    refund_errors.append(f"Order {order.order_number}: Payment already refunded")
-                    continue
-                
-                refund_amount = float(order.total_amount)
-                
-                # Get the user to refund credits
-                order_user = User.query.get(order.user_id)
-                if not order_user:
-                    refund_errors.append(f"Order {order.order_number}: User not found")
-                    continue
-                
-                # Create refund record
-                refund = Refund(
-                    payment_id=payment.payment_id,
-                    amount=refund_amount,
-                    reason=f"Event cancelled: {event.event_name}",
-                    status='completed',
-                    processed_at=datetime.utcnow()
-                )
-                db.session.add(refund)
-                
-                # Update payment status
-                payment.status = 'refunded'
-                
-                # Refund credits to user account
-                user_credits = float(order_user.credits or 0.0)
-                order_user.credits = user_credits + refund_amount
-                
-                # Update order status
-                order.status = 'refunded'
-                
-                # Update all tickets for this order to refunded status
-                tickets = Ticket.query.filter_by(order_id=order.order_id).all()
-                for ticket in tickets:
-                    if ticket.status != 'refunded':
-                        ticket.status = 'refunded'
-                        # Link refund to first ticket if not already linked
-                        if not refund.ticket_id:
-                            refund.ticket_id = ticket.ticket_id
-                
-                refunded_orders.append({
-                    'order_id': order.order_id,
-                    'order_number': order.order_number,
-                    'refund_amount': refund_amount
-                })
-                
-            except Exception as e:
-                refund_errors.append(f"Order {order.order_number}: {str(e)}")
-                current_app.logger.error(f"Error processing refund for order {order.order_id}: {str(e)}")
-                continue
-        
-        # Update event status to cancelled
-        event.status = 'cancelled'
-        
-        # Commit all changes
+        # Refunds run in chunks in the background; poll the job for progress
+        job = start_event_cancellation(event, user_id)
         db.session.commit()
+        response_cache.invalidate(f'event:{event_id}')
         
-        # Send cancellation emails to all ticket holders
-        try:
-            send_event_cancelled(event_id)
-        except Exception as e:
-            current_app.logger.error(f"Error sending cancellation emails: {str(e)}")
-            # Don't fail the cancellation if email fails
-        
-        return jsonify({
-            'message': 'Event cancelled successfully',
+        response = jsonify({
+            'message': 'Event cancelled. Refunds are being processed.',
             'event': event.to_dict(),
-            'refunded_orders_count': len(refunded_orders),
-            'refunded_orders': refunded_orders,
-            'refund_errors': refund_errors if refund_errors else None
-        }), 200
+            'job': job.to_dict()
+        })
+        response.headers['Location'] = f'/api/events/{event_id}/cancellation'
+        return response, 202
         
     except Exception as e:
         db.session.rollback()
@@ -662,3 +807,27 @@ def cancel_event(event_id):
             'details': error_trace if current_app.config.get('DEBUG') else None
         }), 500
 
+
+@events_bp.route('/<int:event_id>/cancellation', methods=['GET'])
+@jwt_required()
+def get_cancellation_status(event_id):
+    """Get progress of an event's cancellation and refund job (organizer/admin only)"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        
+        if user.user_type != 'admin' and event.organizer_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        job = get_active_job(event_id)
+        if not job:
+            return jsonify({'error': 'No cancellation job for this event'}), 404
+        
+        return jsonify(job.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,66 @@
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import Event, User
+from utils.exports import EXPORT_DATASETS, EXPORT_FORMATS, export_statement, stream_rows, encode_rows, chunk_output
+from utils.pagination import parse_fields
+from utils.db_routing import db_router
+
+exports_bp = Blueprint('exports', __name__, url_prefix='/api/exports')
+
+def wants_gzip():
+    """?gzip=1 / ?gzip=0 decide explicitly, otherwise follow Accept-Encoding"""
+    explicit = request.args.get('gzip')
+    if explicit is not None:
+        return explicit.lower() in ('1', 'true')
+    return request.accept_encodings.quality('gzip') > 0
+
+@exports_bp.route('/events/<int:event_id>/<dataset>', methods=['GET'])
+@db_router.read_only
+@jwt_required()
+def export_event_dataset(event_id, dataset):
+    """Stream an event's orders, attendees or check-ins as CSV or NDJSON"""
+    try:
+        if dataset not in EXPORT_DATASETS:
+            return jsonify({'error': f"Unknown export. Use one of: {', '.join(EXPORT_DATASETS)}"}), 404
+            
+        user = User.query.get(get_jwt_identity())
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        if user.user_type != 'admin' and event.organizer_id != user.user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+            
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+            
+        columns, _ = EXPORT_DATASETS[dataset]
+        try:
+            names = parse_fields(request.args.get('columns'), columns) or list(columns)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+            
+        gzip = wants_gzip()
+        rows = stream_rows(
+            export_statement(dataset, event_id, names),
+            current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+        )
+        body = chunk_output(
+            encode_rows(rows, names, export_format),
+            gzip=gzip,
+            flush_bytes=current_app.config.get('EXPORT_FLUSH_BYTES', 64 * 1024)
+        )
+        
+        # No Content-Length: the server sends the body with chunked transfer encoding
+        response = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[export_format])
+        filename = f"event-{event_id}-{dataset}.{export_format}"
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['Cache-Control'] = 'no-store'
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.headers['Vary'] = 'Accept-Encoding'
+        if gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,13 +1,54 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Order, User, Ticket, TicketType, Event
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, Order, User, Ticket, TicketType, Event, TicketHold, Payment, BulkOrderJob
 from utils.order_generator import create_order
 from utils.email_service import send_order_confirmation
+from utils.holds import create_hold, release_hold, hold_to_ticket_items
+from utils.bulk_orders import stage_attendees, AttendeeListError
+from utils.waiting_room import admission_required
+from utils.conditional import conditional
 
 orders_bp = Blueprint('orders', __name__, url_prefix='/api/orders')
 
+def order_list_version():
+    """Conditional GET validator for the current user's order list"""
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if not user:
+        return None
+    query = db.session.query(
+        func.max(Order.updated_at),
+        func.count(Order.order_id),
+        func.max(Event.updated_at)
+    ).join(Event, Event.event_id == Order.event_id)
+    if user.user_type != 'admin':
+        query = query.filter(Order.user_id == user_id)
+    last_modified, count, event_updated = query.one()
+    return last_modified, (count, event_updated)
+
+def order_version(order_id):
+    """Conditional GET validator for an order with its tickets and payments"""
+    user_id = int(get_jwt_identity())
+    order = db.session.query(Order.user_id, Order.updated_at).filter(Order.order_id == order_id).first()
+    if not order:
+        return None
+    # Leave authorization to the view: never validate someone else's order
+    user = User.query.get(user_id)
+    if not user or (user.user_type != 'admin' and order.user_id != user_id):
+        return None
+    tickets = db.session.query(
+        Ticket.status, func.count(Ticket.ticket_id), func.max(Ticket.checked_in_at)
+    ).filter(Ticket.order_id == order_id).group_by(Ticket.status).order_by(Ticket.status).all()
+    payments = db.session.query(
+        Payment.status, func.count(Payment.payment_id)
+    ).filter(Payment.order_id == order_id).group_by(Payment.status).order_by(Payment.status).all()
+    return order.updated_at, ([tuple(row) for row in tickets], [tuple(row) for row in payments])
+
 @orders_bp.route('', methods=['POST'])
 @jwt_required()
+@admission_required
 def create_new_order():
     """Create a new order"""
     try:
@@ -75,23 +116,28 @@ def create_new_order():
 
 @orders_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional(order_list_version)
 def get_orders():
     """Get user's orders"""
     try:
         user_id = get_jwt_identity()
         user = User.query.get(user_id)
         
+        # Count tickets in SQL instead of loading every order's tickets
+        ticket_count = db.session.query(func.count(Ticket.ticket_id)).filter(
+            Ticket.order_id == Order.order_id
+        ).correlate(Order).scalar_subquery()
+        query = db.session.query(Order, ticket_count).options(joinedload(Order.event))
+        
         # Admin can see all orders
-        if user.user_type == 'admin':
-            orders = Order.query.all()
-        else:
-            orders = Order.query.filter_by(user_id=user_id).all()
+        if user.user_type != 'admin':
+            query = query.filter(Order.user_id == user_id)
         
         orders_list = []
-        for order in orders:
+        for order, count in query.all():
             order_dict = order.to_dict()
             order_dict['event'] = order.event.to_dict() if order.event else None
-            order_dict['ticket_count'] = len(order.tickets)
+            order_dict['ticket_count'] = count
             orders_list.append(order_dict)
         
         return jsonify(orders_list), 200
@@ -101,13 +147,18 @@ def get_orders():
 
 @orders_bp.route('/<int:order_id>', methods=['GET'])
 @jwt_required()
+@conditional(order_version)
 def get_order(order_id):
     """Get order by ID"""
     try:
         user_id = get_jwt_identity()
         user = User.query.get(user_id)
         
-        order = Order.query.get(order_id)
+        order = Order.query.options(
+            joinedload(Order.event),
+            selectinload(Order.tickets),
+            selectinload(Order.payments)
+        ).get(order_id)
         if not order:
             return jsonify({'error': 'Order not found'}), 404
         
@@ -127,6 +178,7 @@ def get_order(order_id):
 
 @orders_bp.route('/<int:order_id>/tickets', methods=['GET'])
 @jwt_required()
+@conditional(order_version)
 def get_order_tickets(order_id):
     """Get tickets for an order"""
     try:
@@ -141,7 +193,10 @@ def get_order_tickets(order_id):
         if user.user_type != 'admin' and order.user_id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        tickets = Ticket.query.filter_by(order_id=order_id).all()
+        tickets = Ticket.query.filter_by(order_id=order_id).options(
+            joinedload(Ticket.ticket_type),
+            joinedload(Ticket.seat)
+        ).all()
         
         tickets_list = []
         for ticket in tickets:
@@ -155,3 +210,300 @@ def get_order_tickets(order_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@orders_bp.route('/holds', methods=['POST'])
+@jwt_required()
+@admission_required
+def create_ticket_hold():
+    """Hold tickets (and optionally specific seats) ahead of checkout"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if user.user_type != 'attendee':
+            return jsonify({'error': 'Only attendees can purchase tickets'}), 403
+        
+        data = request.get_json()
+        
+        required_fields = ['event_id', 'ticket_items']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        try:
+            event_id = int(data['event_id'])
+        except Exception:
+            return jsonify({'error': 'Invalid event_id'}), 400
+        
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        if event.status != 'published':
+            return jsonify({'error': f'Cannot purchase tickets for a {event.status} event'}), 400
+        
+        ticket_items = data['ticket_items']
+        if not ticket_items:
+            return jsonify({'error': 'ticket_items must not be empty'}), 400
+        for item in ticket_items:
+            try:
+                item['ticket_type_id'] = int(item['ticket_type_id'])
+            except Exception:
+                return jsonify({'error': 'Invalid ticket_type_id'}), 400
+        
+        success, message, hold = create_hold(user_id, event, ticket_items)
+        if not success:
+            return jsonify({'error': message}), 409
+        
+        return jsonify({
+            'message': message,
+            'hold': hold.to_dict()
+        }), 201
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@orders_bp.route('/holds/<hold_token>', methods=['GET'])
+@jwt_required()
+def get_ticket_hold(hold_token):
+    """Get a hold by token"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        hold = TicketHold.query.filter_by(hold_token=hold_token, user_id=user_id).first()
+        if not hold:
+            return jsonify({'error': 'Hold not found'}), 404
+        
+        return jsonify(hold.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@orders_bp.route('/holds/<hold_token>', methods=['DELETE'])
+@jwt_required()
+def release_ticket_hold(hold_token):
+    """Release a hold early and return its stock"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        hold = TicketHold.query.filter_by(hold_token=hold_token, user_id=user_id).with_for_update().first()
+        if not hold:
+            return jsonify({'error': 'Hold not found'}), 404
+        if hold.status != 'active':
+            return jsonify({'error': f'Hold is already {hold.status}'}), 400
+        
+        release_hold(hold)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Hold released successfully',
+            'hold': hold.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@orders_bp.route('/holds/<hold_token>/checkout', methods=['POST'])
+@jwt_required()
+def checkout_ticket_hold(hold_token):
+    """Convert an active hold into a paid order"""
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+        
+        # Lock the hold so the sweeper skips it while payment runs
+        hold = TicketHold.query.filter_by(hold_token=hold_token, user_id=user_id).with_for_update().first()
+        if not hold:
+            return jsonify({'error': 'Hold not found'}), 404
+        if hold.status != 'active':
+            db.session.rollback()
+            return jsonify({'error': f'Hold is already {hold.status}'}), 400
+        if hold.is_expired():
+            release_hold(hold, status='expired')
+            db.session.commit()
+            return jsonify({'error': 'Hold has expired'}), 410
+        
+        event = Event.query.get(hold.event_id)
+        if event.status != 'published':
+            release_hold(hold)
+            db.session.commit()
+            return jsonify({'error': f'Cannot purchase tickets for a {event.status} event'}), 400
+        
+        # Attendee details keyed by ticket_type_id, applied in seat order
+        attendees = data.get('attendees') or {}
+        ticket_items = hold_to_ticket_items(hold)
+        offsets = {}
+        for item in ticket_items:
+            tt_attendees = attendees.get(str(item['ticket_type_id'])) or []
+            start = offsets.get(item['ticket_type_id'], 0)
+            item['attendees'] = tt_attendees[start:start + item['quantity']]
+            offsets[item['ticket_type_id']] = start + item['quantity']
+        
+        success, message, order = create_order(
+            user_id=user_id,
+            event_id=hold.event_id,
+            ticket_items=ticket_items,
+            promo_code=data.get('promo_code'),
+            payment_method=data.get('payment_method', 'credit_card'),
+            hold=hold
+        )
+        
+        if not success:
+            return jsonify({'error': message}), 400
+        
+        order_dict = order.to_dict()
+        order_dict['tickets'] = [ticket.to_dict() for ticket in order.tickets]
+        
+        user = User.query.get(user_id)
+        return jsonify({
+            'message': 'Order created successfully',
+            'order': order_dict,
+            'user': user.to_dict() if user else None
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+BULK_FORMATS = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson'
+}
+
+@orders_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+@admission_required
+def create_bulk_order():
+    """Create a group order from a streamed CSV or NDJSON attendee list.
+    
+    The body is the attendee list itself (one name and email per row);
+    event_id, ticket_type_id, promo_code and payment_method are query
+    parameters. The order is priced and paid right away and its tickets
+    are issued in the background; poll the returned job for progress.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if user.user_type != 'attendee':
+            return jsonify({'error': 'Only attendees can purchase tickets'}), 403
+            
+        try:
+            event_id = int(request.args['event_id'])
+            ticket_type_id = int(request.args['ticket_type_id'])
+        except (KeyError, ValueError):
+            return jsonify({'error': 'event_id and ticket_type_id query parameters are required'}), 400
+            
+        source_format = request.args.get('format') or BULK_FORMATS.get(request.mimetype)
+        if source_format not in ('csv', 'ndjson'):
+            return jsonify({'error': 'Send the attendee list as text/csv or application/x-ndjson'}), 415
+            
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        if event.status in ('cancelled', 'completed'):
+            return jsonify({'error': f'Cannot purchase tickets for a {event.status} event'}), 400
+            
+        ticket_type = TicketType.query.get(ticket_type_id)
+        if not ticket_type or ticket_type.event_id != event_id:
+            return jsonify({'error': 'Ticket type does not belong to this event'}), 400
+            
+        job = BulkOrderJob(
+            user_id=user_id,
+            event_id=event_id,
+            ticket_type_id=ticket_type_id,
+            source_format=source_format,
+            unit_price=ticket_type.price,
+            status='pending'
+        )
+        db.session.add(job)
+        db.session.flush()
+        
+        try:
+            count, errors = stage_attendees(
+                job,
+                request.stream,
+                source_format,
+                current_app.config.get('BULK_ORDER_MAX_ROWS', 20000),
+                current_app.config.get('BULK_ORDER_MAX_ERRORS', 100),
+                current_app.config.get('BULK_ORDER_STAGE_BATCH_SIZE', 1000)
+            )
+        except AttendeeListError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        if errors:
+            db.session.rollback()
+            return jsonify({'error': 'The attendee list has invalid rows', 'errors': errors}), 400
+        if not count:
+            db.session.rollback()
+            return jsonify({'error': 'The attendee list is empty'}), 400
+        job.rows_total = count
+        
+        # Same pricing, promo, stock and payment path as a regular order
+        success, message, order = create_order(
+            user_id=user_id,
+            event_id=event_id,
+            ticket_items=[{'ticket_type_id': ticket_type_id, 'quantity': count}],
+            promo_code=request.args.get('promo_code'),
+            payment_method=request.args.get('payment_method', 'credit_card'),
+            bulk_job=job
+        )
+        if not success:
+            return jsonify({'error': message}), 400
+            
+        response = jsonify({
+            'message': 'Bulk order created. Tickets are being issued.',
+            'order': order.to_dict(),
+            'job': job.to_dict()
+        })
+        response.headers['Location'] = f'/api/orders/bulk/{job.job_id}'
+        return response, 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def get_own_bulk_job(job_id):
+    """(job, error response) for a bulk order job the current user may see"""
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    job = BulkOrderJob.query.get(job_id)
+    if not job:
+        return None, (jsonify({'error': 'Bulk order not found'}), 404)
+    if not user or (user.user_type != 'admin' and job.user_id != user_id):
+        return None, (jsonify({'error': 'Unauthorized'}), 403)
+    return job, None
+
+@orders_bp.route('/bulk/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_bulk_order(job_id):
+    """Get progress of a bulk order's ticket issuance"""
+    try:
+        job, error = get_own_bulk_job(job_id)
+        if error:
+            return error
+        return jsonify(job.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@orders_bp.route('/bulk/<int:job_id>/resume', methods=['POST'])
+@jwt_required()
+def resume_bulk_order(job_id):
+    """Retry a failed bulk order from where it stopped"""
+    try:
+        job, error = get_own_bulk_job(job_id)
+        if error:
+            return error
+        if job.status != 'failed':
+            return jsonify({'error': f'Bulk order is {job.status}', 'job': job.to_dict()}), 400
+        job.status = 'pending'
+        job.error = None
+        db.session.commit()
+        return jsonify({'message': 'Bulk order resumed', 'job': job.to_dict()}), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
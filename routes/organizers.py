@@ -0,0 +1,188 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, Event, User, Venue, TicketType, EventAnalytics, AnalyticsDelta
+from datetime import datetime
+from sqlalchemy import func
+from utils.pagination import encode_cursor, decode_cursor, keyset_after, parse_limit
+from utils.conditional import conditional
+
+organizers_bp = Blueprint('organizers', __name__, url_prefix='/api/organizers')
+
+def organizer_filter(organizer_id):
+    """Criteria restricting events to one organizer; None means every organizer"""
+    return [] if organizer_id is None else [Event.organizer_id == organizer_id]
+
+def dashboard_organizer_id(user_id, user_type):
+    """Whose events a dashboard covers: admins see every organizer's (None)"""
+    return None if user_type == 'admin' else user_id
+
+def organizer_event_stats(organizer_id):
+    """Per-event sales, revenue, check-ins and inventory for an organizer as one query.
+    
+    Sales come from the analytics rollup plus pending deltas, and stock from
+    the ticket types, each grouped in a derived table restricted to the
+    organizer's events, so the cost does not depend on how many orders exist.
+    An organizer_id of None covers every organizer's events.
+    """
+    scope = organizer_filter(organizer_id)
+    pending = db.session.query(
+        AnalyticsDelta.event_id.label('event_id'),
+        func.sum(AnalyticsDelta.tickets_sold).label('tickets_sold'),
+        func.sum(AnalyticsDelta.revenue).label('revenue'),
+        func.sum(AnalyticsDelta.checked_in).label('checked_in')
+    ).join(Event, Event.event_id == AnalyticsDelta.event_id).filter(
+        *scope
+    ).group_by(AnalyticsDelta.event_id).subquery()
+    
+    stock = db.session.query(
+        TicketType.event_id.label('event_id'),
+        func.sum(TicketType.quantity_total).label('capacity'),
+        func.sum(TicketType.quantity_available).label('remaining')
+    ).join(Event, Event.event_id == TicketType.event_id).filter(
+        *scope
+    ).group_by(TicketType.event_id).subquery()
+    
+    return db.session.query(
+        Event.event_id,
+        Event.event_name,
+        Event.status,
+        Event.start_datetime,
+        Event.end_datetime,
+        Event.banner_image,
+        Venue.venue_name,
+        Venue.city,
+        (func.coalesce(EventAnalytics.total_tickets_sold, 0) + func.coalesce(pending.c.tickets_sold, 0)).label('tickets_sold'),
+        (func.coalesce(EventAnalytics.total_revenue, 0) + func.coalesce(pending.c.revenue, 0)).label('revenue'),
+        (func.coalesce(EventAnalytics.total_checked_in, 0) + func.coalesce(pending.c.checked_in, 0)).label('checked_in'),
+        func.coalesce(stock.c.capacity, 0).label('capacity'),
+        func.coalesce(stock.c.remaining, 0).label('remaining')
+    ).outerjoin(
+        Venue, Venue.venue_id == Event.venue_id
+    ).outerjoin(
+        EventAnalytics, EventAnalytics.event_id == Event.event_id
+    ).outerjoin(
+        pending, pending.c.event_id == Event.event_id
+    ).outerjoin(
+        stock, stock.c.event_id == Event.event_id
+    ).filter(*scope)
+
+def dashboard_version():
+    """Conditional GET validator for the current user's dashboard"""
+    user_id = int(get_jwt_identity())
+    user_type = db.session.query(User.user_type).filter(User.user_id == user_id).scalar()
+    scope = organizer_filter(dashboard_organizer_id(user_id, user_type))
+    events = db.session.query(
+        func.max(Event.updated_at),
+        func.count(Event.event_id)
+    ).filter(*scope).one()
+    analytics = db.session.query(func.max(EventAnalytics.last_updated)).join(
+        Event, Event.event_id == EventAnalytics.event_id
+    ).filter(*scope).scalar()
+    pending = db.session.query(
+        func.count(AnalyticsDelta.delta_id),
+        func.max(AnalyticsDelta.delta_id)
+    ).join(Event, Event.event_id == AnalyticsDelta.event_id).filter(*scope).one()
+    # Holds move stock without touching events or analytics
+    remaining = db.session.query(func.sum(TicketType.quantity_available)).join(
+        Event, Event.event_id == TicketType.event_id
+    ).filter(*scope).scalar()
+    return events[0], (events[1], analytics, tuple(pending), remaining)
+
+def serialize_event_stats(row):
+    """Dashboard row -> JSON"""
+    tickets_sold = int(row.tickets_sold or 0)
+    return {
+        'event_id': row.event_id,
+        'event_name': row.event_name,
+        'status': row.status,
+        'start_datetime': row.start_datetime.isoformat() if row.start_datetime else None,
+        'end_datetime': row.end_datetime.isoformat() if row.end_datetime else None,
+        'banner_image': row.banner_image,
+        'venue': {'venue_name': row.venue_name, 'city': row.city} if row.venue_name else None,
+        'tickets_sold': tickets_sold,
+        'revenue': float(row.revenue or 0),
+        'checked_in': int(row.checked_in or 0),
+        'attendance_rate': round(int(row.checked_in or 0) * 100.0 / tickets_sold, 2) if tickets_sold > 0 else 0.0,
+        'capacity': int(row.capacity or 0),
+        'remaining': int(row.remaining or 0)
+    }
+
+@organizers_bp.route('/me/dashboard', methods=['GET'])
+@jwt_required()
+@conditional(dashboard_version)
+def get_my_dashboard():
+    """Portfolio summary plus a page of per-event stats for the current organizer (all events for admins)"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+            
+        if user.user_type not in ['admin', 'organizer']:
+            return jsonify({'error': 'Unauthorized. Only organizers and admins have a dashboard.'}), 403
+            
+        status = request.args.get('status')
+        cursor = request.args.get('cursor')
+        try:
+            limit = parse_limit(
+                request.args.get('limit', type=int),
+                current_app.config.get('DASHBOARD_PAGE_SIZE', 50),
+                current_app.config.get('DASHBOARD_MAX_PAGE_SIZE', 200)
+            )
+            after = None
+            if cursor:
+                after_start, after_id = decode_cursor(cursor)
+                after = [datetime.fromisoformat(after_start), int(after_id)]
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e) or 'Invalid cursor'}), 400
+            
+        stats = organizer_event_stats(dashboard_organizer_id(user_id, user.user_type))
+        
+        # Portfolio totals over every event, grouped by status in the same pass
+        totals = stats.subquery()
+        summary = {
+            'total_events': 0,
+            'events_by_status': {},
+            'tickets_sold': 0,
+            'revenue': 0.0,
+            'checked_in': 0,
+            'remaining': 0
+        }
+        for row in db.session.query(
+            totals.c.status,
+            func.count(),
+            func.sum(totals.c.tickets_sold),
+            func.sum(totals.c.revenue),
+            func.sum(totals.c.checked_in),
+            func.sum(totals.c.remaining)
+        ).group_by(totals.c.status).all():
+            summary['total_events'] += row[1]
+            summary['events_by_status'][row[0]] = row[1]
+            summary['tickets_sold'] += int(row[2] or 0)
+            summary['revenue'] += float(row[3] or 0)
+            summary['checked_in'] += int(row[4] or 0)
+            summary['remaining'] += int(row[5] or 0)
+        summary['revenue'] = round(summary['revenue'], 2)
+        
+        page = stats
+        if status:
+            page = page.filter(Event.status == status)
+        if after:
+            page = page.filter(keyset_after([Event.start_datetime, Event.event_id], after))
+        rows = page.order_by(Event.start_datetime, Event.event_id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        next_cursor = encode_cursor(rows[-1].start_datetime, rows[-1].event_id) if has_more else None
+        response = jsonify({
+            'summary': summary,
+            'events': [serialize_event_stats(row) for row in rows],
+            'next_cursor': next_cursor
+        })
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
 from models import db, Payment, Order, User, Refund
 from utils.payment_processor import process_payment, process_refund
 from utils.email_service import send_refund_processed
@@ -102,7 +103,10 @@ def get_refunds():
         if user.user_type != 'admin':
             return jsonify({'error': 'Unauthorized'}), 403
         
-        refunds = Refund.query.all()
+        refunds = Refund.query.options(
+            joinedload(Refund.payment),
+            joinedload(Refund.ticket)
+        ).all()
         
         refunds_list = []
         for refund in refunds:
@@ -1,6 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, SeatingSection, Seat, Venue, User, Ticket
+from models import db, SeatingSection, Seat, Venue, User, Ticket, Order, Event, EventSeatMap, TicketType
+from utils.db_routing import db_router
+from utils.conditional import conditional
+from utils.seat_maps import (
+    venue_seat_count, get_venue_layout, get_seat_map, extend_venue_seat_maps, touch_venue_layout, encode_runs,
+    available_seats
+)
+from utils.seat_allocator import allocate_seats
 
 seating_bp = Blueprint('seating', __name__, url_prefix='/api/seating')
 
@@ -35,6 +42,8 @@ def create_section(venue_id):
         )
         
         db.session.add(section)
+        db.session.flush()
+        touch_venue_layout(venue_id)
         db.session.commit()
         
         return jsonify({
@@ -84,6 +93,10 @@ def create_seats(section_id):
             db.session.add(seat)
             created_seats.append(seat)
         
+        # Existing events at the venue get the new seats as available
+        db.session.flush()
+        extend_venue_seat_maps(section.venue_id)
+        touch_venue_layout(section.venue_id)
         db.session.commit()
         
         return jsonify({
@@ -95,7 +108,19 @@ def create_seats(section_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def seat_map_version(event_id):
+    """Conditional GET validator for an event's seat availability and its venue layout"""
+    state = db.session.query(EventSeatMap.updated_at, EventSeatMap.version, Venue.layout_version).join(
+        Event, Event.event_id == EventSeatMap.event_id
+    ).join(
+        Venue, Venue.venue_id == Event.venue_id
+    ).filter(EventSeatMap.event_id == event_id).first()
+    if state is None:
+        return None
+    return state.updated_at, (state.version, state.layout_version)
+
 @seating_bp.route('/venues/<int:venue_id>/chart', methods=['GET'])
+@db_router.read_only
 def get_seating_chart(venue_id):
     """Get seating chart for a venue"""
     try:
@@ -103,79 +128,141 @@ def get_seating_chart(venue_id):
         if not venue:
             return jsonify({'error': 'Venue not found'}), 404
         
-        sections = SeatingSection.query.filter_by(venue_id=venue_id).all()
+        # Sections and seats come from the in-process layout cache; seat
+        # availability changes with every sale, so it is read per request
+        layout = get_venue_layout(venue_id, venue_seat_count(venue_id))
         
-        chart = {
-            'venue_id': venue_id,
-            'venue_name': venue.venue_name,
-            'sections': []
-        }
-        
-        for section in sections:
-            seats = Seat.query.filter_by(section_id=section.section_id).all()
-            
-            # Get booked seats for active events
-            booked_seat_ids = set()
-            tickets = Ticket.query.join(Order).filter(
-                Ticket.seat_id.in_([seat.seat_id for seat in seats]),
-                Ticket.status == 'valid',
-                Order.status == 'completed'
-            ).all()
-            booked_seat_ids = {ticket.seat_id for ticket in tickets}
-            
-            section_dict = section.to_dict()
+        # Get booked seats for active events
+        booked_seat_ids = {row[0] for row in db.session.query(Ticket.seat_id).join(Order).join(
+            Seat, Ticket.seat_id == Seat.seat_id
+        ).join(
+            SeatingSection, Seat.section_id == SeatingSection.section_id
+        ).filter(
+            SeatingSection.venue_id == venue_id,
+            Ticket.status == 'valid',
+            Order.status == 'completed'
+        ).all()}
+        
+        # Sections and seats come from the layout rows in one pass
+        sections = layout.section_dicts()
+        for section_dict in sections.values():
             section_dict['seats'] = []
-            
-            for seat in seats:
-                seat_dict = seat.to_dict()
-                seat_dict['is_available'] = seat.seat_id not in booked_seat_ids
-                section_dict['seats'].append(seat_dict)
-            
-            chart['sections'].append(section_dict)
+        for ordinal, seat in enumerate(layout.seats):
+            seat_dict = layout.seat_dict(ordinal)
+            seat_dict['is_available'] = seat.seat_id not in booked_seat_ids
+            sections[seat.section_id]['seats'].append(seat_dict)
         
-        return jsonify(chart), 200
+        return jsonify({
+            'venue_id': venue_id,
+            'venue_name': venue.venue_name,
+            'sections': list(sections.values())
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @seating_bp.route('/events/<int:event_id>/available-seats', methods=['GET'])
+@db_router.read_only
+@conditional(seat_map_version)
 def get_available_seats(event_id):
     """Get available seats for an event"""
     try:
-        from models import Event
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        
+        seat_map, layout = get_seat_map(event)
+        seats = available_seats(seat_map, layout)
+        
+        return jsonify({
+            'event_id': event_id,
+            'available_seats': seats,
+            'total_available': len(seats)
+        }), 200
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@seating_bp.route('/events/<int:event_id>/availability', methods=['GET'])
+@db_router.read_only
+@conditional(seat_map_version)
+def get_seat_availability(event_id):
+    """Compact seat availability: ?format=rle (default) or ?format=bitmap.
+    
+    Both are indexed by seat ordinal, the `ordinal` of each seat in the
+    venue's seating chart. The bitmap has one bit per seat, lowest ordinal
+    in the least significant bit of the first byte, set when sold.
+    """
+    try:
         event = Event.query.get(event_id)
         if not event:
             return jsonify({'error': 'Event not found'}), 404
         
-        venue = event.venue
-        sections = SeatingSection.query.filter_by(venue_id=venue.venue_id).all()
+        output_format = request.args.get('format', 'rle').lower()
+        if output_format not in ('rle', 'bitmap'):
+            return jsonify({'error': 'format must be rle or bitmap'}), 400
         
-        # Get booked seats for this event
-        booked_seat_ids = set()
-        tickets = Ticket.query.join(Order).filter(
-            Order.event_id == event_id,
-            Ticket.seat_id.isnot(None),
-            Ticket.status == 'valid',
-            Order.status == 'completed'
-        ).all()
-        booked_seat_ids = {ticket.seat_id for ticket in tickets}
-        
-        available_seats = []
-        for section in sections:
-            seats = Seat.query.filter_by(section_id=section.section_id).all()
-            for seat in seats:
-                if seat.seat_id not in booked_seat_ids:
-                    seat_dict = seat.to_dict()
-                    seat_dict['section'] = section.to_dict()
-                    available_seats.append(seat_dict)
+        seat_map, layout = get_seat_map(event)
+        if output_format == 'bitmap':
+            response = Response(bytes(seat_map.taken), mimetype='application/octet-stream')
+            response.headers['X-Seat-Count'] = str(seat_map.seat_count)
+            response.headers['X-Seat-Map-Version'] = str(seat_map.version)
+            return response
         
         return jsonify({
             'event_id': event_id,
-            'available_seats': available_seats,
-            'total_available': len(available_seats)
+            'venue_id': event.venue_id,
+            'seat_count': seat_map.seat_count,
+            'version': seat_map.version,
+            # Alternating available / sold run lengths, starting with available
+            'runs': encode_runs(seat_map)
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@seating_bp.route('/events/<int:event_id>/best-available', methods=['GET'])
+@db_router.read_only
+def get_best_available_seats(event_id):
+    """Suggest the best adjacent seats: ?quantity=N and ?ticket_type_id= or ?section_id=.
+    
+    Nothing is reserved; hold or order with `best_available` to claim seats.
+    """
+    try:
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        
+        quantity = request.args.get('quantity', 1, type=int)
+        max_quantity = current_app.config.get('SEAT_ALLOCATION_MAX_QUANTITY', 20)
+        if not 1 <= quantity <= max_quantity:
+            return jsonify({'error': f'quantity must be between 1 and {max_quantity}'}), 400
+        
+        section_id = request.args.get('section_id', type=int)
+        ticket_type_id = request.args.get('ticket_type_id', type=int)
+        if ticket_type_id is not None:
+            ticket_type = TicketType.query.get(ticket_type_id)
+            if not ticket_type or ticket_type.event_id != event_id:
+                return jsonify({'error': 'Ticket type not found'}), 404
+            section_id = ticket_type.section_id
+        
+        seat_ids = allocate_seats(event, quantity, section_id, claim=False)
+        if not seat_ids:
+            return jsonify({'error': 'Not enough adjacent seats available'}), 409
+        
+        seat_map, layout = get_seat_map(event)
+        sections = layout.section_dicts()
+        seats = []
+        for seat_id in seat_ids:
+            seat = layout.seat_dict(layout.ordinals[seat_id])
+            seat['section'] = sections.get(seat['section_id'])
+            seats.append(seat)
+        
+        return jsonify({
+            'event_id': event_id,
+            'quantity': quantity,
+            'seats': seats
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,7 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Ticket, User, Order
-from utils.qr_generator import generate_ticket_qr_code
+from models import db, Ticket, User, Order, Event
+from utils.qr_generator import generate_ticket_qr_code, generate_ticket_qr_codes, QR_FORMATS
+from utils.pagination import encode_cursor, decode_cursor, parse_limit
+from utils.ticket_tokens import verify_ticket_token
 
 tickets_bp = Blueprint('tickets', __name__, url_prefix='/api/tickets')
 
@@ -52,17 +54,93 @@ def get_ticket_qr(ticket_id):
         if user.user_type != 'admin' and order.user_id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        qr_code = generate_ticket_qr_code(ticket.ticket_number, ticket.ticket_id)
+        fmt = request.args.get('format', 'png')
+        if fmt not in QR_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(QR_FORMATS)}"}), 400
+        
+        qr_code = generate_ticket_qr_code(ticket, order.event, fmt)
         
         return jsonify({
             'ticket_id': ticket.ticket_id,
             'ticket_number': ticket.ticket_number,
+            'format': fmt,
+            'mime_type': QR_FORMATS[fmt],
             'qr_code': qr_code
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@tickets_bp.route('/qr', methods=['GET'])
+@jwt_required()
+def get_ticket_qr_batch():
+    """Get QR codes for every ticket of an order or an event (paginated for events)"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        
+        order_id = request.args.get('order_id', type=int)
+        event_id = request.args.get('event_id', type=int)
+        if bool(order_id) == bool(event_id):
+            return jsonify({'error': 'Exactly one of order_id or event_id is required'}), 400
+        
+        fmt = request.args.get('format', 'png')
+        if fmt not in QR_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(QR_FORMATS)}"}), 400
+        
+        try:
+            limit = parse_limit(
+                request.args.get('limit', type=int),
+                current_app.config.get('QR_BATCH_PAGE_SIZE', 500),
+                current_app.config.get('QR_BATCH_MAX_PAGE_SIZE', 2000)
+            )
+            cursor = request.args.get('cursor')
+            after_id = int(decode_cursor(cursor)[0]) if cursor else 0
+        except (ValueError, TypeError, IndexError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        query = Ticket.query.join(Order, Order.order_id == Ticket.order_id)
+        if order_id:
+            order = Order.query.get(order_id)
+            if not order:
+                return jsonify({'error': 'Order not found'}), 404
+            if user.user_type != 'admin' and order.user_id != user_id:
+                return jsonify({'error': 'Unauthorized'}), 403
+            event = Event.query.get(order.event_id)
+            query = query.filter(Ticket.order_id == order_id)
+        else:
+            event = Event.query.get(event_id)
+            if not event:
+                return jsonify({'error': 'Event not found'}), 404
+            if user.user_type != 'admin' and event.organizer_id != user_id:
+                return jsonify({'error': 'Unauthorized'}), 403
+            query = query.filter(Order.event_id == event_id)
+        
+        tickets = query.filter(Ticket.ticket_id > after_id).order_by(Ticket.ticket_id).limit(limit + 1).all()
+        has_more = len(tickets) > limit
+        tickets = tickets[:limit]
+        
+        qr_codes = generate_ticket_qr_codes([(ticket, event) for ticket in tickets], fmt)
+        
+        response = jsonify({
+            'format': fmt,
+            'mime_type': QR_FORMATS[fmt],
+            'qr_codes': [
+                {
+                    'ticket_id': ticket.ticket_id,
+                    'ticket_number': ticket.ticket_number,
+                    'qr_code': qr_code
+                }
+                for ticket, qr_code in zip(tickets, qr_codes)
+            ]
+        })
+        if has_more:
+            response.headers['X-Next-Cursor'] = encode_cursor(tickets[-1].ticket_id)
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @tickets_bp.route('/validate/<ticket_number>', methods=['GET'])
 @jwt_required()
 def validate_ticket(ticket_number):
@@ -91,3 +169,50 @@ def validate_ticket(ticket_number):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+@tickets_bp.route('/verify', methods=['POST'])
+@jwt_required()
+def verify_ticket():
+    """Verify a signed QR ticket token (for check-in)"""
+    try:
+        data = request.get_json() or {}
+        
+        if 'token' not in data:
+            return jsonify({'error': 'token is required'}), 400
+        
+        # Signature, event and validity window are checked without the database
+        valid, reason, claims = verify_ticket_token(data['token'], data.get('event_id'))
+        if not valid:
+            return jsonify({'valid': False, 'reason': reason, 'claims': claims}), 200
+        
+        if not data.get('check_status', True):
+            return jsonify({'valid': True, 'reason': reason, 'claims': claims}), 200
+        
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        # Only staff/admin can look up ticket status
+        if user.user_type not in ['admin', 'organizer']:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        ticket = Ticket.query.get(claims['ticket_id'])
+        if not ticket:
+            return jsonify({'valid': False, 'reason': 'not_found', 'claims': claims}), 200
+        
+        if ticket.status != 'valid':
+            return jsonify({
+                'valid': False,
+                'reason': 'already_checked_in' if ticket.status == 'used' else 'revoked',
+                'claims': claims,
+                'ticket': ticket.to_dict()
+            }), 200
+        
+        return jsonify({
+            'valid': True,
+            'reason': reason,
+            'claims': claims,
+            'ticket': ticket.to_dict()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
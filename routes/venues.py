@@ -1,11 +1,15 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Venue, User, VenueBooking
+from utils.cache import response_cache
+from utils.db_routing import db_router
 from datetime import datetime
 
 venues_bp = Blueprint('venues', __name__, url_prefix='/api/venues')
 
 @venues_bp.route('', methods=['GET'])
+@db_router.read_only
+@response_cache.cached(lambda: ['venues'])
 def get_venues():
     """Get all venues with optional filters"""
     try:
@@ -30,6 +34,7 @@ def get_venues():
         return jsonify({'error': str(e)}), 500
 
 @venues_bp.route('/<int:venue_id>', methods=['GET'])
+@db_router.read_only
 def get_venue(venue_id):
     """Get venue by ID"""
     try:
@@ -78,6 +83,7 @@ def create_venue():
         
         db.session.add(venue)
         db.session.commit()
+        response_cache.invalidate('venues')
         
         return jsonify({
             'message': 'Venue created successfully',
@@ -0,0 +1,103 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import User, Event
+from utils.waiting_room import waiting_room, QUEUE_TOKEN_HEADER
+
+waiting_room_bp = Blueprint('waiting_room', __name__, url_prefix='/api/waiting-room')
+
+@waiting_room_bp.route('/events/<int:event_id>', methods=['PUT'])
+@jwt_required()
+def open_waiting_room(event_id):
+    """Open or re-rate the waiting room for an event (organizer/admin only)"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+            
+        if user.user_type != 'admin' and event.organizer_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+            
+        data = request.get_json(silent=True) or {}
+        try:
+            admit_rate = float(data.get('admit_rate', current_app.config.get('WAITING_ROOM_DEFAULT_ADMIT_RATE', 5.0)))
+        except Exception:
+            return jsonify({'error': 'Invalid admit_rate'}), 400
+        if admit_rate <= 0:
+            return jsonify({'error': 'admit_rate must be positive'}), 400
+            
+        room = waiting_room.open_room(event_id, admit_rate)
+        
+        return jsonify({
+            'message': 'Waiting room opened',
+            'waiting_room': room
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@waiting_room_bp.route('/events/<int:event_id>', methods=['DELETE'])
+@jwt_required()
+def close_waiting_room(event_id):
+    """Close the waiting room for an event (organizer/admin only)"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+            
+        if user.user_type != 'admin' and event.organizer_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+            
+        waiting_room.close_room(event_id)
+        
+        return jsonify({'message': 'Waiting room closed'}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@waiting_room_bp.route('/events/<int:event_id>/join', methods=['POST'])
+@jwt_required()
+def join_waiting_room(event_id):
+    """Join the queue for an event and receive a signed queue token"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        token = waiting_room.join(event_id, user_id)
+        if token is None:
+            return jsonify({
+                'event_id': event_id,
+                'active': False,
+                'admitted': True
+            }), 200
+            
+        status, error = waiting_room.status(event_id, user_id, token)
+        if error:
+            return jsonify({'error': error}), 400
+            
+        status['queue_token'] = token
+        return jsonify(status), 201
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@waiting_room_bp.route('/events/<int:event_id>/status', methods=['GET'])
+@jwt_required()
+def get_waiting_room_status(event_id):
+    """Get queue position and estimated wait for a queue token"""
+    try:
+        user_id = int(get_jwt_identity())
+        token = request.headers.get(QUEUE_TOKEN_HEADER) or request.args.get('token')
+        
+        status, error = waiting_room.status(event_id, user_id, token)
+        if error:
+            return jsonify({'error': error}), 400
+            
+        return jsonify(status), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
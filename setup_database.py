@@ -22,78 +22,7 @@ def create_database():
     
     try:
         # Connect to MySQL server (without specifying database)
-        print(f"\nConnecting to MySQL server at {host}:{pCREATE VIEW event_sales_summary AS
-SELECT 
-    e.event_id,
-    e.event_name,
-    e.start_datetime,
-    e.status as event_status,
-    COUNT(DISTINCT o.order_id) as total_orders,
-    COUNT(t.ticket_id) as tickets_sold,
-    SUM(o.total_amount) as total_revenue,
-    COUNT(DISTINCT CASE WHEN t.status = 'used' THEN t.ticket_id END) as attendees_checked_in
-FROM events e
-LEFT JOIN orders o ON e.event_id = o.event_id AND o.status = 'completed'
-LEFT JOIN tickets t ON o.order_id = t.order_id
-GROUP BY e.event_id, e.event_name, e.start_datetime, e.status;
-
--- View: Available Tickets
-CREATE VIEW available_tickets AS
-SELECT 
-    tt.ticket_type_id,
-    tt.event_id,
-    e.event_name,
-    tt.type_name,
-    tt.price,
-    tt.quantity_available,
-    tt.sale_start,
-    tt.sale_end,
-    CASE 
-        WHEN NOW() < tt.sale_start THEN 'not_started'
-        WHEN NOW() > tt.sale_end THEN 'ended'
-        WHEN tt.quantity_available = 0 THEN 'sold_out'
-        ELSE 'available'
-    END as availability_status
-FROM ticket_types tt
-JOIN events e ON tt.event_id = e.event_id
-WHERE e.status = 'published';
-
--- View: User Order History
-CREATE VIEW user_order_history AS
-SELECT 
-    o.order_id,
-    o.user_id,
-    u.email,
-    u.first_name,
-    u.last_name,
-    o.order_number,
-    o.event_id,
-    e.event_name,
-    e.start_datetime,
-    o.total_amount,
-    o.status as order_status,
-    o.created_at as order_date,
-    COUNT(t.ticket_id) as ticket_count
-FROM orders o
-JOIN users u ON o.user_id = u.user_id
-JOIN events e ON o.event_id = e.event_id
-LEFT JOIN tickets t ON o.order_id = t.order_id
-GROUP BY o.order_id, o.user_id, u.email, u.first_name, u.last_name, 
-         o.order_number, o.event_id, e.event_name, e.start_datetime, 
-         o.total_amount, o.status, o.created_at;
-
--- ============================================
--- SAMPLE INDEXES FOR PERFORMANCE
--- ============================================
-
--- Composite indexes for common query patterns
-CREATE INDEX idx_event_date_status ON events(start_datetime, status);
-CREATE INDEX idx_ticket_order_status ON tickets(order_id, status);
-CREATE INDEX idx_order_user_event ON orders(user_id, event_id, created_at);
-
--- Full-text search indexes
-ALTER TABLE events ADD FULLTEXT INDEX ft_event_search (event_name, description);
-ALTER TABLE venues ADD FULLTEXT INDEX ft_venue_search (venue_name, city, description);ort}...")
+        print(f"\nConnecting to MySQL server at {host}:{port}...")
         connection = mysql.connector.connect(
             host=host,
             port=int(port),
@@ -0,0 +1,105 @@
+"""
+Local SMTP Sink
+Accepts mail on localhost and prints (or counts) it instead of delivering it.
+Point the app at it for development and load testing:
+
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=False python app.py
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: enough for smtplib / Flask-Mail to deliver"""
+    
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+    
+    def handle(self):
+        self.reply('220 smtp-sink ready')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            
+            if verb == 'EHLO':
+                self.reply('250-smtp-sink')
+                self.reply('250 8BITMIME')
+            elif verb in ('HELO', 'RSET', 'NOOP'):
+                if verb == 'RSET':
+                    recipients = []
+                self.reply('250 OK')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[-1].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                size = 0
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b'.\r\n', b'.\n'):
+                        break
+                    size += len(data_line)
+                if self.server.delay:
+                    # Stand-in for a remote provider's round-trip per message
+                    time.sleep(self.server.delay)
+                self.server.record(recipients, size)
+                self.reply('250 OK: queued')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Threaded SMTP server that keeps delivery counters"""
+    allow_reuse_address = True
+    daemon_threads = True
+    
+    def __init__(self, address, quiet=False, delay=0.0):
+        super().__init__(address, SMTPSinkHandler)
+        self.quiet = quiet
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.sessions = 0
+    
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.sessions += 1
+        super().process_request(request, client_address)
+    
+    def record(self, recipients, size):
+        with self.lock:
+            self.messages += 1
+            count = self.messages
+        if not self.quiet:
+            print(f"[{count}] {', '.join(recipients)} ({size} bytes)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Local SMTP sink for development')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1025)
+    parser.add_argument('--quiet', action='store_true', help='Only print totals on exit')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before accepting each message')
+    args = parser.parse_args()
+    
+    server = SMTPSink((args.host, args.port), quiet=args.quiet, delay=args.delay)
+    print(f"SMTP sink listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n{server.messages} message(s) received over {server.sessions} SMTP session(s)")
+
+if __name__ == '__main__':
+    main()
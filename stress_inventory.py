@@ -0,0 +1,181 @@
+"""
+Inventory Stress Test
+Fires thousands of concurrent purchases at one hot ticket type through the
+inventory reservation path create_order uses, then checks that stock was
+never oversold: every unit sold is accounted for, quantity_available never
+goes below zero and purchases are only rejected once stock has run out.
+Exits with code 1 when any check fails.
+
+Runs against the configured database (point DATABASE_URI at a development
+MySQL database; fixtures are deleted again at the end) or, with --sqlite,
+against a throwaway SQLite file.
+
+    python stress_inventory.py [purchases] [threads] [--sqlite]
+"""
+import os
+import sys
+import random
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+SQLITE = '--sqlite' in sys.argv
+ARGS = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+if SQLITE:
+    SQLITE_FILE = os.path.join(tempfile.mkdtemp(), 'stress_inventory.db')
+    os.environ['DATABASE_URI'] = f"sqlite:///{SQLITE_FILE}"
+os.environ.setdefault('BACKGROUND_TASKS_ENABLED', 'False')
+os.environ.setdefault('SQLALCHEMY_ECHO', 'False')
+
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+from app import create_app
+from models import db, User, Venue, Event, TicketType
+from utils.inventory import reserve_ticket_items, get_reservation_stats
+
+MAX_QUANTITY = 4
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY columns
+    return 'INTEGER'
+
+def create_fixtures(stock):
+    """Organizer, venue, event and one ticket type with `stock` tickets"""
+    tag = uuid.uuid4().hex[:8]
+    organizer = User(email=f"stress-organizer-{tag}@example.com", first_name='Stress', last_name='Organizer',
+                     user_type='organizer')
+    organizer.set_password(tag)
+    venue = Venue(venue_name=f"Stress Venue {tag}", address='1 Stress Street', city='Stress City',
+                  country='Stressland', capacity=stock)
+    db.session.add_all([organizer, venue])
+    db.session.flush()
+    
+    start = datetime.utcnow() + timedelta(days=30)
+    event = Event(organizer_id=organizer.user_id, venue_id=venue.venue_id, event_name=f"Stress Event {tag}",
+                  start_datetime=start, end_datetime=start + timedelta(hours=3), status='published')
+    db.session.add(event)
+    db.session.flush()
+    
+    ticket_type = TicketType(event_id=event.event_id, type_name='Hot Ticket', price=10.00,
+                             quantity_total=stock, quantity_available=stock,
+                             sale_start=datetime.utcnow() - timedelta(days=1), sale_end=start,
+                             max_purchase=MAX_QUANTITY)
+    db.session.add(ticket_type)
+    db.session.commit()
+    return organizer.user_id, venue.venue_id, event.event_id, ticket_type.ticket_type_id
+
+def delete_fixtures(organizer_id, venue_id, event_id):
+    """Remove everything the stress test created"""
+    db.session.rollback()
+    TicketType.query.filter_by(event_id=event_id).delete(synchronize_session=False)
+    Event.query.filter_by(event_id=event_id).delete(synchronize_session=False)
+    Venue.query.filter_by(venue_id=venue_id).delete(synchronize_session=False)
+    User.query.filter_by(user_id=organizer_id).delete(synchronize_session=False)
+    db.session.commit()
+
+class Tally:
+    """Outcomes across worker threads"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.succeeded = 0
+        self.rejected = 0
+        self.errors = 0
+        self.units_sold = 0
+    
+    def add(self, **deltas):
+        with self.lock:
+            for key, value in deltas.items():
+                setattr(self, key, getattr(self, key) + value)
+
+def worker(app, ticket_type_id, purchases, start_gate, tally):
+    """Buy 1..MAX_QUANTITY tickets `purchases` times, each in its own transaction"""
+    start_gate.wait()
+    for _ in range(purchases):
+        quantity = random.randint(1, MAX_QUANTITY)
+        with app.app_context():
+            try:
+                success, _ = reserve_ticket_items([{'ticket_type_id': ticket_type_id, 'quantity': quantity}])
+                if success:
+                    db.session.commit()
+                    tally.add(succeeded=1, units_sold=quantity)
+                else:
+                    db.session.rollback()
+                    tally.add(rejected=1)
+            except Exception:
+                # Lock wait timeouts and the like: the purchase is rolled back, not oversold
+                db.session.rollback()
+                tally.add(errors=1)
+
+def run_stress_test(app, purchases, threads):
+    """Run the purchases; returns (tally, stock, remaining, seconds)"""
+    # Enough stock for roughly half the expected demand, so the sale sells out
+    stock = max(1, purchases * (MAX_QUANTITY + 1) // 4)
+    if SQLITE:
+        db.create_all()
+    organizer_id, venue_id, event_id, ticket_type_id = create_fixtures(stock)
+    tally = Tally()
+    start_gate = threading.Event()
+    per_thread = [purchases // threads + (1 if i < purchases % threads else 0) for i in range(threads)]
+    workers = [
+        threading.Thread(target=worker, args=(app, ticket_type_id, count, start_gate, tally))
+        for count in per_thread
+    ]
+    try:
+        for thread in workers:
+            thread.start()
+        started = time.perf_counter()
+        start_gate.set()
+        for thread in workers:
+            thread.join()
+        seconds = time.perf_counter() - started
+        db.session.remove()
+        remaining = db.session.query(TicketType.quantity_available).filter_by(
+            ticket_type_id=ticket_type_id
+        ).scalar()
+    finally:
+        delete_fixtures(organizer_id, venue_id, event_id)
+    return tally, stock, remaining, seconds
+
+def check(tally, stock, remaining):
+    """Names of the oversell checks that failed"""
+    failures = []
+    if remaining < 0:
+        failures.append(f"quantity_available went negative ({remaining})")
+    if tally.units_sold > stock:
+        failures.append(f"sold {tally.units_sold} tickets of {stock}")
+    if tally.units_sold != stock - remaining:
+        failures.append(f"{tally.units_sold} tickets sold but stock dropped by {stock - remaining}")
+    if tally.rejected and remaining >= MAX_QUANTITY:
+        failures.append(f"purchases rejected with {remaining} tickets left")
+    return failures
+
+if __name__ == '__main__':
+    purchases = int(ARGS[0]) if len(ARGS) > 0 else 5000
+    threads = int(ARGS[1]) if len(ARGS) > 1 else 32
+    app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+    with app.app_context():
+        print("=" * 60)
+        print(f"Inventory Stress Test ({purchases} purchases, {threads} threads, "
+              f"{'SQLite' if SQLITE else app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]})")
+        print("=" * 60)
+        tally, stock, remaining, seconds = run_stress_test(app, purchases, threads)
+        stats = get_reservation_stats()
+        print(f"Stock:            {stock}")
+        print(f"Sold:             {tally.units_sold} ({tally.succeeded} purchases)")
+        print(f"Remaining:        {remaining}")
+        print(f"Rejected:         {tally.rejected} (sold out)")
+        print(f"Errors:           {tally.errors} (rolled back)")
+        print(f"Counters:         {stats['reservations_succeeded']} succeeded, "
+              f"{stats['reservations_rejected']} rejected")
+        print(f"Throughput:       {purchases / seconds:.0f} purchases/s")
+        failures = check(tally, stock, remaining)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        print("PASS: no oversell" if not failures else f"{len(failures)} check(s) failed")
+    if SQLITE:
+        os.remove(SQLITE_FILE)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,253 @@
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import select, insert, func, literal
+from models import db, EventAnalytics, AnalyticsDelta, Order, Ticket, TicketType
+from utils.timeseries import apply_deltas_to_buckets
+
+ANALYTICS_FIELDS = (
+    'total_tickets_sold',
+    'total_revenue',
+    'total_attendees',
+    'total_checked_in',
+    'tickets_by_type',
+    'revenue_by_type',
+    'promo_codes_used',
+    'attendance_rate'
+)
+
+def record_sale(order, tickets, promo_code=None, ticket_types=None):
+    """Append sale deltas for a new order (caller commits).
+    
+    `tickets` are the order's ticket rows as inserted (dicts) and
+    `ticket_types` maps their ids to the order's prefetched TicketTypes.
+    One row per ticket type; the order total and promo code ride on the
+    first row so revenue includes tax, fees and discounts exactly once.
+    """
+    ticket_types = ticket_types or {}
+    by_type = {}
+    for ticket in tickets:
+        ticket_type = ticket_types.get(ticket['ticket_type_id']) or TicketType.query.get(ticket['ticket_type_id'])
+        name = ticket_type.type_name
+        count, revenue = by_type.get(name, (0, Decimal('0')))
+        by_type[name] = (count + 1, revenue + Decimal(str(ticket['price_paid'] or 0)))
+        
+    rows = [
+        AnalyticsDelta(event_id=order.event_id, kind='sale', type_name=name, tickets_sold=count, type_revenue=revenue)
+        for name, (count, revenue) in by_type.items()
+    ] or [AnalyticsDelta(event_id=order.event_id, kind='sale')]
+    rows[0].revenue = order.total_amount
+    rows[0].orders = 1
+    rows[0].promo_code = promo_code
+    db.session.add_all(rows)
+
+def record_refund(event_id, order_ids, amount=None):
+    """Append refund deltas for fully refunded orders (caller commits).
+    
+    Ticket counts are taken set-based from the orders' tickets; `amount`
+    is the refunded revenue and defaults to the orders' totals.
+    """
+    if not order_ids:
+        return
+    now = datetime.utcnow()
+    db.session.execute(
+        insert(AnalyticsDelta).from_select(
+            ['event_id', 'kind', 'type_name', 'tickets_sold', 'revenue', 'type_revenue', 'checked_in', 'created_at'],
+            select(
+                literal(event_id),
+                literal('refund'),
+                TicketType.type_name,
+                -func.count(Ticket.ticket_id),
+                literal(0),
+                -func.coalesce(func.sum(Ticket.price_paid), 0),
+                literal(0),
+                literal(now)
+            ).join(TicketType, TicketType.ticket_type_id == Ticket.ticket_type_id).where(
+                Ticket.order_id.in_(order_ids)
+            ).group_by(TicketType.type_name)
+        )
+    )
+    if amount is None:
+        amount = db.session.query(func.coalesce(func.sum(Order.total_amount), 0)).filter(
+            Order.order_id.in_(order_ids)
+        ).scalar()
+    db.session.add(AnalyticsDelta(event_id=event_id, kind='refund', revenue=-Decimal(str(amount))))
+
+def record_check_ins(event_id, count=1):
+    """Append a check-in delta (caller commits)"""
+    if count:
+        db.session.add(AnalyticsDelta(event_id=event_id, kind='check_in', checked_in=count))
+
+def _empty_totals():
+    return {
+        'tickets_sold': 0,
+        'revenue': Decimal('0'),
+        'checked_in': 0,
+        'tickets_by_type': {},
+        'revenue_by_type': {},
+        'promo_codes_used': {}
+    }
+
+def _accumulate(totals, type_name, promo_code, tickets_sold, revenue, type_revenue, checked_in, promo_uses):
+    """Add one (possibly pre-aggregated) delta to a totals dict"""
+    totals['tickets_sold'] += int(tickets_sold or 0)
+    totals['revenue'] += Decimal(str(revenue or 0))
+    totals['checked_in'] += int(checked_in or 0)
+    if type_name:
+        by_type = totals['tickets_by_type']
+        by_type[type_name] = by_type.get(type_name, 0) + int(tickets_sold or 0)
+        by_revenue = totals['revenue_by_type']
+        by_revenue[type_name] = by_revenue.get(type_name, Decimal('0')) + Decimal(str(type_revenue or 0))
+    if promo_code and promo_uses:
+        promos = totals['promo_codes_used']
+        promos[promo_code] = promos.get(promo_code, 0) + int(promo_uses)
+
+def _row_state(analytics):
+    """Current compacted values of an analytics row (or zeroes when there is none)"""
+    if analytics is None:
+        return {field: None for field in ANALYTICS_FIELDS}
+    return {field: getattr(analytics, field) for field in ANALYTICS_FIELDS}
+
+def _merge(state, totals):
+    """Fold aggregated deltas into compacted analytics values"""
+    tickets_sold = int(state['total_tickets_sold'] or 0) + totals['tickets_sold']
+    checked_in = int(state['total_checked_in'] or 0) + totals['checked_in']
+    
+    tickets_by_type = dict(state['tickets_by_type'] or {})
+    for name, count in totals['tickets_by_type'].items():
+        tickets_by_type[name] = int(tickets_by_type.get(name, 0)) + count
+    revenue_by_type = dict(state['revenue_by_type'] or {})
+    for name, revenue in totals['revenue_by_type'].items():
+        revenue_by_type[name] = round(float(revenue_by_type.get(name, 0.0)) + float(revenue), 2)
+    promo_codes_used = dict(state['promo_codes_used'] or {})
+    for code, uses in totals['promo_codes_used'].items():
+        promo_codes_used[code] = int(promo_codes_used.get(code, 0)) + uses
+        
+    return {
+        'total_tickets_sold': tickets_sold,
+        'total_revenue': Decimal(str(state['total_revenue'] or 0)) + totals['revenue'],
+        'total_attendees': int(state['total_attendees'] or 0) + totals['tickets_sold'],
+        'total_checked_in': checked_in,
+        'tickets_by_type': tickets_by_type,
+        'revenue_by_type': revenue_by_type,
+        'promo_codes_used': promo_codes_used,
+        'attendance_rate': Decimal(str(round(checked_in * 100.0 / tickets_sold, 2))) if tickets_sold > 0 else Decimal('0')
+    }
+
+def rollup_analytics(batch_size=5000):
+    """Compact one batch of deltas into EventAnalytics; returns the number compacted.
+    
+    Deltas are claimed with SKIP LOCKED and deleted in the transaction that
+    applies them, so concurrent rollups never double count and a reader sees
+    each delta either pending or compacted, never both. Only the rollup
+    writes EventAnalytics rows and time-series buckets, so the order path
+    never waits on them.
+    """
+    deltas = AnalyticsDelta.query.order_by(AnalyticsDelta.delta_id).limit(batch_size).with_for_update(
+        skip_locked=True
+    ).all()
+    if not deltas:
+        return 0
+        
+    totals = {}
+    for delta in deltas:
+        _accumulate(
+            totals.setdefault(delta.event_id, _empty_totals()),
+            delta.type_name,
+            delta.promo_code,
+            delta.tickets_sold,
+            delta.revenue,
+            delta.type_revenue,
+            delta.checked_in,
+            1
+        )
+        
+    rows = {
+        analytics.event_id: analytics
+        for analytics in EventAnalytics.query.filter(
+            EventAnalytics.event_id.in_(list(totals))
+        ).order_by(EventAnalytics.event_id).with_for_update().all()
+    }
+    for event_id, event_totals in totals.items():
+        analytics = rows.get(event_id)
+        if analytics is None:
+            analytics = EventAnalytics(event_id=event_id)
+            db.session.add(analytics)
+        merged = _merge(_row_state(analytics), event_totals)
+        for field in ANALYTICS_FIELDS:
+            setattr(analytics, field, merged[field])
+            
+    apply_deltas_to_buckets(deltas)
+    
+    AnalyticsDelta.query.filter(
+        AnalyticsDelta.delta_id.in_([delta.delta_id for delta in deltas])
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return len(deltas)
+
+def process_analytics_rollup():
+    """Compact deltas batch by batch until the log is drained"""
+    batch_size = current_app.config.get('ANALYTICS_ROLLUP_BATCH_SIZE', 5000)
+    compacted = 0
+    while True:
+        count = rollup_analytics(batch_size)
+        compacted += count
+        if count < batch_size:
+            return compacted
+
+def analytics_state(event_id):
+    """(last_updated, version) of an event's analytics for conditional GETs"""
+    row = db.session.query(
+        EventAnalytics.last_updated,
+        EventAnalytics.total_tickets_sold,
+        EventAnalytics.total_revenue,
+        EventAnalytics.total_checked_in
+    ).filter(EventAnalytics.event_id == event_id).first()
+    pending = db.session.query(
+        func.count(AnalyticsDelta.delta_id),
+        func.max(AnalyticsDelta.delta_id)
+    ).filter(AnalyticsDelta.event_id == event_id).one()
+    if row is None and not pending[0]:
+        return None
+    return (row.last_updated if row else None), (tuple(row[1:]) if row else None, tuple(pending))
+
+def get_analytics_snapshot(event_id):
+    """Exact analytics for an event: the compacted row plus pending deltas.
+    
+    Returns a dict shaped like EventAnalytics.to_dict(), or None when the
+    event has neither a row nor pending deltas.
+    """
+    analytics = EventAnalytics.query.filter_by(event_id=event_id).first()
+    pending = db.session.query(
+        AnalyticsDelta.type_name,
+        AnalyticsDelta.promo_code,
+        func.sum(AnalyticsDelta.tickets_sold),
+        func.sum(AnalyticsDelta.revenue),
+        func.sum(AnalyticsDelta.type_revenue),
+        func.sum(AnalyticsDelta.checked_in),
+        func.count(AnalyticsDelta.promo_code)
+    ).filter(AnalyticsDelta.event_id == event_id).group_by(
+        AnalyticsDelta.type_name,
+        AnalyticsDelta.promo_code
+    ).all()
+    if analytics is None and not pending:
+        return None
+        
+    totals = _empty_totals()
+    for row in pending:
+        _accumulate(totals, *row)
+    merged = _merge(_row_state(analytics), totals)
+    
+    return {
+        'analytics_id': analytics.analytics_id if analytics else None,
+        'event_id': event_id,
+        'total_tickets_sold': merged['total_tickets_sold'],
+        'total_revenue': float(merged['total_revenue']),
+        'total_attendees': merged['total_attendees'],
+        'tickets_by_type': merged['tickets_by_type'],
+        'revenue_by_type': merged['revenue_by_type'],
+        'promo_codes_used': merged['promo_codes_used'],
+        'attendance_rate': float(merged['attendance_rate']),
+        'total_checked_in': merged['total_checked_in'],
+        'last_updated': analytics.last_updated.isoformat() if analytics and analytics.last_updated else None
+    }
@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from models import db
+
+def start_periodic_task(app, name, interval, func):
+    """Run func every `interval` seconds in a daemon thread with an app context"""
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    func()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f"Background task {name} failed: {str(e)}")
+                finally:
+                    db.session.remove()
+    
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+def start_background_tasks(app):
+    """Start all periodic maintenance tasks for this process"""
+    from utils.holds import release_expired_holds
+    from utils.email_service import process_email_outbox
+    from utils.cancellation import process_cancellation_jobs
+    from utils.analytics import process_analytics_rollup
+    from utils.timeseries import prune_metric_buckets
+    from utils.credits import process_credit_snapshots, process_credit_reconciliation
+    from utils.bulk_orders import process_bulk_order_jobs
+    from utils.qr_generator import prune_qr_disk_cache
+    
+    start_periodic_task(
+        app,
+        'hold-sweeper',
+        app.config.get('HOLD_SWEEP_INTERVAL', 30),
+        lambda: release_expired_holds(app.config.get('HOLD_SWEEP_BATCH_SIZE', 500))
+    )
+    
+    email_pool = ThreadPoolExecutor(
+        max_workers=app.config.get('EMAIL_WORKERS', 4),
+        thread_name_prefix='email-worker'
+    )
+    start_periodic_task(
+        app,
+        'email-outbox',
+        app.config.get('EMAIL_POLL_INTERVAL', 2),
+        lambda: process_email_outbox(app, email_pool)
+    )
+    
+    start_periodic_task(
+        app,
+        'cancellation-jobs',
+        app.config.get('CANCELLATION_POLL_INTERVAL', 5),
+        process_cancellation_jobs
+    )
+    
+    start_periodic_task(
+        app,
+        'bulk-orders',
+        app.config.get('BULK_ORDER_POLL_INTERVAL', 5),
+        process_bulk_order_jobs
+    )
+    
+    start_periodic_task(
+        app,
+        'analytics-rollup',
+        app.config.get('ANALYTICS_ROLLUP_INTERVAL', 10),
+        process_analytics_rollup
+    )
+    
+    start_periodic_task(
+        app,
+        'metrics-retention',
+        app.config.get('TIMESERIES_PRUNE_INTERVAL', 3600),
+        prune_metric_buckets
+    )
+    
+    start_periodic_task(
+        app,
+        'credit-snapshots',
+        app.config.get('CREDIT_SNAPSHOT_INTERVAL', 300),
+        process_credit_snapshots
+    )
+    
+    start_periodic_task(
+        app,
+        'credit-reconciliation',
+        app.config.get('CREDIT_RECONCILE_INTERVAL', 3600),
+        process_credit_reconciliation
+    )
+    
+    start_periodic_task(
+        app,
+        'qr-cache-prune',
+        app.config.get('QR_DISK_CACHE_PRUNE_INTERVAL', 600),
+        prune_qr_disk_cache
+    )
+
+def start_background_tasks_lazily(app):
+    """Start the periodic tasks on the first request this process serves.
+    
+    Keeps create_app free of side effects: importing the app (CLI commands,
+    migrations, a preloading gunicorn master) starts no threads, and each
+    worker starts its own after forking.
+    """
+    lock = threading.Lock()
+    started = []
+    
+    @app.before_request
+    def start_tasks_once():
+        if started:
+            return
+        with lock:
+            if not started:
+                start_background_tasks(app)
+                started.append(True)
@@ -0,0 +1,190 @@
+import csv
+import json
+import re
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, or_, and_
+from models import db, BulkOrderJob, BulkOrderRow, Ticket, TicketType
+from utils.order_generator import generate_ticket_numbers, ticket_row
+from utils.email_service import send_order_confirmation, send_tickets_issued
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+NAME_FIELDS = ('name', 'attendee_name')
+EMAIL_FIELDS = ('email', 'attendee_email')
+MAX_LINE_BYTES = 64 * 1024
+
+class AttendeeListError(ValueError):
+    """The attendee list cannot be parsed any further"""
+
+def iter_text_lines(stream):
+    """Decode a request body line by line without holding more than one line in memory"""
+    line_number = 0
+    while True:
+        line = stream.readline(MAX_LINE_BYTES)
+        if not line:
+            return
+        line_number += 1
+        if len(line) >= MAX_LINE_BYTES and not line.endswith(b'\n'):
+            raise AttendeeListError(f"Line {line_number} is longer than {MAX_LINE_BYTES} bytes")
+        try:
+            text = line.decode('utf-8')
+        except UnicodeDecodeError:
+            raise AttendeeListError(f"Line {line_number} is not valid UTF-8")
+        yield text.lstrip('\ufeff') if line_number == 1 else text
+
+def _pick(record, fields):
+    for field in fields:
+        value = record.get(field)
+        if value is not None:
+            return str(value).strip()
+    return ''
+
+def iter_attendee_records(lines, source_format):
+    """Yield (row_number, record) for each attendee in a CSV or NDJSON list"""
+    if source_format == 'csv':
+        reader = csv.DictReader(lines)
+        try:
+            fieldnames = [name.strip().lower() for name in (reader.fieldnames or [])]
+            reader.fieldnames = fieldnames
+            if not any(f in fieldnames for f in NAME_FIELDS) or not any(f in fieldnames for f in EMAIL_FIELDS):
+                raise AttendeeListError("CSV header must include 'name' and 'email' columns")
+            for row_number, record in enumerate(reader, start=1):
+                yield row_number, record
+        except csv.Error as e:
+            raise AttendeeListError(f"Malformed CSV near line {reader.line_num}: {str(e)}")
+        return
+        
+    row_number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield row_number, None
+            continue
+        yield row_number, record if isinstance(record, dict) else None
+
+def validate_attendee(record):
+    """(name, email, error) for one parsed record"""
+    if record is None:
+        return None, None, 'Row is not a JSON object'
+    name = _pick(record, NAME_FIELDS)
+    email = _pick(record, EMAIL_FIELDS)
+    if not name:
+        return None, None, 'name is required'
+    if len(name) > 200:
+        return None, None, 'name is longer than 200 characters'
+    if not email or len(email) > 255 or not EMAIL_PATTERN.match(email):
+        return None, None, 'email is missing or invalid'
+    return name, email, None
+
+def stage_attendees(job, stream, source_format, max_rows, max_errors, batch_size):
+    """Parse, validate and stage a streamed attendee list for a job (caller commits).
+    
+    Rows are validated as they arrive and written in batches, so memory
+    stays flat however long the list is. Nothing is kept once a row fails:
+    parsing continues only to report up to `max_errors` problems at once.
+    Returns (rows staged, errors).
+    """
+    batch = []
+    errors = []
+    count = 0
+    for row_number, record in iter_attendee_records(iter_text_lines(stream), source_format):
+        name, email, error = validate_attendee(record)
+        if error:
+            errors.append({'row': row_number, 'error': error})
+            if len(errors) >= max_errors:
+                break
+            continue
+        count += 1
+        if count > max_rows:
+            errors.append({'row': row_number, 'error': f'A bulk order is limited to {max_rows} attendees'})
+            break
+        if errors:
+            continue
+        batch.append({'job_id': job.job_id, 'row_number': count, 'attendee_name': name, 'attendee_email': email})
+        if len(batch) >= batch_size:
+            db.session.execute(insert(BulkOrderRow), batch)
+            batch = []
+            
+    if batch and not errors:
+        db.session.execute(insert(BulkOrderRow), batch)
+    return count, errors
+
+def issue_ticket_chunk(job, ticket_type, chunk_size):
+    """Issue tickets for the next chunk of staged rows in one transaction.
+    
+    The tickets, their emails, the removal of the staged rows and the job
+    cursor commit together, so a crashed job resumes exactly where it
+    stopped without issuing anyone twice. Returns the number of tickets.
+    """
+    rows = db.session.query(
+        BulkOrderRow.row_number, BulkOrderRow.attendee_name, BulkOrderRow.attendee_email
+    ).filter(
+        BulkOrderRow.job_id == job.job_id,
+        BulkOrderRow.row_number > job.last_row
+    ).order_by(BulkOrderRow.row_number).limit(chunk_size).all()
+    if not rows:
+        return 0
+        
+    numbers = generate_ticket_numbers(len(rows))
+    now = datetime.utcnow()
+    db.session.execute(insert(Ticket), [
+        ticket_row(job.order_id, ticket_type, number, {'name': row.attendee_name, 'email': row.attendee_email},
+                   issued_at=now, price_paid=job.unit_price)
+        for number, row in zip(numbers, rows)
+    ])
+    send_tickets_issued(job.order_id, commit=False, ticket_numbers=numbers)
+    
+    BulkOrderRow.query.filter(
+        BulkOrderRow.job_id == job.job_id,
+        BulkOrderRow.row_number <= rows[-1].row_number
+    ).delete(synchronize_session=False)
+    job.tickets_issued = (job.tickets_issued or 0) + len(rows)
+    job.last_row = rows[-1].row_number
+    db.session.commit()
+    return len(rows)
+
+def run_bulk_order_job(job):
+    """Issue a claimed job's tickets chunk by chunk, then confirm the order"""
+    chunk_size = current_app.config.get('BULK_ORDER_CHUNK_SIZE', 500)
+    ticket_type = TicketType.query.get(job.ticket_type_id)
+    try:
+        while issue_ticket_chunk(job, ticket_type, chunk_size):
+            pass
+        send_order_confirmation(job.order_id, commit=False)
+        job.status = 'completed'
+        job.completed_at = datetime.utcnow()
+        job.error = None
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Bulk order job {job.job_id} failed: {str(e)}")
+        job = BulkOrderJob.query.get(job.job_id)
+        job.status = 'failed'
+        job.error = str(e)
+        db.session.commit()
+
+def process_bulk_order_jobs():
+    """Claim and run pending jobs, including running ones whose worker died"""
+    stale_before = datetime.utcnow() - timedelta(
+        seconds=current_app.config.get('BULK_ORDER_STALE_SECONDS', 300)
+    )
+    processed = 0
+    while True:
+        job = BulkOrderJob.query.filter(
+            BulkOrderJob.order_id.isnot(None),
+            or_(
+                BulkOrderJob.status == 'pending',
+                and_(BulkOrderJob.status == 'running', BulkOrderJob.updated_at < stale_before)
+            )
+        ).order_by(BulkOrderJob.job_id).with_for_update(skip_locked=True).first()
+        if not job:
+            return processed
+        job.status = 'running'
+        job.started_at = job.started_at or datetime.utcnow()
+        db.session.commit()
+        run_bulk_order_job(job)
+        processed += 1
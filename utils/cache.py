@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, current_app, make_response, g
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL"""
+    
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Tag versions live outside the LRU so eviction never resets them
+        self._tags = {}
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def get_tag_versions(self, tags):
+        with self._lock:
+            return [self._tags.get(tag, 0) for tag in tags]
+    
+    def bump_tag(self, tag):
+        with self._lock:
+            self._tags[tag] = self._tags.get(tag, 0) + 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+class RedisCacheBackend:
+    """Cache shared between workers through Redis (or a compatible stand-in)"""
+    
+    def __init__(self, client, prefix='response_cache'):
+        self.client = client
+        self.prefix = prefix
+    
+    def get(self, key):
+        raw = self.client.get(f"{self.prefix}:entry:{key}")
+        return json.loads(raw) if raw else None
+    
+    def set(self, key, value, ttl):
+        self.client.set(f"{self.prefix}:entry:{key}", json.dumps(value), ex=int(ttl))
+    
+    def delete(self, key):
+        self.client.delete(f"{self.prefix}:entry:{key}")
+    
+    def get_tag_versions(self, tags):
+        if not tags:
+            return []
+        values = self.client.mget([f"{self.prefix}:tag:{tag}" for tag in tags])
+        return [int(value) if value else 0 for value in values]
+    
+    def bump_tag(self, tag):
+        self.client.incr(f"{self.prefix}:tag:{tag}")
+    
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+class ResponseCache:
+    """Read-through cache for public JSON endpoints.
+    
+    Entries are keyed by route and query string and remember the version
+    of every tag (e.g. ``event:42``) they were built from. Writers call
+    `invalidate` after committing, which bumps those tag versions, so
+    stale entries are skipped on the next read without having to find
+    and delete every affected key.
+    """
+    
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0}
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        if self.backend is None:
+            if app.config.get('CACHE_BACKEND') == 'redis':
+                import redis
+                self.backend = RedisCacheBackend(redis.Redis.from_url(app.config['CACHE_REDIS_URL']))
+            else:
+                self.backend = MemoryCacheBackend(app.config.get('CACHE_MAX_ENTRIES', 1000))
+        app.extensions['response_cache'] = self
+    
+    def _record(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+    
+    def get_stats(self):
+        """Return hit/miss counters for this process"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+    
+    def invalidate(self, *tags):
+        """Drop every cached response built from any of the given tags"""
+        for tag in tags:
+            self.backend.bump_tag(tag)
+            self._record('invalidations')
+    
+    def make_key(self, namespace):
+        args = '&'.join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+        key = f"{namespace}:{request.path}?{args}"
+        # Under @conditional, entries built from older row state are never
+        # served for a newer ETag, whichever writer forgot to invalidate
+        state = g.get('conditional_state')
+        return f"{key}#{state}" if state else key
+    
+    def lookup(self, key):
+        """Return a cached entry if present and none of its tags changed"""
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        tags = list(entry['tags'].keys())
+        if self.backend.get_tag_versions(tags) != [entry['tags'][tag] for tag in tags]:
+            self.backend.delete(key)
+            return None
+        return entry
+    
+    def cached(self, tags, ttl=None):
+        """Decorator caching 200 responses of a view; `tags` maps view kwargs to tag names"""
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if not current_app.config.get('CACHE_ENABLED', True):
+                    return f(*args, **kwargs)
+                    
+                key = self.make_key(f.__name__)
+                entry = self.lookup(key)
+                if entry is not None:
+                    self._record('hits')
+                    response = current_app.response_class(entry['body'], status=200, mimetype=entry['mimetype'])
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+                self._record('misses')
+                
+                # Read tag versions before building so a concurrent write wins
+                entry_tags = tags(**kwargs)
+                versions = self.backend.get_tag_versions(entry_tags)
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 200:
+                    self.backend.set(key, {
+                        'tags': dict(zip(entry_tags, versions)),
+                        'body': response.get_data(as_text=True),
+                        'mimetype': response.mimetype
+                    }, ttl or current_app.config.get('CACHE_DEFAULT_TTL', 30))
+                    self._record('stores')
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return decorated
+        return decorator
+
+response_cache = ResponseCache()
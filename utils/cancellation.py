@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, insert, update, func, literal, and_, or_
+from models import db, Event, Order, Payment, Ticket, Refund, CancellationJob
+from utils.search import index_event
+from utils.analytics import record_refund
+from utils.credits import refund_orders_to_credits
+from utils.seat_maps import release_order_seats
+from utils.holds import release_event_holds
+
+def get_active_job(event_id):
+    """Latest cancellation job for an event"""
+    return CancellationJob.query.filter_by(event_id=event_id).order_by(CancellationJob.job_id.desc()).first()
+
+def start_event_cancellation(event, user_id):
+    """Mark an event cancelled and queue the refund job (caller commits).
+    
+    The status flips immediately so no further tickets can be sold, and
+    active holds are expired so their stock is not left reserved;
+    refunds are then worked through in chunks by the background worker.
+    """
+    event.status = 'cancelled'
+    index_event(event)
+    release_event_holds(event.event_id)
+    orders_total = db.session.query(func.count(Order.order_id)).filter(
+        Order.event_id == event.event_id,
+        Order.status == 'completed'
+    ).scalar()
+    job = CancellationJob(
+        event_id=event.event_id,
+        requested_by=user_id,
+        status='pending',
+        last_order_id=0,
+        orders_total=orders_total or 0
+    )
+    db.session.add(job)
+    return job
+
+def refund_order_chunk(job, event, chunk_size):
+    """Refund the next chunk of orders after the job cursor in one transaction.
+    
+    Every statement is set-based over the chunk, and the cursor moves in the
+    same commit, so each order ends up either fully refunded or untouched and
+    a crashed job resumes exactly where it stopped. Returns the number of
+    orders examined (0 when the event is done).
+    """
+    now = datetime.utcnow()
+    
+    order_rows = db.session.query(Order.order_id, Order.total_amount).filter(
+        Order.event_id == event.event_id,
+        Order.status == 'completed',
+        Order.order_id > job.last_order_id
+    ).order_by(Order.order_id).limit(chunk_size).with_for_update().all()
+    if not order_rows:
+        return 0
+    chunk_ids = [row.order_id for row in order_rows]
+    
+    # One completed payment per order is refunded; orders without one are left alone
+    payment_rows = db.session.query(
+        Payment.order_id, func.min(Payment.payment_id)
+    ).filter(
+        Payment.order_id.in_(chunk_ids),
+        Payment.status == 'completed'
+    ).group_by(Payment.order_id).all()
+    payment_by_order = dict(payment_rows)
+    refund_ids = [order_id for order_id in chunk_ids if order_id in payment_by_order]
+    
+    if refund_ids:
+        first_ticket = select(func.min(Ticket.ticket_id)).where(
+            Ticket.order_id == Order.order_id
+        ).correlate(Order).scalar_subquery()
+        db.session.execute(
+            insert(Refund).from_select(
+                ['payment_id', 'ticket_id', 'amount', 'reason', 'status', 'processed_at', 'created_at'],
+                select(
+                    Payment.payment_id,
+                    first_ticket,
+                    Order.total_amount,
+                    literal(f"Event cancelled: {event.event_name}"),
+                    literal('completed'),
+                    literal(now),
+                    literal(now)
+                ).join(Order, Order.order_id == Payment.order_id).where(
+                    Payment.payment_id.in_(list(payment_by_order.values()))
+                )
+            )
+        )
+        
+        # Credit each buyer once with the sum of their refunded orders
+        refund_orders_to_credits(refund_ids)
+        
+        db.session.execute(
+            update(Payment).where(
+                Payment.payment_id.in_(list(payment_by_order.values()))
+            ).values(status='refunded').execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(Ticket).where(
+                Ticket.order_id.in_(refund_ids),
+                Ticket.status != 'refunded'
+            ).values(status='refunded').execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            update(Order).where(
+                Order.order_id.in_(refund_ids)
+            ).values(status='refunded', updated_at=now).execution_options(synchronize_session=False)
+        )
+        release_order_seats(event.event_id, refund_ids)
+        record_refund(event.event_id, refund_ids)
+        
+        # Notify the refunded buyers through the email outbox
+        from utils.email_service import send_event_cancelled
+        send_event_cancelled(event.event_id, order_ids=refund_ids, commit=False)
+        
+    amounts = {row.order_id: row.total_amount or 0 for row in order_rows}
+    job.orders_refunded = (job.orders_refunded or 0) + len(refund_ids)
+    job.orders_skipped = (job.orders_skipped or 0) + len(chunk_ids) - len(refund_ids)
+    job.amount_refunded = (job.amount_refunded or 0) + sum(amounts[order_id] for order_id in refund_ids)
+    job.last_order_id = chunk_ids[-1]
+    db.session.commit()
+    return len(chunk_ids)
+
+def run_cancellation_job(job):
+    """Process a claimed job chunk by chunk until every order is handled"""
+    chunk_size = current_app.config.get('CANCELLATION_CHUNK_SIZE', 500)
+    event = Event.query.get(job.event_id)
+    try:
+        while refund_order_chunk(job, event, chunk_size):
+            pass
+        job.status = 'completed'
+        job.completed_at = datetime.utcnow()
+        job.error = None
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Cancellation job {job.job_id} failed: {str(e)}")
+        job = CancellationJob.query.get(job.job_id)
+        job.status = 'failed'
+        job.error = str(e)[:1000]
+        db.session.commit()
+        
+    from utils.cache import response_cache
+    response_cache.invalidate(f'event:{job.event_id}')
+    return job
+
+def process_cancellation_jobs():
+    """Claim and run pending jobs, including running ones whose worker died"""
+    stale_before = datetime.utcnow() - timedelta(
+        seconds=current_app.config.get('CANCELLATION_STALE_SECONDS', 300)
+    )
+    processed = 0
+    while True:
+        job = CancellationJob.query.filter(
+            or_(
+                CancellationJob.status == 'pending',
+                and_(CancellationJob.status == 'running', CancellationJob.updated_at < stale_before)
+            )
+        ).order_by(CancellationJob.job_id).with_for_update(skip_locked=True).first()
+        if not job:
+            return processed
+        job.status = 'running'
+        job.started_at = job.started_at or datetime.utcnow()
+        db.session.commit()
+        run_cancellation_job(job)
+        processed += 1
@@ -0,0 +1,157 @@
+from datetime import datetime, timezone
+from sqlalchemy import func, update, case
+from models import db, CheckIn, Ticket, TicketType, Order, Seat, SeatingSection
+from utils.ticket_tokens import event_verification_keys, build_revocation_filter
+from utils.analytics import record_check_ins
+
+# Manifest rows are positional to keep the payload small on gate devices
+MANIFEST_COLUMNS = ['ticket_number', 'status', 'ticket_type_id', 'seat', 'ticket_id']
+
+def parse_scan_time(value):
+    """ISO-8601 scan time from a gate device -> naive UTC"""
+    scanned_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if scanned_at.tzinfo:
+        scanned_at = scanned_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return scanned_at
+
+def manifest_version(event_id):
+    """Cheap summary of an event's ticket state, used to validate manifests"""
+    state = db.session.query(
+        func.count(Ticket.ticket_id),
+        func.max(Ticket.created_at),
+        func.max(Ticket.checked_in_at),
+        func.sum(case((Ticket.status == 'valid', 1), else_=0))
+    ).join(Order, Order.order_id == Ticket.order_id).filter(Order.event_id == event_id).one()
+    # Rotating signing keys must also invalidate downloaded manifests
+    active_kid, keys = event_verification_keys(event_id)
+    return max(filter(None, [state[1], state[2]]), default=None), (tuple(state), active_kid, sorted(keys))
+
+def build_event_manifest(event_id):
+    """Compact ticket_number -> status/type/seat manifest for offline scanning"""
+    rows = db.session.query(
+        Ticket.ticket_number,
+        Ticket.status,
+        Ticket.ticket_type_id,
+        SeatingSection.section_name,
+        Seat.row_number,
+        Seat.seat_number,
+        Ticket.ticket_id
+    ).join(Order, Order.order_id == Ticket.order_id).outerjoin(
+        Seat, Seat.seat_id == Ticket.seat_id
+    ).outerjoin(
+        SeatingSection, SeatingSection.section_id == Seat.section_id
+    ).filter(Order.event_id == event_id).order_by(Ticket.ticket_id).all()
+    
+    ticket_types = db.session.query(TicketType.ticket_type_id, TicketType.type_name).filter(
+        TicketType.event_id == event_id
+    ).all()
+    
+    tickets = []
+    revoked = []
+    for ticket_number, status, ticket_type_id, section_name, row_number, seat_number, ticket_id in rows:
+        seat = f"{section_name}/{row_number}/{seat_number}" if seat_number else None
+        tickets.append([ticket_number, status, ticket_type_id, seat, ticket_id])
+        if status in ('cancelled', 'refunded'):
+            revoked.append(ticket_id)
+    
+    # Everything a gate needs to verify signed QR tokens offline
+    active_kid, keys = event_verification_keys(event_id)
+    verification = {
+        'algorithm': 'HMAC-SHA256/128',
+        'active_key_id': active_kid,
+        'keys': keys,
+        'revoked': build_revocation_filter(revoked).to_dict()
+    }
+        
+    return {
+        'event_id': event_id,
+        'generated_at': datetime.utcnow().isoformat(),
+        'columns': MANIFEST_COLUMNS,
+        'ticket_types': {str(ticket_type_id): type_name for ticket_type_id, type_name in ticket_types},
+        'ticket_count': len(tickets),
+        'tickets': tickets,
+        'verification': verification
+    }
+
+def record_check_in_batch(event_id, scans, checked_in_by):
+    """Record many scans in one transaction and return a result per scan.
+    
+    Tickets are looked up and locked in a single query, so concurrent
+    batches from other gates serialize on the rows they share. Each scan
+    gets a status: checked_in, already_checked_in, duplicate_in_batch,
+    not_found, wrong_event or invalid_status. The caller commits.
+    """
+    now = datetime.utcnow()
+    numbers = {scan.get('ticket_number') for scan in scans if scan.get('ticket_number')}
+    tickets = {}
+    if numbers:
+        for ticket, order_event_id in db.session.query(Ticket, Order.event_id).join(
+            Order, Order.order_id == Ticket.order_id
+        ).filter(Ticket.ticket_number.in_(numbers)).with_for_update(of=Ticket).all():
+            tickets[ticket.ticket_number] = (ticket, order_event_id)
+            
+    existing = {}
+    ticket_ids = [ticket.ticket_id for ticket, _ in tickets.values()]
+    if ticket_ids:
+        for check_in in CheckIn.query.filter(CheckIn.ticket_id.in_(ticket_ids)).all():
+            existing[check_in.ticket_id] = check_in
+            
+    results = []
+    new_check_ins = []
+    seen = set()
+    for scan in scans:
+        number = scan.get('ticket_number')
+        result = {'ticket_number': number, 'scan_id': scan.get('scan_id')}
+        results.append(result)
+        
+        if number not in tickets:
+            result['status'] = 'not_found'
+            continue
+        ticket, order_event_id = tickets[number]
+        result['ticket_id'] = ticket.ticket_id
+        if order_event_id != event_id:
+            result['status'] = 'wrong_event'
+        elif number in seen:
+            result['status'] = 'duplicate_in_batch'
+        elif ticket.ticket_id in existing or ticket.status == 'used':
+            check_in = existing.get(ticket.ticket_id)
+            checked_in_at = check_in.check_in_time if check_in else ticket.checked_in_at
+            result['status'] = 'already_checked_in'
+            result['checked_in_at'] = checked_in_at.isoformat() if checked_in_at else None
+            result['location'] = check_in.location if check_in else None
+        elif ticket.status != 'valid':
+            result['status'] = 'invalid_status'
+            result['ticket_status'] = ticket.status
+        else:
+            check_in_time = parse_scan_time(scan['scanned_at']) if scan.get('scanned_at') else now
+            new_check_ins.append({
+                'ticket_id': ticket.ticket_id,
+                'event_id': event_id,
+                'check_in_time': check_in_time,
+                'check_in_method': scan.get('check_in_method', 'qr_scan'),
+                'checked_in_by': checked_in_by,
+                'location': scan.get('location')
+            })
+            seen.add(number)
+            result['status'] = 'checked_in'
+            result['checked_in_at'] = check_in_time.isoformat()
+            
+    if new_check_ins:
+        db.session.bulk_insert_mappings(CheckIn, new_check_ins)
+        db.session.execute(
+            update(Ticket).where(
+                Ticket.ticket_id.in_([row['ticket_id'] for row in new_check_ins])
+            ).values(
+                status='used',
+                checked_in_at=case(
+                    {row['ticket_id']: row['check_in_time'] for row in new_check_ins},
+                    value=Ticket.ticket_id
+                )
+            ).execution_options(synchronize_session=False)
+        )
+        record_check_ins(event_id, len(new_check_ins))
+        
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return results, summary
@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, current_app, make_response, g
+from flask_jwt_extended import get_jwt_identity
+
+def _identity():
+    """Current JWT identity, or None on public views"""
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+def to_http_date(value):
+    """Naive UTC datetime -> aware datetime truncated to HTTP date precision"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+def make_etag(last_modified, version, identity=None):
+    """Weak ETag value for a request built from the given row state"""
+    parts = [
+        request.path,
+        request.query_string.decode(),
+        str(identity),
+        last_modified.isoformat() if isinstance(last_modified, datetime) else str(last_modified),
+        repr(version)
+    ]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:32]
+
+def conditional(validator):
+    """Decorator adding weak ETag / Last-Modified validators to a JSON GET view.
+    
+    `validator(**view_kwargs)` returns `(last_modified, version)`: the max
+    `updated_at` of the rows the response is built from, plus any state that
+    can change without touching `updated_at` (stock counters, row counts).
+    Returning None skips validation, e.g. when the row does not exist.
+    Matching requests get a 304 before the view (or the response cache) runs.
+    The row state is also left on `g.conditional_state`, which the response
+    cache adds to its key so a body is only ever served under its own ETag.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            # Validators are read before the body, so a concurrent write
+            # can only make the ETag older than the payload, never newer
+            state = validator(**kwargs)
+            if state is None:
+                return f(*args, **kwargs)
+                
+            last_modified, version = state
+            last_modified = to_http_date(last_modified)
+            identity = _identity()
+            etag = make_etag(last_modified, version, identity)
+            g.conditional_state = make_etag(last_modified, version)
+            
+            not_modified = False
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since and last_modified and version is None:
+                # Only trust the timestamp when nothing else feeds the response
+                not_modified = last_modified <= request.if_modified_since
+                
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                    
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # Browsers revalidate on every load instead of refetching the body
+            response.headers['Cache-Control'] = 'private, no-cache' if identity else 'no-cache'
+            return response
+        return decorated
+    return decorator
@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import select, insert, update, func, literal
+from models import db, User, Order, CreditLedgerEntry, CreditBalanceSnapshot
+
+def _amount(value):
+    return Decimal(str(value or 0)).quantize(Decimal('0.01'))
+
+def open_account(user):
+    """Ledger entry for a new user's starting balance (user flushed, caller commits)"""
+    db.session.add(CreditLedgerEntry(user_id=user.user_id, amount=_amount(user.credits), kind='opening'))
+
+def debit_credits(user_id, amount, kind='purchase', order_id=None, payment_id=None):
+    """Take `amount` from a user's balance if they have it (caller commits).
+    
+    The balance check and the write are one conditional UPDATE, so two
+    concurrent purchases can never both spend the same credits. Returns
+    False, changing nothing, when the balance is too low.
+    """
+    amount = _amount(amount)
+    if amount > 0:
+        result = db.session.execute(
+            update(User).where(
+                User.user_id == user_id,
+                User.credits >= amount
+            ).values(credits=User.credits - amount).execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return False
+        db.session.add(CreditLedgerEntry(
+            user_id=user_id, amount=-amount, kind=kind, order_id=order_id, payment_id=payment_id
+        ))
+    return True
+
+def add_credits(user_id, amount, kind='refund', order_id=None, payment_id=None):
+    """Give `amount` back to a user (caller commits)"""
+    amount = _amount(amount)
+    if amount > 0:
+        db.session.execute(
+            update(User).where(User.user_id == user_id).values(
+                credits=User.credits + amount
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.add(CreditLedgerEntry(
+            user_id=user_id, amount=amount, kind=kind, order_id=order_id, payment_id=payment_id
+        ))
+
+def refund_orders_to_credits(order_ids, kind='event_refund'):
+    """Credit each order's buyer with the order total, set-based (caller commits).
+    
+    One ledger entry per order; each buyer's balance moves once by the sum
+    of their orders.
+    """
+    if not order_ids:
+        return
+    db.session.execute(
+        insert(CreditLedgerEntry).from_select(
+            ['user_id', 'amount', 'kind', 'order_id', 'created_at'],
+            select(
+                Order.user_id,
+                Order.total_amount,
+                literal(kind),
+                Order.order_id,
+                literal(datetime.utcnow())
+            ).where(Order.order_id.in_(order_ids), Order.total_amount > 0)
+        )
+    )
+    refund_total = select(func.sum(Order.total_amount)).where(
+        Order.user_id == User.user_id,
+        Order.order_id.in_(order_ids)
+    ).scalar_subquery()
+    db.session.execute(
+        update(User).where(
+            User.user_id.in_(select(Order.user_id).where(Order.order_id.in_(order_ids)))
+        ).values(credits=User.credits + refund_total).execution_options(synchronize_session=False)
+    )
+
+def take_balance_snapshots(batch_size=5000, lag_seconds=60):
+    """Fold settled ledger entries into balance snapshots; returns users updated.
+    
+    Only entries older than `lag_seconds` are folded, so an entry whose
+    transaction is still in flight is never skipped over. Snapshot rows
+    are locked before they are advanced, so workers running this
+    concurrently cannot apply the same entries twice.
+    """
+    upto = db.session.query(func.max(CreditLedgerEntry.entry_id)).filter(
+        CreditLedgerEntry.created_at < datetime.utcnow() - timedelta(seconds=lag_seconds)
+    ).scalar()
+    if not upto:
+        return 0
+        
+    updated = 0
+    after = 0
+    while True:
+        user_ids = [row[0] for row in db.session.query(CreditLedgerEntry.user_id).outerjoin(
+            CreditBalanceSnapshot, CreditBalanceSnapshot.user_id == CreditLedgerEntry.user_id
+        ).filter(
+            CreditLedgerEntry.user_id > after,
+            CreditLedgerEntry.entry_id <= upto,
+            CreditLedgerEntry.entry_id > func.coalesce(CreditBalanceSnapshot.last_entry_id, 0)
+        ).group_by(CreditLedgerEntry.user_id).order_by(CreditLedgerEntry.user_id).limit(batch_size).all()]
+        if not user_ids:
+            return updated
+            
+        snapshots = {
+            snapshot.user_id: snapshot
+            for snapshot in CreditBalanceSnapshot.query.filter(
+                CreditBalanceSnapshot.user_id.in_(user_ids)
+            ).order_by(CreditBalanceSnapshot.user_id).with_for_update().all()
+        }
+        last_ids = [snapshot.last_entry_id for snapshot in snapshots.values()]
+        if len(snapshots) < len(user_ids):
+            last_ids.append(0)
+        since = min(last_ids)
+        totals = {}
+        for user_id, entry_id, amount in db.session.query(
+            CreditLedgerEntry.user_id, CreditLedgerEntry.entry_id, CreditLedgerEntry.amount
+        ).filter(
+            CreditLedgerEntry.user_id.in_(user_ids),
+            CreditLedgerEntry.entry_id > since,
+            CreditLedgerEntry.entry_id <= upto
+        ):
+            snapshot = snapshots.get(user_id)
+            if snapshot is None or entry_id > snapshot.last_entry_id:
+                totals[user_id] = totals.get(user_id, Decimal('0')) + _amount(amount)
+                
+        for user_id in user_ids:
+            snapshot = snapshots.get(user_id)
+            if snapshot is None:
+                snapshot = CreditBalanceSnapshot(user_id=user_id, balance=0, last_entry_id=0)
+                db.session.add(snapshot)
+            if snapshot.last_entry_id < upto:
+                snapshot.balance = _amount(snapshot.balance) + totals.get(user_id, Decimal('0'))
+                snapshot.last_entry_id = upto
+                updated += 1
+        db.session.commit()
+        after = user_ids[-1]
+
+def reconcile_balances(batch_size=5000):
+    """Prove snapshot + later ledger entries == users.credits for every user.
+    
+    Works through users in id ranges with one set-based statement each;
+    within a statement the balance and the ledger are read from the same
+    consistent snapshot, so in-flight purchases cannot cause false alarms.
+    Returns (users checked, [(user_id, stored, expected), ...]).
+    """
+    checked = 0
+    mismatches = []
+    after = 0
+    while True:
+        user_ids = [row[0] for row in db.session.query(User.user_id).filter(
+            User.user_id > after
+        ).order_by(User.user_id).limit(batch_size).all()]
+        if not user_ids:
+            return checked, mismatches
+        low, high = user_ids[0], user_ids[-1]
+        
+        pending = db.session.query(
+            CreditLedgerEntry.user_id.label('user_id'),
+            func.sum(CreditLedgerEntry.amount).label('amount')
+        ).outerjoin(
+            CreditBalanceSnapshot, CreditBalanceSnapshot.user_id == CreditLedgerEntry.user_id
+        ).filter(
+            CreditLedgerEntry.user_id.between(low, high),
+            CreditLedgerEntry.entry_id > func.coalesce(CreditBalanceSnapshot.last_entry_id, 0)
+        ).group_by(CreditLedgerEntry.user_id).subquery()
+        expected = func.coalesce(CreditBalanceSnapshot.balance, 0) + func.coalesce(pending.c.amount, 0)
+        
+        for user_id, stored, computed in db.session.query(User.user_id, User.credits, expected).outerjoin(
+            CreditBalanceSnapshot, CreditBalanceSnapshot.user_id == User.user_id
+        ).outerjoin(
+            pending, pending.c.user_id == User.user_id
+        ).filter(
+            User.user_id.between(low, high),
+            User.credits != expected
+        ).all():
+            mismatches.append((user_id, _amount(stored), _amount(computed)))
+            
+        checked += len(user_ids)
+        after = high
+        # Start the next range from a fresh read view
+        db.session.commit()
+
+def process_credit_snapshots():
+    """Background task: advance balance snapshots"""
+    return take_balance_snapshots(
+        current_app.config.get('CREDIT_BATCH_SIZE', 5000),
+        current_app.config.get('CREDIT_SNAPSHOT_LAG_SECONDS', 60)
+    )
+
+def process_credit_reconciliation():
+    """Background task: reconcile every balance and log any mismatch"""
+    checked, mismatches = reconcile_balances(current_app.config.get('CREDIT_BATCH_SIZE', 5000))
+    for user_id, stored, expected in mismatches[:100]:
+        current_app.logger.error(
+            f"Credit balance mismatch for user {user_id}: stored {stored}, ledger {expected}"
+        )
+    if mismatches:
+        current_app.logger.error(f"Credit reconciliation: {len(mismatches)} of {checked} balances do not match")
+    return len(mismatches)
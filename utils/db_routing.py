@@ -0,0 +1,93 @@
+import random
+import time
+from functools import wraps
+from flask import g, request, current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+# Bind keys created by config.replica_binds
+REPLICA_BIND_PREFIX = 'replica_'
+STICKY_COOKIE = 'db_primary_until'
+
+def _is_write(clause):
+    """DML and SELECT ... FOR UPDATE always go to the primary"""
+    return isinstance(clause, UpdateBase) or getattr(clause, '_for_update_arg', None) is not None
+
+class RoutingSession(Session):
+    """Session that serves the reads of @read_only views from a replica.
+
+    Everything else - writes, locking reads, flushes, background tasks and
+    any view not marked read-only - stays on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not _is_write(clause):
+            engine = db_router.replica_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class DatabaseRouter:
+    """Chooses between the primary and read replicas per request.
+
+    A client that just wrote (placed an order, updated an event ...) gets a
+    short-lived cookie pinning its reads to the primary, so it always sees
+    its own writes even while the replicas lag behind.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['db_router'] = self
+
+        @app.after_request
+        def pin_writers_to_primary(response):
+            if (
+                request.method in ('POST', 'PUT', 'PATCH', 'DELETE')
+                and response.status_code < 400
+                and self.replica_keys(app)
+            ):
+                seconds = app.config.get('DB_REPLICA_STICKY_SECONDS', 10)
+                response.set_cookie(
+                    STICKY_COOKIE,
+                    str(int(time.time()) + seconds),
+                    max_age=seconds,
+                    httponly=True,
+                    samesite='Lax'
+                )
+            return response
+
+    def replica_keys(self, app=None):
+        binds = (app or current_app).config.get('SQLALCHEMY_BINDS') or {}
+        return [key for key in binds if key.startswith(REPLICA_BIND_PREFIX)]
+
+    def pinned_to_primary(self):
+        """True while the client's own recent write may not have replicated yet"""
+        try:
+            return int(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def replica_engine(self):
+        """Replica engine for the current request, or None to use the primary"""
+        if not has_request_context() or not g.get('db_read_only'):
+            return None
+        if 'db_replica_engine' not in g:
+            keys = self.replica_keys()
+            if keys and not self.pinned_to_primary():
+                g.db_replica_engine = current_app.extensions['sqlalchemy'].engines[random.choice(keys)]
+            else:
+                g.db_replica_engine = None
+        return g.db_replica_engine
+
+    def read_only(self, f):
+        """Decorator marking a view whose queries may be served by a replica"""
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            g.db_read_only = True
+            return f(*args, **kwargs)
+        return decorated
+
+db_router = DatabaseRouter()
@@ -1,6 +1,7 @@
 from flask import current_app
 from flask_mail import Message, Mail
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import or_, insert
 from models import db, EmailNotification
 
 mail = Mail()
@@ -20,23 +21,130 @@ def send_email(recipient, subject, body, html_body=None):
         current_app.logger.error(f"Failed to send email: {str(e)}")
         return False, str(e)
 
-def create_email_notification(user_id, email_type, recipient_email, subject, order_id=None, event_id=None):
-    """Create an email notification record"""
-    notification = EmailNotification(
-        user_id=user_id,
-        order_id=order_id,
-        event_id=event_id,
-        email_type=email_type,
-        recipient_email=recipient_email,
-        subject=subject,
-        status='pending'
-    )
+def notification_row(user_id, email_type, recipient_email, subject, order_id=None, event_id=None,
+                     body=None, html_body=None):
+    """Column values of an email notification due now"""
+    return {
+        'user_id': user_id,
+        'order_id': order_id,
+        'event_id': event_id,
+        'email_type': email_type,
+        'recipient_email': recipient_email,
+        'subject': subject,
+        'body': body,
+        'html_body': html_body,
+        'status': 'pending',
+        'attempts': 0,
+        'next_attempt_at': datetime.utcnow()
+    }
+
+def create_email_notification(user_id, email_type, recipient_email, subject, order_id=None, event_id=None,
+                              body=None, html_body=None, commit=True):
+    """Create an email notification record (queued in the outbox when it has a body)"""
+    notification = EmailNotification(**notification_row(
+        user_id, email_type, recipient_email, subject, order_id, event_id, body, html_body
+    ))
     db.session.add(notification)
-    db.session.commit()
+    if commit:
+        db.session.commit()
     return notification
 
-def send_order_confirmation(order_id):
-    """Send order confirmation email"""
+def claim_pending_emails(limit):
+    """Lease up to `limit` due outbox rows to this worker.
+    
+    Claimed rows stay `pending` but their next_attempt_at is pushed out by
+    EMAIL_LEASE_SECONDS, so other workers skip them; if this worker dies
+    the lease simply runs out and the message is picked up again.
+    """
+    now = datetime.utcnow()
+    notifications = EmailNotification.query.filter(
+        EmailNotification.status == 'pending',
+        EmailNotification.body.isnot(None),
+        or_(EmailNotification.next_attempt_at.is_(None), EmailNotification.next_attempt_at <= now)
+    ).order_by(EmailNotification.notification_id).with_for_update(skip_locked=True).limit(limit).all()
+    
+    lease_until = now + timedelta(seconds=current_app.config.get('EMAIL_LEASE_SECONDS', 300))
+    for notification in notifications:
+        notification.next_attempt_at = lease_until
+    notification_ids = [notification.notification_id for notification in notifications]
+    db.session.commit()
+    return notification_ids
+
+def schedule_retry(notification, error):
+    """Back off exponentially, giving up after EMAIL_MAX_ATTEMPTS"""
+    notification.attempts = (notification.attempts or 0) + 1
+    notification.last_error = str(error)[:1000]
+    if notification.attempts >= current_app.config.get('EMAIL_MAX_ATTEMPTS', 5):
+        notification.status = 'failed'
+        return
+    delay = current_app.config.get('EMAIL_RETRY_BASE_SECONDS', 30) * 2 ** (notification.attempts - 1)
+    notification.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+def deliver_emails(notification_ids):
+    """Send claimed outbox rows over a single SMTP connection"""
+    notifications = EmailNotification.query.filter(
+        EmailNotification.notification_id.in_(notification_ids)
+    ).order_by(EmailNotification.notification_id).all()
+    
+    delivered = 0
+    handled = set()
+    try:
+        with mail.connect() as connection:
+            for notification in notifications:
+                handled.add(notification.notification_id)
+                try:
+                    connection.send(Message(
+                        subject=notification.subject,
+                        recipients=[notification.recipient_email],
+                        body=notification.body,
+                        html=notification.html_body
+                    ))
+                    notification.status = 'sent'
+                    notification.sent_at = datetime.utcnow()
+                    notification.attempts = (notification.attempts or 0) + 1
+                    notification.last_error = None
+                    delivered += 1
+                except Exception as e:
+                    schedule_retry(notification, e)
+    except Exception as e:
+        # Connection or login failed: retry everything not yet attempted
+        current_app.logger.error(f"SMTP session failed: {str(e)}")
+        for notification in notifications:
+            if notification.notification_id not in handled:
+                schedule_retry(notification, e)
+                
+    db.session.commit()
+    return delivered
+
+def process_email_outbox(app, executor):
+    """Drain due outbox rows, fanning SMTP batches out to the worker pool"""
+    batch_size = app.config.get('EMAIL_BATCH_SIZE', 50)
+    capacity = batch_size * app.config.get('EMAIL_WORKERS', 4)
+    
+    def run_batch(notification_ids):
+        with app.app_context():
+            try:
+                return deliver_emails(notification_ids)
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Email batch failed: {str(e)}")
+                return 0
+            finally:
+                db.session.remove()
+                
+    delivered = 0
+    while True:
+        notification_ids = claim_pending_emails(capacity)
+        if not notification_ids:
+            break
+        batches = [notification_ids[i:i + batch_size] for i in range(0, len(notification_ids), batch_size)]
+        delivered += sum(executor.map(run_batch, batches))
+        if len(notification_ids) < capacity:
+            break
+    return delivered
+
+def send_order_confirmation(order_id, commit=True):
+    """Queue order confirmation email"""
     from models import Order, User, Event, Ticket
     
     order = Order.query.get(order_id)
@@ -104,23 +212,21 @@ def send_order_confirmation(order_id):
     </html>
     """
     
-    success, message = send_email(user.email, subject, body, html_body)
-    
-    # Update notification status
-    notification = EmailNotification.query.filter_by(
+    create_email_notification(
+        user_id=user.user_id,
+        email_type='order_confirmation',
+        recipient_email=user.email,
+        subject=subject,
         order_id=order_id,
-        email_type='order_confirmation'
-    ).first()
-    
-    if notification:
-        notification.status = 'sent' if success else 'failed'
-        notification.sent_at = datetime.utcnow() if success else None
-        db.session.commit()
+        event_id=event.event_id,
+        body=body,
+        html_body=html_body,
+        commit=commit
+    )
+    return True, "Order confirmation queued"
     
-    return success, message
-
-def send_ticket_issued(ticket_id):
-    """Send ticket issued email with QR code"""
+def send_ticket_issued(ticket_id, commit=True):
+    """Queue ticket issued email"""
     from models import Ticket, Order, Event
     
     ticket = Ticket.query.get(ticket_id)
@@ -130,6 +236,38 @@ def send_ticket_issued(ticket_id):
     order = Order.query.get(ticket.order_id)
     event = Event.query.get(order.event_id)
     
+    queue_ticket_issued(ticket, order, event, commit=commit)
+    return True, "Ticket email queued"
+
+def send_tickets_issued(order_id, commit=True, ticket_numbers=None):
+    """Queue a ticket issued email for every ticket of an order (or just `ticket_numbers`)"""
+    from models import Ticket, Order, Event
+    
+    order = Order.query.get(order_id)
+    if not order:
+        return False, "Order not found"
+    
+    # One query for the tickets; order, event and venue are shared
+    event = Event.query.get(order.event_id)
+    query = Ticket.query.filter_by(order_id=order_id)
+    if ticket_numbers is not None:
+        query = query.filter(Ticket.ticket_number.in_(ticket_numbers))
+    tickets = query.order_by(Ticket.ticket_id).all()
+    if tickets:
+        # One multi-row INSERT however many tickets the order has
+        db.session.execute(insert(EmailNotification), [
+            notification_row(**ticket_issued_email(ticket, order, event)) for ticket in tickets
+        ])
+    if commit:
+        db.session.commit()
+    return True, f"{len(tickets)} ticket email(s) queued"
+
+def queue_ticket_issued(ticket, order, event, commit=True):
+    """Build and queue the ticket issued email for an already loaded ticket"""
+    create_email_notification(**ticket_issued_email(ticket, order, event), commit=commit)
+
+def ticket_issued_email(ticket, order, event):
+    """Notification fields of the ticket issued email for an already loaded ticket"""
     subject = f"Your Ticket for {event.event_name}"
     body = f"""
     Dear {ticket.attendee_name},
@@ -164,11 +302,19 @@ def send_ticket_issued(ticket_id):
     </html>
     """
     
-    success, message = send_email(ticket.attendee_email, subject, body, html_body)
-    return success, message
+    return {
+        'user_id': order.user_id,
+        'email_type': 'ticket_issued',
+        'recipient_email': ticket.attendee_email,
+        'subject': subject,
+        'order_id': order.order_id,
+        'event_id': event.event_id,
+        'body': body,
+        'html_body': html_body
+    }
 
 def send_event_reminder(event_id, user_id):
-    """Send event reminder email"""
+    """Queue event reminder email"""
     from models import Event, User
     
     event = Event.query.get(event_id)
@@ -208,11 +354,19 @@ def send_event_reminder(event_id, user_id):
     </html>
     """
     
-    success, message = send_email(user.email, subject, body, html_body)
-    return success, message
+    create_email_notification(
+        user_id=user.user_id,
+        email_type='event_reminder',
+        recipient_email=user.email,
+        subject=subject,
+        event_id=event.event_id,
+        body=body,
+        html_body=html_body
+    )
+    return True, "Event reminder queued"
 
 def send_refund_processed(refund_id):
-    """Send refund processed email"""
+    """Queue refund processed email"""
     from models import Refund, Payment, Order, User
     
     refund = Refund.query.get(refund_id)
@@ -254,22 +408,37 @@ def send_refund_processed(refund_id):
     </html>
     """
     
-    success, message = send_email(user.email, subject, body, html_body)
-    return success, message
+    create_email_notification(
+        user_id=user.user_id,
+        email_type='refund_processed',
+        recipient_email=user.email,
+        subject=subject,
+        order_id=order.order_id,
+        event_id=order.event_id,
+        body=body,
+        html_body=html_body
+    )
+    return True, "Refund email queued"
 
-def send_event_cancelled(event_id):
-    """Send event cancelled email to all ticket holders"""
-    from models import Event, Order, User
+def send_event_cancelled(event_id, order_ids=None, commit=True):
+    """Queue event cancelled email to ticket holders (all, or just `order_ids`)"""
+    from models import Event, Order
+    from sqlalchemy.orm import joinedload
     
     event = Event.query.get(event_id)
     if not event:
         return False, "Event not found"
     
-    # Get all orders for this event
-    orders = Order.query.filter_by(event_id=event_id, status='completed').all()
+    # Get the orders for this event along with their buyers
+    query = Order.query.options(joinedload(Order.user)).filter(Order.event_id == event_id)
+    if order_ids is not None:
+        query = query.filter(Order.order_id.in_(order_ids))
+    else:
+        query = query.filter(Order.status == 'completed')
+    orders = query.all()
     
     for order in orders:
-        user = User.query.get(order.user_id)
+        user = order.user
         subject = f"Event Cancelled: {event.event_name}"
         body = f"""
         Dear {user.first_name} {user.last_name},
@@ -299,7 +468,19 @@ def send_event_cancelled(event_id):
         </html>
         """
         
-        send_email(user.email, subject, body, html_body)
+        create_email_notification(
+            user_id=user.user_id,
+            email_type='event_cancelled',
+            recipient_email=user.email,
+            subject=subject,
+            order_id=order.order_id,
+            event_id=event_id,
+            body=body,
+            html_body=html_body,
+            commit=False
+        )
     
-    return True, "Cancellation emails sent"
+    if commit:
+        db.session.commit()
+    return True, "Cancellation emails queued"
 
@@ -0,0 +1,164 @@
+import csv
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from models import db, Order, Ticket, TicketType, User, CheckIn, Seat
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+FLUSH_BYTES = 64 * 1024
+# Spreadsheet apps evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+CheckedInBy = aliased(User, name='checked_in_by_user')
+
+ORDER_COLUMNS = {
+    'order_id': Order.order_id,
+    'order_number': Order.order_number,
+    'status': Order.status,
+    'buyer_email': User.email,
+    'buyer_first_name': User.first_name,
+    'buyer_last_name': User.last_name,
+    'subtotal': Order.subtotal,
+    'discount_amount': Order.discount_amount,
+    'tax_amount': Order.tax_amount,
+    'total_amount': Order.total_amount,
+    'created_at': Order.created_at,
+}
+
+ATTENDEE_COLUMNS = {
+    'ticket_id': Ticket.ticket_id,
+    'ticket_number': Ticket.ticket_number,
+    'order_number': Order.order_number,
+    'ticket_type': TicketType.type_name,
+    'attendee_name': Ticket.attendee_name,
+    'attendee_email': Ticket.attendee_email,
+    'seat_row': Seat.row_number,
+    'seat_number': Seat.seat_number,
+    'price_paid': Ticket.price_paid,
+    'status': Ticket.status,
+    'checked_in_at': Ticket.checked_in_at,
+    'created_at': Ticket.created_at,
+}
+
+CHECK_IN_COLUMNS = {
+    'check_in_id': CheckIn.check_in_id,
+    'ticket_number': Ticket.ticket_number,
+    'ticket_type': TicketType.type_name,
+    'attendee_name': Ticket.attendee_name,
+    'attendee_email': Ticket.attendee_email,
+    'check_in_time': CheckIn.check_in_time,
+    'check_in_method': CheckIn.check_in_method,
+    'location': CheckIn.location,
+    'checked_in_by': CheckedInBy.email,
+}
+
+def _orders_statement(columns, event_id):
+    return select(*columns).select_from(Order).join(
+        User, User.user_id == Order.user_id
+    ).where(Order.event_id == event_id).order_by(Order.order_id)
+
+def _attendees_statement(columns, event_id):
+    return select(*columns).select_from(Ticket).join(
+        Order, Order.order_id == Ticket.order_id
+    ).join(
+        TicketType, TicketType.ticket_type_id == Ticket.ticket_type_id
+    ).outerjoin(
+        Seat, Seat.seat_id == Ticket.seat_id
+    ).where(Order.event_id == event_id).order_by(Ticket.ticket_id)
+
+def _check_ins_statement(columns, event_id):
+    return select(*columns).select_from(CheckIn).join(
+        Ticket, Ticket.ticket_id == CheckIn.ticket_id
+    ).join(
+        TicketType, TicketType.ticket_type_id == Ticket.ticket_type_id
+    ).join(
+        CheckedInBy, CheckedInBy.user_id == CheckIn.checked_in_by
+    ).where(CheckIn.event_id == event_id).order_by(CheckIn.check_in_time, CheckIn.check_in_id)
+
+# dataset -> (exportable columns in default order, statement builder)
+EXPORT_DATASETS = {
+    'orders': (ORDER_COLUMNS, _orders_statement),
+    'attendees': (ATTENDEE_COLUMNS, _attendees_statement),
+    'check-ins': (CHECK_IN_COLUMNS, _check_ins_statement),
+}
+
+def export_statement(dataset, event_id, names):
+    """SELECT of just the requested columns for one event's dataset"""
+    columns, build = EXPORT_DATASETS[dataset]
+    return build([columns[name].label(name) for name in names], event_id)
+
+def stream_rows(statement, batch_size):
+    """Yield rows from a server-side cursor, fetching `batch_size` at a time.
+    
+    Plain column tuples rather than ORM objects, so nothing accumulates in
+    the session's identity map and memory stays flat however many rows the
+    export has.
+    """
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    try:
+        for row in result:
+            yield row
+    finally:
+        result.close()
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class _Echo:
+    """File-like object that hands back whatever csv.writer writes to it"""
+    
+    def write(self, value):
+        return value
+
+def encode_rows(rows, names, export_format):
+    """Encode rows as CSV (with a header line) or NDJSON, one string per row"""
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(names)
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row])
+        return
+        
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), default=_json_default) + '\n'
+
+def chunk_output(pieces, gzip=False, flush_bytes=FLUSH_BYTES):
+    """Group encoded rows into ~`flush_bytes` chunks, gzip-compressed on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    buffer = []
+    size = 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= flush_bytes:
+            chunk = b''.join(buffer)
+            buffer = []
+            size = 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+                
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
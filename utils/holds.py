@@ -0,0 +1,193 @@
+import secrets
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, update
+from models import db, TicketHold, TicketHoldItem, TicketType, Seat, SeatingSection, Ticket, Order
+from utils.inventory import reserve_ticket_items, release_stock
+from utils.seat_allocator import allocate_seats
+from utils.seat_maps import lock_seat_map
+
+def generate_hold_token():
+    """Generate an unguessable hold token"""
+    return f"HLD_{secrets.token_urlsafe(24)}"
+
+def get_item_seat_ids(item):
+    """Return the explicit seat ids requested by a line item"""
+    if item.get('seat_ids'):
+        return [int(seat_id) for seat_id in item['seat_ids']]
+    if item.get('seat_id'):
+        return [int(item['seat_id'])]
+    return []
+
+def find_unavailable_seats(event, seat_ids):
+    """Return the subset of seat_ids already sold or actively held for an event"""
+    if not seat_ids:
+        return set()
+    
+    sold = db.session.query(Ticket.seat_id).join(Order).filter(
+        Order.event_id == event.event_id,
+        Order.status.in_(['pending', 'completed']),
+        Ticket.seat_id.in_(seat_ids),
+        Ticket.status.in_(['valid', 'used'])
+    ).all()
+    held = db.session.query(TicketHoldItem.seat_id).join(TicketHold).filter(
+        TicketHold.event_id == event.event_id,
+        TicketHold.status == 'active',
+        TicketHold.expires_at > datetime.utcnow(),
+        TicketHoldItem.seat_id.in_(seat_ids)
+    ).all()
+    return {row[0] for row in sold} | {row[0] for row in held}
+
+def create_hold(user_id, event, ticket_items):
+    """Reserve stock and seats for a short time ahead of checkout"""
+    try:
+        hold_items = []
+        seat_ids = []
+        for item in ticket_items:
+            tt_id = int(item['ticket_type_id'])
+            ticket_type = TicketType.query.get(tt_id)
+            if not ticket_type:
+                return False, f"Ticket type {tt_id} not found", None
+            if int(ticket_type.event_id) != int(event.event_id):
+                return False, "Ticket type does not belong to this event", None
+            
+            item_seat_ids = get_item_seat_ids(item)
+            quantity = int(item.get('quantity', len(item_seat_ids) or 1))
+            if item_seat_ids and len(item_seat_ids) != quantity:
+                return False, "Number of seats must match quantity", None
+            item['quantity'] = quantity
+            
+            if not item_seat_ids and item.get('best_available'):
+                # Locks the event's seat map until the hold commits
+                item_seat_ids = allocate_seats(event, quantity, ticket_type.section_id, exclude=seat_ids)
+                if not item_seat_ids:
+                    db.session.rollback()
+                    return False, f"Not enough adjacent seats available for {ticket_type.type_name}", None
+            
+            if item_seat_ids:
+                hold_items.extend(TicketHoldItem(ticket_type_id=tt_id, seat_id=seat_id, quantity=1) for seat_id in item_seat_ids)
+                seat_ids.extend(item_seat_ids)
+            else:
+                hold_items.append(TicketHoldItem(ticket_type_id=tt_id, quantity=quantity))
+        
+        if len(set(seat_ids)) != len(seat_ids):
+            return False, "The same seat was requested more than once", None
+        
+        if seat_ids:
+            # Lock the event's seat map, as allocate_seats does, so explicit
+            # and best-available holds on the same seats serialize
+            lock_seat_map(event)
+            seats = Seat.query.join(SeatingSection).filter(
+                Seat.seat_id.in_(seat_ids),
+                SeatingSection.venue_id == event.venue_id
+            ).all()
+            if len(seats) != len(seat_ids):
+                db.session.rollback()
+                return False, "One or more seats do not belong to this event's venue", None
+            
+            unavailable = find_unavailable_seats(event, seat_ids)
+            if unavailable:
+                db.session.rollback()
+                return False, f"Seats no longer available: {sorted(unavailable)}", None
+        
+        reserved, message = reserve_ticket_items(ticket_items)
+        if not reserved:
+            db.session.rollback()
+            return False, message, None
+        
+        ttl = current_app.config.get('HOLD_TTL_SECONDS', 600)
+        hold = TicketHold(
+            hold_token=generate_hold_token(),
+            user_id=user_id,
+            event_id=event.event_id,
+            status='active',
+            expires_at=datetime.utcnow() + timedelta(seconds=ttl),
+            items=hold_items
+        )
+        db.session.add(hold)
+        db.session.commit()
+        
+        return True, "Hold created successfully", hold
+    
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Hold creation error: {str(e)}")
+        return False, str(e), None
+
+def hold_to_ticket_items(hold):
+    """Turn hold items back into create_order line items"""
+    return [
+        {
+            'ticket_type_id': item.ticket_type_id,
+            'quantity': item.quantity,
+            'seat_id': item.seat_id
+        }
+        for item in hold.items
+    ]
+
+def release_hold(hold, status='released'):
+    """Give a hold's stock back and close it (caller commits)"""
+    quantities = {}
+    for item in hold.items:
+        quantities[item.ticket_type_id] = quantities.get(item.ticket_type_id, 0) + item.quantity
+    for tt_id in sorted(quantities):
+        release_stock(tt_id, quantities[tt_id])
+    hold.status = status
+
+def release_hold_batch(hold_ids, status):
+    """Give the stock of the given holds back and close them (caller commits)"""
+    quantities = db.session.query(
+        TicketHoldItem.ticket_type_id,
+        func.sum(TicketHoldItem.quantity)
+    ).filter(
+        TicketHoldItem.hold_id.in_(hold_ids)
+    ).group_by(TicketHoldItem.ticket_type_id).all()
+    
+    for tt_id, quantity in sorted(quantities):
+        release_stock(tt_id, int(quantity))
+    
+    db.session.execute(
+        update(TicketHold)
+        .where(TicketHold.hold_id.in_(hold_ids))
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+
+def release_event_holds(event_id):
+    """Expire every active hold on an event, e.g. when it is cancelled (caller commits).
+    
+    Holds locked by a checkout in flight are skipped; that checkout fails on
+    the event status and the sweeper releases the hold once it runs out.
+    """
+    hold_ids = [row[0] for row in db.session.query(TicketHold.hold_id).filter(
+        TicketHold.event_id == event_id,
+        TicketHold.status == 'active'
+    ).order_by(TicketHold.hold_id).with_for_update(skip_locked=True).all()]
+    if hold_ids:
+        release_hold_batch(hold_ids, 'expired')
+    return len(hold_ids)
+
+def release_expired_holds(batch_size=500):
+    """Release stock for expired holds in batches, returns the number released"""
+    released = 0
+    while True:
+        # SKIP LOCKED leaves holds that are mid-checkout to their owner
+        hold_ids = [row[0] for row in db.session.query(TicketHold.hold_id).filter(
+            TicketHold.status == 'active',
+            TicketHold.expires_at <= datetime.utcnow()
+        ).order_by(TicketHold.hold_id).limit(batch_size).with_for_update(skip_locked=True).all()]
+        
+        if not hold_ids:
+            db.session.commit()
+            break
+        
+        release_hold_batch(hold_ids, 'expired')
+        db.session.commit()
+        released += len(hold_ids)
+        
+        if len(hold_ids) < batch_size:
+            break
+    
+    if released:
+        current_app.logger.info(f"Released {released} expired hold(s)")
+    return released
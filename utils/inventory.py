@@ -0,0 +1,98 @@
+import threading
+from sqlalchemy import update
+from sqlalchemy.orm.util import identity_key
+from models import db, TicketType
+
+# Process-wide reservation counters (exposed through /api/health)
+_stats_lock = threading.Lock()
+_stats = {
+    'reservations_succeeded': 0,
+    'reservations_rejected': 0,
+    'units_reserved': 0,
+    'units_released': 0
+}
+
+def _record(**deltas):
+    """Increment reservation counters"""
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+def get_reservation_stats():
+    """Return a copy of the reservation counters"""
+    with _stats_lock:
+        return dict(_stats)
+
+def _expire_cached_ticket_type(ticket_type_id):
+    """Expire a loaded TicketType so its next read sees the new stock level"""
+    instance = db.session.identity_map.get(identity_key(TicketType, ticket_type_id))
+    if instance is not None:
+        db.session.expire(instance, ['quantity_available'])
+
+def aggregate_quantities(ticket_items):
+    """Sum requested quantities per ticket type"""
+    quantities = {}
+    for item in ticket_items:
+        tt_id = int(item['ticket_type_id'])
+        quantities[tt_id] = quantities.get(tt_id, 0) + int(item.get('quantity', 1))
+    return quantities
+
+def reserve_stock(ticket_type_id, quantity):
+    """Atomically take stock from a ticket type.
+
+    The decrement is a single conditional UPDATE guarded on the remaining
+    quantity, so concurrent buyers can never drive it below zero. Returns
+    True if the stock was taken. The change is part of the caller's
+    transaction and is undone by a rollback.
+    """
+    result = db.session.execute(
+        update(TicketType)
+        .where(
+            TicketType.ticket_type_id == ticket_type_id,
+            TicketType.quantity_available >= quantity
+        )
+        .values(quantity_available=TicketType.quantity_available - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    _expire_cached_ticket_type(ticket_type_id)
+    return result.rowcount == 1
+
+def release_stock(ticket_type_id, quantity):
+    """Return previously reserved stock to a ticket type"""
+    db.session.execute(
+        update(TicketType)
+        .where(TicketType.ticket_type_id == ticket_type_id)
+        .values(quantity_available=TicketType.quantity_available + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    _expire_cached_ticket_type(ticket_type_id)
+    _record(units_released=quantity)
+
+def reserve_ticket_items(ticket_items):
+    """Reserve stock for every line item of an order, all or nothing.
+
+    Ticket types are reserved in id order so concurrent multi-type orders
+    acquire row locks consistently. On failure the caller must roll back
+    the session to undo any reservations already taken.
+    """
+    quantities = aggregate_quantities(ticket_items)
+
+    for tt_id in sorted(quantities):
+        quantity = quantities[tt_id]
+        if quantity < 1:
+            _record(reservations_rejected=1)
+            return False, "Quantity must be at least 1"
+        if not reserve_stock(tt_id, quantity):
+            _record(reservations_rejected=1)
+            ticket_type = TicketType.query.get(tt_id)
+            name = ticket_type.type_name if ticket_type else tt_id
+            return False, f"Insufficient tickets available for {name}"
+
+    _record(reservations_succeeded=1, units_reserved=sum(quantities.values()))
+    return True, "Tickets reserved"
+
+def release_ticket_items(ticket_items):
+    """Release stock reserved for a set of line items"""
+    quantities = aggregate_quantities(ticket_items)
+    for tt_id in sorted(quantities):
+        release_stock(tt_id, quantities[tt_id])
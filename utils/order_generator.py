@@ -1,9 +1,16 @@
+import os
 import uuid
 from datetime import datetime
-from models import db, Order, Ticket, TicketType, PromotionalCode, EventAnalytics
+from sqlalchemy import insert
+from models import db, Event, Order, Ticket, TicketType, PromotionalCode
 from utils.qr_generator import generate_qr_code  # kept import style if needed elsewhere (not used now)
 from utils.payment_processor import process_payment
-from utils.email_service import send_order_confirmation, send_ticket_issued, create_email_notification
+from utils.email_service import send_order_confirmation, send_tickets_issued
+from utils.inventory import reserve_ticket_items
+from utils.analytics import record_sale
+from utils.seat_maps import mark_seats_taken
+from utils.seat_allocator import allocate_seats, held_seat_ids
+from utils.holds import get_item_seat_ids
 from flask import current_app
 
 def generate_order_number():
@@ -14,12 +21,41 @@ def generate_ticket_number():
     """Generate unique ticket number"""
     return f"TKT_{uuid.uuid4().hex[:16].upper()}"
 
-def calculate_order_totals(ticket_items, promo_code=None, tax_rate=0.10):
+def generate_ticket_numbers(count):
+    """Generate `count` unique ticket numbers from one read of the OS random source"""
+    digits = os.urandom(8 * count).hex().upper()
+    return [f"TKT_{digits[i:i + 16]}" for i in range(0, 16 * count, 16)]
+
+def ticket_row(order_id, ticket_type, ticket_number, attendee, seat_id=None, issued_at=None, price_paid=None):
+    """Insert mapping for one issued ticket (priced at the ticket type's price unless given)"""
+    return {
+        'order_id': order_id,
+        'ticket_type_id': ticket_type.ticket_type_id,
+        'seat_id': seat_id,
+        'ticket_number': ticket_number,
+        'attendee_name': attendee.get('name', ''),
+        'attendee_email': attendee.get('email', ''),
+        'price_paid': ticket_type.price if price_paid is None else price_paid,
+        'status': 'valid',
+        'created_at': issued_at or datetime.utcnow()
+    }
+
+def load_ticket_types(ticket_items):
+    """Fetch every ticket type an order references in one query, keyed by id"""
+    ids = {int(item['ticket_type_id']) for item in ticket_items}
+    return {
+        ticket_type.ticket_type_id: ticket_type
+        for ticket_type in TicketType.query.filter(TicketType.ticket_type_id.in_(ids)).all()
+    } if ids else {}
+
+def calculate_order_totals(ticket_items, promo_code=None, tax_rate=0.10, ticket_types=None):
     """Calculate order totals"""
+    if ticket_types is None:
+        ticket_types = load_ticket_types(ticket_items)
     subtotal = 0.0
     
     for item in ticket_items:
-        ticket_type = TicketType.query.get(item['ticket_type_id'])
+        ticket_type = ticket_types.get(int(item['ticket_type_id']))
         if not ticket_type:
             continue
         quantity = item.get('quantity', 1)
@@ -51,30 +87,66 @@ def calculate_order_totals(ticket_items, promo_code=None, tax_rate=0.10):
         'promo_id': promo_id
     }
 
-def create_order(user_id, event_id, ticket_items, promo_code=None, payment_method='credit_card'):
-    """Create order and tickets"""
+def create_order(user_id, event_id, ticket_items, promo_code=None, payment_method='credit_card', hold=None,
+                 bulk_job=None):
+    """Create order and tickets
+    
+    When `hold` is given its stock is already reserved, so checkout only
+    converts the hold into an order instead of taking stock again. When
+    `bulk_job` is given the order is priced, reserved and paid as usual
+    but its tickets and emails are left to the bulk order worker. Line
+    items pick seats with `seat_ids` (one per ticket) or let the allocator
+    choose adjacent seats with `best_available`.
+    """
     try:
         # Coerce event_id to int
         try:
             event_id = int(event_id)
         except Exception:
             return False, "Invalid event id", None
-        # Validate ticket availability
+        # Shared lock: a cancellation waits for orders in flight, and an
+        # order that waited on a cancellation sees the new status
+        event = Event.query.filter_by(event_id=event_id).populate_existing().with_for_update(read=True).first()
+        if not event:
+            db.session.rollback()
+            return False, "Event not found", None
+        if event.status != 'published':
+            db.session.rollback()
+            return False, f"Cannot purchase tickets for a {event.status} event", None
+        # Validate ticket availability; every ticket type is fetched once here
+        ticket_types = load_ticket_types(ticket_items)
+        requested_seat_ids = []
         for item in ticket_items:
             tt_id = int(item['ticket_type_id'])
-            ticket_type = TicketType.query.get(tt_id)
+            ticket_type = ticket_types.get(tt_id)
             if not ticket_type:
+                db.session.rollback()
                 return False, f"Ticket type {tt_id} not found", None
             
-            quantity = item.get('quantity', 1)
-            if ticket_type.quantity_available < quantity:
-                return False, f"Insufficient tickets available for {ticket_type.type_name}", None
-            
             if int(ticket_type.event_id) != int(event_id):
+                db.session.rollback()
                 return False, "Ticket type does not belong to this event", None
+            
+            item_seat_ids = get_item_seat_ids(item)
+            if item_seat_ids and len(item_seat_ids) != int(item.get('quantity', 1)):
+                db.session.rollback()
+                return False, "Number of seats must match quantity", None
+            requested_seat_ids.extend(item_seat_ids)
+        if len(set(requested_seat_ids)) != len(requested_seat_ids):
+            db.session.rollback()
+            return False, "The same seat was requested more than once", None
+        
+        # Reserve stock atomically; a rollback releases it again
+        if hold is None:
+            reserved, message = reserve_ticket_items(ticket_items)
+            if not reserved:
+                db.session.rollback()
+                return False, message, None
         
         # Calculate totals
-        totals = calculate_order_totals(ticket_items, promo_code, current_app.config.get('TAX_RATE', 0.10))
+        totals = calculate_order_totals(
+            ticket_items, promo_code, current_app.config.get('TAX_RATE', 0.10), ticket_types
+        )
         
         # Create order
         order = Order(
@@ -92,41 +164,73 @@ def create_order(user_id, event_id, ticket_items, promo_code=None, payment_metho
         db.session.add(order)
         db.session.flush()  # Get order_id
         
-        # Create tickets
-        tickets = []
-        for item in ticket_items:
-            ticket_type = TicketType.query.get(item['ticket_type_id'])
-            quantity = item.get('quantity', 1)
-            attendee_info = item.get('attendees', [])
-            
-            for i in range(quantity):
-                attendee = attendee_info[i] if i < len(attendee_info) else attendee_info[0] if attendee_info else {}
-                
-                ticket_number = generate_ticket_number()
-                ticket = Ticket(
-                    order_id=order.order_id,
-                    ticket_type_id=ticket_type.ticket_type_id,
-                    seat_id=item.get('seat_id'),
-                    ticket_number=ticket_number,
-                    attendee_name=attendee.get('name', ''),
-                    attendee_email=attendee.get('email', ''),
-                    price_paid=float(ticket_type.price),
-                    status='valid'
-                )
+        if hold is not None:
+            hold.status = 'converted'
+            hold.order_id = order.order_id
+        
+        if bulk_job is not None:
+            bulk_job.order_id = order.order_id
+            # Only what the analytics deltas need; tickets come later in chunks
+            tickets = (
+                {'ticket_type_id': int(item['ticket_type_id']), 'price_paid': ticket_types[int(item['ticket_type_id'])].price}
+                for item in ticket_items
+                for _ in range(int(item.get('quantity', 1)))
+            )
+        else:
+            # Issue tickets as plain rows in one multi-row INSERT; stock was
+            # already taken with one UPDATE per ticket type
+            ticket_numbers = generate_ticket_numbers(sum(int(item.get('quantity', 1)) for item in ticket_items))
+            now = datetime.utcnow()
+            tickets = []
+            for item in ticket_items:
+                ticket_type = ticket_types[int(item['ticket_type_id'])]
+                quantity = int(item.get('quantity', 1))
+                attendee_info = item.get('attendees', [])
                 
-                db.session.add(ticket)
-                tickets.append(ticket)
+                seat_ids = get_item_seat_ids(item)
+                if not seat_ids and item.get('best_available'):
+                    # Locks the event's seat map until this order commits
+                    seat_ids = allocate_seats(
+                        event, quantity, ticket_type.section_id, exclude=requested_seat_ids
+                    )
+                    if not seat_ids:
+                        db.session.rollback()
+                        return False, f"Not enough adjacent seats available for {ticket_type.type_name}", None
+                    requested_seat_ids.extend(seat_ids)
                 
-                # Update ticket type availability (simulating trigger)
-                ticket_type.quantity_available -= 1
+                for i in range(quantity):
+                    attendee = attendee_info[i] if i < len(attendee_info) else attendee_info[0] if attendee_info else {}
+                    tickets.append(ticket_row(
+                        order.order_id, ticket_type, ticket_numbers[len(tickets)], attendee,
+                        seat_ids[i] if seat_ids else None, now
+                    ))
+            if tickets:
+                db.session.execute(insert(Ticket), tickets)
+                # Claim the seats in the event's seat map; a seat sold in the
+                # meantime fails the whole order
+                unavailable = mark_seats_taken(event_id, [ticket['seat_id'] for ticket in tickets])
+                if not unavailable and hold is None and requested_seat_ids:
+                    # Seats in another buyer's active hold are theirs until it
+                    # runs out; the seat map lock serializes this with create_hold
+                    unavailable = held_seat_ids(event_id, locking=True) & set(requested_seat_ids)
+                if unavailable:
+                    db.session.rollback()
+                    return False, f"Seats no longer available: {sorted(unavailable)}", None
         
         # Update promotional code usage (simulating trigger)
+        promo = None
         if totals['promo_id']:
             promo = PromotionalCode.query.get(totals['promo_id'])
             if promo:
                 promo.usage_count += 1
         
-        db.session.commit()
+        # Append-only analytics deltas commit with the order; the rollup
+        # worker compacts them into EventAnalytics off the purchase path
+        record_sale(order, tickets, promo.code if promo else None, ticket_types)
+        
+        # Flush only: the order, tickets and stock reservation commit together
+        # with the payment, or are all rolled back if the payment fails
+        db.session.flush()
         
         # Process payment
         success, message, payment = process_payment(
@@ -140,67 +244,17 @@ def create_order(user_id, event_id, ticket_items, promo_code=None, payment_metho
             db.session.rollback()
             return False, f"Payment failed: {message}", None
         
-        # Update event analytics on successful purchase
+        if bulk_job is not None:
+            return True, "Order created; tickets are being issued", order
+        
+        # Queue emails in the outbox; the mail workers deliver them
         try:
-            analytics = EventAnalytics.query.filter_by(event_id=event_id).first()
-            if not analytics:
-                analytics = EventAnalytics(
-                    event_id=event_id,
-                    total_tickets_sold=0,
-                    total_revenue=0.00,
-                    total_attendees=0,
-                    tickets_by_type={},
-                    revenue_by_type={}
-                )
-                db.session.add(analytics)
-                db.session.flush()
-            if analytics:
-                # Aggregate counts by ticket type for this order
-                tickets_by_type_delta = {}
-                revenue_by_type_delta = {}
-                for item in ticket_items:
-                    tt = TicketType.query.get(int(item['ticket_type_id']))
-                    if not tt:
-                        continue
-                    qty = int(item.get('quantity', 1))
-                    tickets_by_type_delta[tt.type_name] = tickets_by_type_delta.get(tt.type_name, 0) + qty
-                    revenue_by_type_delta[tt.type_name] = revenue_by_type_delta.get(tt.type_name, 0.0) + float(tt.price) * qty
-                
-                # Update totals
-                analytics.total_tickets_sold = int(analytics.total_tickets_sold or 0) + sum(tickets_by_type_delta.values())
-                analytics.total_revenue = float(analytics.total_revenue or 0.0) + float(totals['total_amount'])
-                analytics.total_attendees = int(analytics.total_attendees or 0) + sum(tickets_by_type_delta.values())
-                
-                # Update JSON breakdowns
-                current_tickets_by_type = analytics.tickets_by_type or {}
-                current_revenue_by_type = analytics.revenue_by_type or {}
-                for k, v in tickets_by_type_delta.items():
-                    current_tickets_by_type[k] = int(current_tickets_by_type.get(k, 0)) + v
-                for k, v in revenue_by_type_delta.items():
-                    current_revenue_by_type[k] = float(current_revenue_by_type.get(k, 0.0)) + float(v)
-                analytics.tickets_by_type = current_tickets_by_type
-                analytics.revenue_by_type = current_revenue_by_type
-                
-                db.session.commit()
+            send_order_confirmation(order.order_id, commit=False)
+            send_tickets_issued(order.order_id, commit=False)
+            db.session.commit()
         except Exception as e:
-            current_app.logger.warning(f"Analytics update failed: {str(e)}")
-        
-        # Create email notification
-        from models import User
-        user = User.query.get(user_id)
-        create_email_notification(
-            user_id=user_id,
-            email_type='order_confirmation',
-            recipient_email=user.email,
-            subject=f"Order Confirmation - {order.order_number}",
-            order_id=order.order_id,
-            event_id=event_id
-        )
-        
-        # Send emails
-        send_order_confirmation(order.order_id)
-        for ticket in tickets:
-            send_ticket_issued(ticket.ticket_id)
+            db.session.rollback()
+            current_app.logger.error(f"Queueing order emails failed: {str(e)}")
         
         return True, "Order created successfully", order
         
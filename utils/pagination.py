@@ -0,0 +1,48 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+def encode_cursor(*values):
+    """Encode keyset values into an opaque URL-safe cursor"""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor (raises ValueError if malformed)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+def keyset_after(columns, values):
+    """WHERE clause for rows strictly after `values` in ascending `columns` order.
+    
+    Expanded into OR/AND form rather than a row-value comparison so MySQL
+    can use a range scan on the matching composite index.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, column > values[i]))
+    return or_(*clauses)
+
+def parse_limit(value, default, maximum):
+    """Clamp a requested page size to [1, maximum]"""
+    if value is None:
+        return default
+    return max(1, min(int(value), maximum))
+
+def parse_fields(value, allowed):
+    """Parse a comma separated `fields=` projection (raises ValueError on unknown fields)"""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
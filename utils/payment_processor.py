@@ -1,6 +1,9 @@
 import uuid
 from datetime import datetime
-from models import db, Payment, Order, User
+from sqlalchemy import update
+from models import db, Payment, Order, User, Ticket
+from utils.credits import debit_credits, add_credits
+from utils.seat_maps import release_order_seats
 from flask import current_app
 
 def generate_transaction_id():
@@ -21,11 +24,6 @@ def process_payment(order_id, payment_method, amount, currency='USD'):
         if user.user_type != 'attendee':
             return False, "Only attendees can purchase tickets", None
         
-        # Check credits
-        user_credits = float(user.credits or 0.0)
-        if user_credits < float(amount):
-            return False, "Insufficient credits", None
-        
         # Generate transaction ID
         transaction_id = generate_transaction_id()
         
@@ -50,12 +48,15 @@ def process_payment(order_id, payment_method, amount, currency='USD'):
         )
         
         db.session.add(payment)
+        db.session.flush()
         
         # Update order status
         if payment_status == 'completed':
+            # Check and deduct credits in one statement (no double spend)
+            if not debit_credits(user.user_id, amount, order_id=order_id, payment_id=payment.payment_id):
+                db.session.rollback()
+                return False, "Insufficient credits", None
             order.status = 'completed'
-            # Deduct credits
-            user.credits = user_credits - float(amount)
         
         db.session.commit()
         
@@ -105,12 +106,22 @@ def process_refund(payment_id, amount, reason=None):
         payment.status = 'refunded'
         
         # Refund credits to user account
-        user_credits = float(user.credits or 0.0)
-        refund_amount = float(amount)
-        user.credits = user_credits + refund_amount
+        add_credits(user.user_id, amount, order_id=order.order_id, payment_id=payment_id)
         
-        # Update order status to refunded
+        # Update order status to refunded; its tickets are revoked with it,
+        # as the cancellation job does, so gates reject them offline too
         order.status = 'refunded'
+        db.session.execute(
+            update(Ticket).where(
+                Ticket.order_id == order.order_id,
+                Ticket.status != 'refunded'
+            ).values(status='refunded').execution_options(synchronize_session=False)
+        )
+        release_order_seats(order.event_id, [order.order_id])
+        
+        # Analytics pick the refund up from the delta log
+        from utils.analytics import record_refund
+        record_refund(order.event_id, [order.order_id], amount)
         
         db.session.commit()
         
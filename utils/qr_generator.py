@@ -1,30 +1,219 @@
 import qrcode
+import qrcode.image.svg
 import io
+import os
 import base64
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
 from PIL import Image
 
-def generate_qr_code(data):
-    """Generate QR code for ticket"""
+QR_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+def render_qr(data, fmt='png', box_size=10, border=4):
+    """Render a QR code to PNG or SVG bytes (no app context needed)"""
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
+        box_size=box_size,
+        border=border,
     )
     qr.add_data(data)
     qr.make(fit=True)
     
-    img = qr.make_image(fill_color="black", back_color="white")
+    if fmt == 'svg':
+        # Path-based SVG skips rasterizing and compressing entirely
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
     
-    # Convert to base64 string
     buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    img_str = base64.b64encode(buffer.getvalue()).decode()
+    if fmt == 'svg':
+        img.save(buffer)
+    else:
+        img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def _render_job(job):
+    """Process pool entry point: (key, data, fmt, box_size, border) -> (key, bytes)"""
+    key, data, fmt, box_size, border = job
+    return key, render_qr(data, fmt, box_size, border)
+
+class QRCache:
+    """Content-addressed QR image cache: in-process LRU over an on-disk store.
+    
+    Keys hash the payload together with the render options, so an entry can
+    never go stale; a changed payload simply maps to a new key. The disk
+    store is kept under a size cap by `prune_disk`; disk hits refresh a
+    file's mtime, so files are pruned least recently used first.
+    """
+    
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+    
+    def init_app(self, app):
+        self.max_entries = app.config.get('QR_CACHE_MAX_ENTRIES', self.max_entries)
+        app.extensions['qr_cache'] = self
+    
+    @staticmethod
+    def make_key(data, fmt, box_size, border):
+        return hashlib.sha256(f"{fmt}|{box_size}|{border}|{data}".encode()).hexdigest()
+    
+    def _disk_folder(self):
+        return current_app.config.get('QR_CACHE_FOLDER') or \
+            os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'qr')
+    
+    def _disk_path(self, key, fmt):
+        return os.path.join(self._disk_folder(), key[:2], f"{key}.{fmt}")
+    
+    def _remember(self, key, image):
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
     
-    return img_str
+    def get(self, key, fmt):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                return image
+        
+        path = self._disk_path(key, fmt)
+        try:
+            with open(path, 'rb') as f:
+                image = f.read()
+            os.utime(path)
+        except OSError:
+            # Not rendered yet, or pruned in the meantime
+            return None
+        self._remember(key, image)
+        return image
+    
+    def put(self, key, fmt, image):
+        self._remember(key, image)
+        path = self._disk_path(key, fmt)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(image)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            current_app.logger.warning(f"Could not store QR code on disk: {str(e)}")
+    
+    def prune_disk(self, max_bytes):
+        """Delete the least recently used files until the disk store fits in `max_bytes`"""
+        files = []
+        total = 0
+        for root, _, names in os.walk(self._disk_folder()):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                current_app.logger.warning(f"Could not prune QR code from disk: {str(e)}")
+                continue
+            total -= size
+        
+        if removed:
+            current_app.logger.info(f"Pruned {removed} QR code(s) from the disk cache")
+        return removed
+    
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a threaded web worker is not safe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=current_app.config.get('QR_RENDER_WORKERS') or os.cpu_count(),
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+    
+    def render(self, data, fmt='png', box_size=10, border=4):
+        """Return QR image bytes, rendering only on a cache miss"""
+        key = self.make_key(data, fmt, box_size, border)
+        image = self.get(key, fmt)
+        if image is None:
+            image = render_qr(data, fmt, box_size, border)
+            self.put(key, fmt, image)
+        return image
+    
+    def render_many(self, payloads, fmt='png', box_size=10, border=4):
+        """Render many payloads; misses are spread over a process pool"""
+        keys = [self.make_key(data, fmt, box_size, border) for data in payloads]
+        images = {}
+        misses = []
+        for key, data in zip(keys, payloads):
+            if key in images:
+                continue
+            image = self.get(key, fmt)
+            if image is None:
+                misses.append((key, data, fmt, box_size, border))
+                images[key] = None
+            else:
+                images[key] = image
+        
+        if len(misses) >= current_app.config.get('QR_PARALLEL_THRESHOLD', 16):
+            chunksize = max(1, len(misses) // (4 * (current_app.config.get('QR_RENDER_WORKERS') or os.cpu_count())))
+            rendered = self._get_pool().map(_render_job, misses, chunksize=chunksize)
+        else:
+            rendered = map(_render_job, misses)
+        for key, image in rendered:
+            images[key] = image
+            self.put(key, fmt, image)
+        
+        return [images[key] for key in keys]
+
+qr_cache = QRCache()
+
+def prune_qr_disk_cache():
+    """Background task: keep the on-disk QR store under QR_DISK_CACHE_MAX_BYTES"""
+    return qr_cache.prune_disk(current_app.config.get('QR_DISK_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+def encode_qr(image, fmt='png'):
+    """JSON-friendly QR body: base64 for PNG, markup for SVG"""
+    if fmt == 'svg':
+        return image.decode()
+    return base64.b64encode(image).decode()
+
+def generate_qr_code(data, fmt='png'):
+    """Generate QR code for ticket"""
+    return encode_qr(qr_cache.render(data, fmt), fmt)
 
-def generate_ticket_qr_code(ticket_number, ticket_id):
-    """Generate QR code for a specific ticket"""
-    data = f"TICKET:{ticket_number}:{ticket_id}"
-    return generate_qr_code(data)
+def generate_ticket_qr_code(ticket, event, fmt='png'):
+    """Generate QR code carrying a ticket's signed token"""
+    from utils.ticket_tokens import issue_ticket_token
+    return generate_qr_code(issue_ticket_token(ticket, event), fmt)
 
+def generate_ticket_qr_codes(tickets_with_events, fmt='png'):
+    """Batch variant of generate_ticket_qr_code for [(ticket, event), ...]"""
+    from utils.ticket_tokens import issue_ticket_token
+    payloads = [issue_ticket_token(ticket, event) for ticket, event in tickets_with_events]
+    return [encode_qr(image, fmt) for image in qr_cache.render_many(payloads, fmt)]
@@ -0,0 +1,128 @@
+import re
+from sqlalchemy import select, text, func, literal, or_, Float, BigInteger
+from sqlalchemy.dialects.mysql import match as mysql_match
+from models import db, Event, Venue
+
+# SQLite FTS5 table mirroring the searchable event columns
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts "
+    "USING fts5(event_id UNINDEXED, event_name, description)"
+)
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+def tokenize(query_text):
+    """Split a search string into word tokens"""
+    return re.findall(r'\w+', query_text or '', flags=re.UNICODE)
+
+def ensure_search_index():
+    """Create the local full-text table if the engine needs one"""
+    if _dialect() == 'sqlite':
+        db.session.execute(text(SQLITE_FTS_DDL))
+
+def index_event(event):
+    """Keep the search index in step with an event (call before commit).
+    
+    MySQL maintains its FULLTEXT index itself; SQLite mirrors the text
+    columns into an FTS5 table inside the same transaction.
+    """
+    if _dialect() != 'sqlite':
+        return
+    ensure_search_index()
+    db.session.execute(text("DELETE FROM events_fts WHERE event_id = :event_id"), {'event_id': event.event_id})
+    db.session.execute(
+        text("INSERT INTO events_fts (event_id, event_name, description) VALUES (:event_id, :event_name, :description)"),
+        {'event_id': event.event_id, 'event_name': event.event_name or '', 'description': event.description or ''}
+    )
+
+def rebuild_search_index():
+    """Re-index every event (backfill for existing SQLite databases)"""
+    if _dialect() != 'sqlite':
+        return 0
+    ensure_search_index()
+    db.session.execute(text("DELETE FROM events_fts"))
+    count = 0
+    for event in Event.query.yield_per(1000):
+        index_event(event)
+        count += 1
+    db.session.commit()
+    return count
+
+def match_subquery(query_text):
+    """Subquery of (event_id, score) for events matching a search string.
+    
+    Every term must match, each as a prefix, so partially typed queries
+    still find results. Higher scores rank first.
+    """
+    tokens = tokenize(query_text)
+    if not tokens:
+        return None
+        
+    dialect = _dialect()
+    if dialect == 'mysql':
+        boolean_query = ' '.join(f'+{token}*' for token in tokens)
+        relevance = mysql_match(Event.event_name, Event.description, against=boolean_query).in_boolean_mode()
+        return select(
+            Event.event_id.label('event_id'),
+            relevance.label('score')
+        ).where(relevance > 0).subquery('search_matches')
+        
+    if dialect == 'sqlite':
+        ensure_search_index()
+        fts_query = ' '.join(f'"{token}"*' for token in tokens)
+        return text(
+            "SELECT event_id, -bm25(events_fts) AS score FROM events_fts WHERE events_fts MATCH :search_query"
+        ).bindparams(search_query=fts_query).columns(
+            event_id=BigInteger, score=Float
+        ).subquery('search_matches')
+        
+    # No full-text engine available: fall back to substring matching
+    conditions = [
+        or_(Event.event_name.ilike(f'%{token}%'), Event.description.ilike(f'%{token}%'))
+        for token in tokens
+    ]
+    return select(
+        Event.event_id.label('event_id'),
+        literal(1.0).label('score')
+    ).where(*conditions).subquery('search_matches')
+
+def search_events(query_text, status=None, category=None, city=None, limit=20, offset=0):
+    """Ranked event search with facet counts by category and venue city"""
+    matches = match_subquery(query_text)
+    if matches is None:
+        return [], 0, {'category': [], 'city': []}
+        
+    def base_query(*entities, skip=None):
+        query = db.session.query(*entities).select_from(Event).join(
+            matches, matches.c.event_id == Event.event_id
+        ).join(Venue, Venue.venue_id == Event.venue_id)
+        if status:
+            query = query.filter(Event.status == status)
+        if category and skip != 'category':
+            query = query.filter(Event.category == category)
+        if city and skip != 'city':
+            query = query.filter(Venue.city == city)
+        return query
+        
+    total = base_query(func.count(Event.event_id)).scalar()
+    results = base_query(Event, matches.c.score).order_by(
+        matches.c.score.desc(), Event.event_id
+    ).offset(offset).limit(limit).all()
+    
+    # Each facet ignores its own filter so the other values stay selectable
+    facets = {
+        'category': [
+            {'value': value, 'count': count}
+            for value, count in base_query(Event.category, func.count(Event.event_id), skip='category')
+            .filter(Event.category.isnot(None))
+            .group_by(Event.category).order_by(func.count(Event.event_id).desc()).all()
+        ],
+        'city': [
+            {'value': value, 'count': count}
+            for value, count in base_query(Venue.city, func.count(Event.event_id), skip='city')
+            .group_by(Venue.city).order_by(func.count(Event.event_id).desc()).all()
+        ]
+    }
+    
+    return results, total, facets
@@ -0,0 +1,209 @@
+import re
+import threading
+import weakref
+from datetime import datetime
+from flask import current_app
+from models import db, TicketHold, TicketHoldItem
+from utils.seat_maps import get_seat_map, lock_seat_map, set_bits
+
+class SeatRow:
+    """One physical row: its seat ordinals left to right and where the row is broken"""
+    __slots__ = ('section_id', 'label', 'rank', 'ordinals', 'breaks', 'center', 'span')
+    
+    def __init__(self, section_id, label, rank, ordinals, breaks):
+        self.section_id = section_id
+        self.label = label
+        self.rank = rank
+        self.ordinals = ordinals
+        self.breaks = breaks  # positions i where seats i and i + 1 are not adjacent
+        self.center = (len(ordinals) - 1) / 2
+        # Rows whose ordinals run consecutively left to right (seats created
+        # in order) can be ruled out with one mask instead of seat by seat
+        low, high = ordinals[0], ordinals[-1]
+        self.span = (low, high) if ordinals == list(range(low, high + 1)) else None
+
+class RowIndex:
+    """A venue's rows, front rows first, plus a mask of ordinals not adjacent to the next one.
+    
+    Bit i of `breaks` is set when ordinal i + 1 is not the seat right of
+    ordinal i (end of a row, an aisle, a gap in the numbering) for rows
+    whose ordinals are consecutive.
+    """
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.breaks = 0
+        for row in rows:
+            if row.span is not None:
+                self.breaks |= 1 << row.span[1]
+                for i in row.breaks:
+                    self.breaks |= 1 << row.ordinals[i]
+
+_row_indexes = weakref.WeakKeyDictionary()
+_row_indexes_lock = threading.Lock()
+
+def natural_key(label):
+    """Sort key ordering '2' before '10' and 'Z' before 'AA'"""
+    return tuple(
+        (0, int(part), '') if part.isdigit() else (1, len(part), part.upper())
+        for part in re.split(r'(\d+)', str(label)) if part
+    )
+
+def _section_config(section):
+    config = section.layout_config
+    return config if isinstance(config, dict) else {}
+
+def build_row_index(layout):
+    """Row index of a venue layout.
+    
+    Rows follow the section's layout_config "rows" list (front to back)
+    when given, natural label order otherwise. Seats in a row are adjacent
+    when their numbers are consecutive, unless layout_config "aisles_after"
+    lists the first one.
+    """
+    seats_by_row = {}
+    for ordinal, seat in enumerate(layout.seats):
+        seats_by_row.setdefault((seat.section_id, seat.row_number), []).append(ordinal)
+        
+    configs = {section.section_id: _section_config(section) for section in layout.sections}
+    labels_by_section = {}
+    for section_id, label in seats_by_row:
+        labels_by_section.setdefault(section_id, []).append(label)
+        
+    rows = []
+    for section_id, labels in labels_by_section.items():
+        config = configs.get(section_id, {})
+        configured = [str(label) for label in config.get('rows') or []]
+        aisles_after = {str(number) for number in config.get('aisles_after') or []}
+        labels.sort(key=lambda label: (
+            (0, configured.index(label)) if label in configured else (1, natural_key(label))
+        ))
+        for rank, label in enumerate(labels):
+            ordinals = sorted(
+                seats_by_row[(section_id, label)],
+                key=lambda ordinal: natural_key(layout.seats[ordinal].seat_number)
+            )
+            breaks = set()
+            for i in range(len(ordinals) - 1):
+                left = layout.seats[ordinals[i]].seat_number
+                right = layout.seats[ordinals[i + 1]].seat_number
+                if left in aisles_after or (left.isdigit() and right.isdigit() and int(right) != int(left) + 1):
+                    breaks.add(i)
+            rows.append(SeatRow(section_id, label, rank, ordinals, breaks))
+            
+    rows.sort(key=lambda row: (row.rank, row.section_id))
+    return RowIndex(rows)
+
+def get_row_index(layout):
+    """Row index of a layout, built once per cached layout"""
+    index = _row_indexes.get(layout)
+    if index is None:
+        index = build_row_index(layout)
+        with _row_indexes_lock:
+            _row_indexes[layout] = index
+    return index
+
+def best_block_in_row(row, taken, quantity):
+    """(distance from the row center, start position) of the most central free block"""
+    best = None
+    run = 0
+    for i, ordinal in enumerate(row.ordinals):
+        if taken[ordinal >> 3] & (1 << (ordinal & 7)):
+            run = 0
+            continue
+        run = run + 1 if run and (i - 1) not in row.breaks else 1
+        if run >= quantity:
+            start = i - quantity + 1
+            distance = abs((start + i) / 2 - row.center)
+            if best is None or distance < best[0]:
+                best = (distance, start)
+    return best
+
+def find_best_seats(index, taken, quantity, section_id=None, unavailable=frozenset(), centrality_weight=1.0):
+    """Ordinals of the best `quantity` adjacent free seats in one row, or None.
+    
+    `taken` is a seat map bitmap. A block scores its row rank plus
+    `centrality_weight` times its offset from the row center (0 centered,
+    1 at the end of the row); lowest wins. Rows come front first, so the
+    scan stops as soon as no later row can beat the best block found.
+    """
+    blocked = bytearray(taken)
+    set_bits(blocked, unavailable, True)
+    # Bit i of `starts` is set when ordinals i .. i + quantity - 1 are free
+    # adjacent seats, computed for the whole venue with a few big-integer
+    # operations; exact for rows with a span, which skip the seat-by-seat scan
+    free = ~int.from_bytes(blocked, 'little') & ((1 << (8 * len(blocked))) - 1)
+    starts = free
+    if quantity > 1:
+        pairs = free & (free >> 1) & ~index.breaks
+        starts = pairs
+        for shift in range(1, quantity - 1):
+            starts &= pairs >> shift
+    if not starts:
+        return None
+    starts = starts.to_bytes(len(blocked), 'little')
+    
+    best = None
+    for row in index.rows:
+        if best is not None and best[0] <= row.rank:
+            break
+        if (section_id is not None and row.section_id != section_id) or len(row.ordinals) < quantity:
+            continue
+        if row.span is not None:
+            low, high = row.span
+            window = int.from_bytes(starts[low >> 3:(high >> 3) + 1], 'little') >> (low & 7)
+            if not window & ((1 << (high - low + 2 - quantity)) - 1):
+                continue
+        block = best_block_in_row(row, blocked, quantity)
+        if block is None:
+            continue
+        distance, start = block
+        score = row.rank + centrality_weight * distance / max(row.center, 1)
+        if best is None or score < best[0]:
+            best = (score, row.ordinals[start:start + quantity])
+    return best[1] if best else None
+
+def held_seat_ids(event_id, locking=False):
+    """Seats in active holds for the event"""
+    query = db.session.query(TicketHoldItem.seat_id).join(TicketHold).filter(
+        TicketHold.event_id == event_id,
+        TicketHold.status == 'active',
+        TicketHold.expires_at > datetime.utcnow(),
+        TicketHoldItem.seat_id.isnot(None)
+    )
+    if locking:
+        query = query.with_for_update(read=True)
+    return {row[0] for row in query}
+
+def allocate_seats(event, quantity, section_id=None, exclude=(), claim=True):
+    """Seat ids of the best available adjacent seats for the event, or None.
+    
+    With `claim` the event's seat map stays locked until the caller
+    commits, so concurrent allocations serialize and never pick the same
+    seats; the caller must then sell or hold the seats in that
+    transaction. Without it this is only a suggestion. `exclude` are seats
+    already picked for the same order or hold.
+    """
+    quantity = int(quantity)
+    if quantity < 1:
+        return None
+    if claim:
+        seat_map, layout = lock_seat_map(event)
+    else:
+        seat_map, layout = get_seat_map(event)
+    unavailable = {
+        layout.ordinals[seat_id]
+        for seat_id in held_seat_ids(event.event_id, locking=claim) | set(exclude)
+        if seat_id in layout.ordinals
+    }
+    ordinals = find_best_seats(
+        get_row_index(layout),
+        seat_map.taken,
+        quantity,
+        section_id,
+        unavailable,
+        current_app.config.get('SEAT_ALLOCATION_CENTRALITY_WEIGHT', 1.0)
+    )
+    if ordinals is None:
+        return None
+    return [layout.seats[ordinal].seat_id for ordinal in ordinals]
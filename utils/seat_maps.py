@@ -0,0 +1,267 @@
+import re
+import threading
+from sqlalchemy import func, update
+from models import db, Event, Order, Seat, SeatingSection, Ticket, EventSeatMap, Venue
+
+# Tickets in these states keep their seat
+SEAT_HOLDING_STATUSES = ('valid', 'used')
+# '0'/'1' string for every byte value, least significant bit (lowest ordinal) first
+BYTE_BITS = [format(value, '08b')[::-1] for value in range(256)]
+RUNS_PATTERN = re.compile(r'0+|1+')
+
+class VenueLayout:
+    """A venue's sections and seats as plain rows, seats in ordinal order.
+    
+    Seat ordinals follow seat_id order. Seats are only ever added, with
+    increasing ids, so an ordinal never changes and a layout holding as
+    many seats as a seat map describes exactly the seats of that map.
+    `version` is the venue's layout_version the rows were read at.
+    """
+    
+    def __init__(self, venue_id, sections, seats, version=None):
+        self.venue_id = venue_id
+        self.sections = sections
+        self.seats = seats
+        self.version = version
+        self.ordinals = {seat.seat_id: ordinal for ordinal, seat in enumerate(seats)}
+    
+    def __len__(self):
+        return len(self.seats)
+    
+    def section_dicts(self):
+        """section_id -> section dict, shaped like SeatingSection.to_dict"""
+        return {
+            section.section_id: {
+                'section_id': section.section_id,
+                'venue_id': self.venue_id,
+                'section_name': section.section_name,
+                'capacity': section.capacity,
+                'section_type': section.section_type,
+                'layout_config': section.layout_config
+            }
+            for section in self.sections
+        }
+    
+    def seat_dict(self, ordinal):
+        """Seat dict shaped like Seat.to_dict, plus its ordinal"""
+        seat = self.seats[ordinal]
+        return {
+            'seat_id': seat.seat_id,
+            'section_id': seat.section_id,
+            'seat_number': seat.seat_number,
+            'row_number': seat.row_number,
+            'seat_type': seat.seat_type,
+            'ordinal': ordinal
+        }
+
+_layouts = {}
+_layouts_lock = threading.Lock()
+
+def venue_seat_count(venue_id):
+    """Number of seats a venue has right now"""
+    return db.session.query(func.count(Seat.seat_id)).join(
+        SeatingSection, SeatingSection.section_id == Seat.section_id
+    ).filter(SeatingSection.venue_id == venue_id).scalar() or 0
+
+def touch_venue_layout(venue_id):
+    """Bump a venue's layout version after its sections or seats changed (caller commits)"""
+    db.session.execute(
+        update(Venue)
+        .where(Venue.venue_id == venue_id)
+        .values(layout_version=Venue.layout_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    with _layouts_lock:
+        _layouts.pop(venue_id, None)
+
+def get_venue_layout(venue_id, seat_count, locking=False):
+    """Layout of a venue, cached per process while its layout version is current.
+    
+    The cached layout is also rebuilt when it no longer has `seat_count`
+    seats. `locking` reads the seats with a shared lock, i.e. the latest
+    committed rows rather than the transaction's snapshot, for writers of
+    seat maps.
+    """
+    version = db.session.query(Venue.layout_version).filter(Venue.venue_id == venue_id).scalar()
+    layout = _layouts.get(venue_id)
+    if layout is not None and layout.version == version and len(layout) == seat_count:
+        return layout
+        
+    sections = db.session.query(
+        SeatingSection.section_id,
+        SeatingSection.section_name,
+        SeatingSection.capacity,
+        SeatingSection.section_type,
+        SeatingSection.layout_config
+    ).filter(SeatingSection.venue_id == venue_id).order_by(SeatingSection.section_id).all()
+    seats = db.session.query(
+        Seat.seat_id, Seat.section_id, Seat.row_number, Seat.seat_number, Seat.seat_type
+    ).join(
+        SeatingSection, SeatingSection.section_id == Seat.section_id
+    ).filter(SeatingSection.venue_id == venue_id).order_by(Seat.seat_id)
+    if locking:
+        seats = seats.with_for_update(read=True)
+        
+    layout = VenueLayout(venue_id, sections, seats.all(), version)
+    with _layouts_lock:
+        _layouts[venue_id] = layout
+    return layout
+
+def taken_seat_ids(event_id, seat_ids=None, locking=False):
+    """Seats held by a ticket of a completed order for the event"""
+    query = db.session.query(Ticket.seat_id).join(Order, Order.order_id == Ticket.order_id).filter(
+        Order.event_id == event_id,
+        Order.status == 'completed',
+        Ticket.status.in_(SEAT_HOLDING_STATUSES),
+        Ticket.seat_id.isnot(None)
+    )
+    if seat_ids is not None:
+        query = query.filter(Ticket.seat_id.in_(list(seat_ids)))
+    if locking:
+        query = query.with_for_update(read=True)
+    return {row[0] for row in query}
+
+def set_bits(bitmap, ordinals, taken):
+    """Set (taken) or clear the bits of `ordinals` in a bytearray"""
+    for ordinal in ordinals:
+        if taken:
+            bitmap[ordinal >> 3] |= 1 << (ordinal & 7)
+        else:
+            bitmap[ordinal >> 3] &= 0xFF ^ (1 << (ordinal & 7))
+
+def is_taken(bitmap, ordinal):
+    """True when the bit of `ordinal` is set"""
+    return bool(bitmap[ordinal >> 3] & (1 << (ordinal & 7)))
+
+def seat_bits(seat_map):
+    """One '0' (available) or '1' (sold) character per seat ordinal"""
+    return ''.join(BYTE_BITS[byte] for byte in seat_map.taken)[:seat_map.seat_count]
+
+def build_seat_map(event, locking=False):
+    """Seat map computed from the event's tickets (not added to the session)"""
+    layout = get_venue_layout(event.venue_id, venue_seat_count(event.venue_id), locking)
+    bitmap = bytearray((len(layout) + 7) // 8)
+    taken = taken_seat_ids(event.event_id, locking=locking)
+    set_bits(bitmap, [layout.ordinals[seat_id] for seat_id in taken if seat_id in layout.ordinals], True)
+    return EventSeatMap(event_id=event.event_id, seat_count=len(layout), taken=bytes(bitmap), version=1)
+
+def create_seat_map(event):
+    """Start a new event's seat map with every seat available (caller commits)"""
+    layout = get_venue_layout(event.venue_id, venue_seat_count(event.venue_id))
+    seat_map = EventSeatMap(event_id=event.event_id, seat_count=len(layout),
+                            taken=bytes((len(layout) + 7) // 8), version=1)
+    db.session.add(seat_map)
+    return seat_map
+
+def get_seat_map(event):
+    """(seat map, layout) for reading; nothing is locked or written"""
+    seat_map = EventSeatMap.query.get(event.event_id)
+    if seat_map is not None:
+        layout = get_venue_layout(event.venue_id, seat_map.seat_count)
+        if len(layout) == seat_map.seat_count:
+            return seat_map, layout
+    seat_map = build_seat_map(event)
+    return seat_map, get_venue_layout(event.venue_id, seat_map.seat_count)
+
+def lock_seat_map(event):
+    """(seat map, layout) locked for update, created or repaired if needed.
+    
+    The row lock serializes the writers of one event's map; it is held
+    only from here to the caller's commit.
+    """
+    seat_map = EventSeatMap.query.filter_by(event_id=event.event_id).with_for_update().first()
+    if seat_map is not None:
+        layout = get_venue_layout(event.venue_id, seat_map.seat_count, locking=True)
+        if len(layout) == seat_map.seat_count:
+            return seat_map, layout
+        # Seats were removed outside the API: recount from the tickets
+        fresh = build_seat_map(event, locking=True)
+        seat_map.seat_count = fresh.seat_count
+        seat_map.taken = fresh.taken
+        seat_map.version = (seat_map.version or 0) + 1
+    else:
+        seat_map = build_seat_map(event, locking=True)
+        db.session.add(seat_map)
+        db.session.flush()
+    return seat_map, get_venue_layout(event.venue_id, seat_map.seat_count)
+
+def update_seat_map(seat_map, layout, seat_ids, taken):
+    """Flip the bits of `seat_ids` on a locked seat map"""
+    bitmap = bytearray(seat_map.taken)
+    set_bits(bitmap, [layout.ordinals[seat_id] for seat_id in seat_ids if seat_id in layout.ordinals], taken)
+    seat_map.taken = bytes(bitmap)
+    seat_map.version = (seat_map.version or 0) + 1
+
+def mark_seats_taken(event_id, seat_ids):
+    """Claim newly sold seats in the event's map (commits with the sale).
+    
+    Returns the seats that cannot be claimed - already sold or not at the
+    event's venue - in which case nothing is marked.
+    """
+    seat_ids = {int(seat_id) for seat_id in seat_ids if seat_id}
+    if not seat_ids:
+        return set()
+    seat_map, layout = lock_seat_map(Event.query.get(event_id))
+    unavailable = {
+        seat_id for seat_id in seat_ids
+        if seat_id not in layout.ordinals or is_taken(seat_map.taken, layout.ordinals[seat_id])
+    }
+    if not unavailable:
+        update_seat_map(seat_map, layout, seat_ids, True)
+    return unavailable
+
+def release_order_seats(event_id, order_ids):
+    """Free the seats of refunded or cancelled orders (call after their tickets' status changed).
+    
+    Only seats whose tickets left SEAT_HOLDING_STATUSES are freed; a seat
+    that another completed order still holds stays taken.
+    """
+    if not order_ids:
+        return
+    rows = db.session.query(Ticket.seat_id, Ticket.status).filter(
+        Ticket.order_id.in_(list(order_ids)),
+        Ticket.seat_id.isnot(None)
+    ).all()
+    still_held = {seat_id for seat_id, status in rows if status in SEAT_HOLDING_STATUSES}
+    seat_ids = {seat_id for seat_id, _ in rows} - still_held
+    if not seat_ids:
+        return
+    seat_map, layout = lock_seat_map(Event.query.get(event_id))
+    freed = seat_ids - taken_seat_ids(event_id, seat_ids, locking=True)
+    if freed:
+        update_seat_map(seat_map, layout, freed, False)
+
+def extend_venue_seat_maps(venue_id):
+    """Grow the seat maps of a venue's events after seats were added (caller commits)"""
+    seat_count = venue_seat_count(venue_id)
+    event_ids = [row[0] for row in db.session.query(Event.event_id).filter(Event.venue_id == venue_id)]
+    if not event_ids:
+        return
+    seat_maps = EventSeatMap.query.filter(
+        EventSeatMap.event_id.in_(event_ids)
+    ).order_by(EventSeatMap.event_id).with_for_update().all()
+    for seat_map in seat_maps:
+        if seat_count > seat_map.seat_count:
+            # New seats take the next ordinals, so existing bits stay put
+            seat_map.taken = bytes(seat_map.taken) + bytes((seat_count + 7) // 8 - len(seat_map.taken))
+            seat_map.seat_count = seat_count
+            seat_map.version = (seat_map.version or 0) + 1
+
+def encode_runs(seat_map):
+    """Lengths of alternating available / sold runs, starting with an available run"""
+    bits = seat_bits(seat_map)
+    runs = [len(match.group()) for match in RUNS_PATTERN.finditer(bits)]
+    if bits.startswith('1'):
+        runs.insert(0, 0)
+    return runs
+
+def available_seats(seat_map, layout):
+    """Available seat dicts with their section, in one pass over the bitmap"""
+    sections = layout.section_dicts()
+    seats = []
+    for ordinal, bit in enumerate(seat_bits(seat_map)):
+        if bit == '0':
+            seat = layout.seat_dict(ordinal)
+            seat['section'] = sections.get(seat['section_id'])
+            seats.append(seat)
+    return seats
@@ -0,0 +1,169 @@
+import base64
+import hashlib
+import hmac
+import math
+import struct
+import time
+from datetime import timedelta, timezone
+from flask import current_app
+
+TOKEN_PREFIX = 'ET1'
+# event_id, ticket_id, ticket_type_id, valid_from, valid_until (epoch seconds)
+PAYLOAD_FORMAT = '>QQQII'
+SIGNATURE_BYTES = 16
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _b64decode(value):
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+def _epoch(value):
+    """Naive UTC datetime -> epoch seconds"""
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+def get_signing_keys():
+    """Return ({key_id: secret}, active key_id) from TICKET_SIGNING_KEYS.
+    
+    TICKET_SIGNING_KEYS is a comma separated list of `kid:secret` pairs.
+    Keep retired keys in the list until their tickets' events are over;
+    only TICKET_SIGNING_KEY_ID is used for new tokens.
+    """
+    raw = current_app.config.get('TICKET_SIGNING_KEYS') or ''
+    keys = {}
+    for pair in raw.split(','):
+        if ':' in pair:
+            kid, secret = pair.split(':', 1)
+            keys[kid.strip()] = secret.strip().encode()
+    if not keys:
+        keys = {'k1': current_app.config['SECRET_KEY'].encode()}
+    active = current_app.config.get('TICKET_SIGNING_KEY_ID') or next(iter(keys))
+    if active not in keys:
+        raise ValueError(f"Unknown TICKET_SIGNING_KEY_ID: {active}")
+    return keys, active
+
+def derive_event_key(secret, event_id):
+    """Per-event HMAC key, so a gate device only ever holds its event's key"""
+    return hmac.new(secret, f'ticket-token:event:{event_id}'.encode(), hashlib.sha256).digest()
+
+def event_verification_keys(event_id):
+    """Derived keys for every active/retired key id, for distribution to gates"""
+    keys, active = get_signing_keys()
+    return active, {kid: _b64encode(derive_event_key(secret, event_id)) for kid, secret in keys.items()}
+
+def ticket_token_window(event):
+    """Validity window of an event's tickets as (valid_from, valid_until) datetimes"""
+    early = current_app.config.get('TICKET_TOKEN_EARLY_ENTRY_SECONDS', 86400)
+    grace = current_app.config.get('TICKET_TOKEN_GRACE_SECONDS', 21600)
+    end = event.end_datetime or event.start_datetime
+    return event.start_datetime - timedelta(seconds=early), end + timedelta(seconds=grace)
+
+def issue_ticket_token(ticket, event):
+    """Signed, self-contained token for a ticket's QR code.
+    
+    Format: ET1.<kid>.<payload>.<signature>, both parts base64url. The
+    payload packs event id, ticket id, ticket type and validity window; the
+    signature is a truncated HMAC-SHA256 under the event's derived key.
+    """
+    keys, kid = get_signing_keys()
+    valid_from, valid_until = ticket_token_window(event)
+    payload = struct.pack(
+        PAYLOAD_FORMAT,
+        event.event_id,
+        ticket.ticket_id,
+        ticket.ticket_type_id,
+        _epoch(valid_from),
+        _epoch(valid_until)
+    )
+    signed = f"{TOKEN_PREFIX}.{kid}.{_b64encode(payload)}"
+    signature = hmac.new(derive_event_key(keys[kid], event.event_id), signed.encode(), hashlib.sha256).digest()
+    return f"{signed}.{_b64encode(signature[:SIGNATURE_BYTES])}"
+
+def verify_ticket_token(token, event_id=None, now=None):
+    """Check a token's signature, validity window and event without touching the database.
+    
+    Returns (valid, reason, claims); claims is filled in once the payload
+    could be decoded so callers can report which ticket was presented.
+    """
+    try:
+        prefix, kid, payload_part, signature_part = (token or '').split('.')
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+        token_event_id, ticket_id, ticket_type_id, valid_from, valid_until = struct.unpack(PAYLOAD_FORMAT, payload)
+    except Exception:
+        return False, 'malformed', None
+    if prefix != TOKEN_PREFIX:
+        return False, 'malformed', None
+        
+    claims = {
+        'event_id': token_event_id,
+        'ticket_id': ticket_id,
+        'ticket_type_id': ticket_type_id,
+        'valid_from': valid_from,
+        'valid_until': valid_until,
+        'kid': kid
+    }
+    
+    keys, _ = get_signing_keys()
+    if kid not in keys:
+        return False, 'unknown_key', claims
+    signed = f"{prefix}.{kid}.{payload_part}"
+    expected = hmac.new(derive_event_key(keys[kid], token_event_id), signed.encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(expected[:SIGNATURE_BYTES], signature):
+        return False, 'bad_signature', claims
+        
+    if event_id is not None and int(event_id) != token_event_id:
+        return False, 'wrong_event', claims
+    now = now or time.time()
+    if now < valid_from:
+        return False, 'not_yet_valid', claims
+    if now > valid_until:
+        return False, 'expired', claims
+    return True, 'OK', claims
+
+class RevocationFilter:
+    """Bloom filter of revoked ticket ids shipped to gates with the manifest.
+    
+    Bit i of hash j is (h1 + j * h2) mod size, with h1/h2 the first two
+    big-endian uint64 words of sha256(str(ticket_id)). A hit means the
+    ticket is probably revoked and should be checked online; a miss is
+    definitive.
+    """
+    
+    def __init__(self, size, hash_count, bits=None):
+        self.size = size
+        self.hash_count = hash_count
+        self.bits = bits or bytearray((size + 7) // 8)
+    
+    @classmethod
+    def for_capacity(cls, capacity, false_positive_rate=0.001):
+        capacity = max(1, capacity)
+        size = max(64, int(math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)))
+        hash_count = max(1, int(round(size / capacity * math.log(2))))
+        return cls(size, hash_count)
+    
+    def _positions(self, ticket_id):
+        digest = hashlib.sha256(str(ticket_id).encode()).digest()
+        h1, h2 = struct.unpack('>QQ', digest[:16])
+        return [(h1 + j * h2) % self.size for j in range(self.hash_count)]
+    
+    def add(self, ticket_id):
+        for position in self._positions(ticket_id):
+            self.bits[position // 8] |= 1 << (position % 8)
+    
+    def __contains__(self, ticket_id):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(ticket_id))
+    
+    def to_dict(self):
+        return {'size': self.size, 'hash_count': self.hash_count, 'bits': _b64encode(bytes(self.bits))}
+
+def build_revocation_filter(ticket_ids):
+    """Bloom filter over the given revoked ticket ids"""
+    ticket_ids = list(ticket_ids)
+    bloom = RevocationFilter.for_capacity(
+        len(ticket_ids),
+        current_app.config.get('TICKET_REVOCATION_FP_RATE', 0.001)
+    )
+    for ticket_id in ticket_ids:
+        bloom.add(ticket_id)
+    return bloom
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import current_app
+from models import db, EventMetricBucket, AnalyticsDelta
+
+RESOLUTIONS = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1)
+}
+
+def floor_time(value, resolution):
+    """Start of the bucket containing `value`"""
+    if resolution == 'minute':
+        return value.replace(second=0, microsecond=0)
+    if resolution == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def retention_days():
+    """Days prune_metric_buckets keeps each resolution for; day buckets are kept forever"""
+    return {
+        'minute': current_app.config.get('TIMESERIES_MINUTE_RETENTION_DAYS', 7),
+        'hour': current_app.config.get('TIMESERIES_HOUR_RETENTION_DAYS', 90)
+    }
+
+def is_retained(resolution, start):
+    """Whether buckets of `resolution` from `start` on have not been pruned"""
+    days = retention_days().get(resolution)
+    return days is None or start >= datetime.utcnow() - timedelta(days=days)
+
+def choose_resolution(start, end):
+    """Finest resolution that keeps a range chartable and is still retained for `start`"""
+    span = end - start
+    if span <= timedelta(hours=6):
+        candidates = ['minute', 'hour', 'day']
+    elif span <= timedelta(days=14):
+        candidates = ['hour', 'day']
+    else:
+        candidates = ['day']
+    return next(resolution for resolution in candidates if is_retained(resolution, start))
+
+def _empty_counters():
+    return {'orders': 0, 'tickets_sold': 0, 'revenue': Decimal('0'), 'check_ins': 0}
+
+def _bucket_deltas(deltas, resolutions):
+    """Sum analytics deltas into {(event_id, resolution, bucket_start): counters}"""
+    buckets = {}
+    for delta in deltas:
+        created_at = delta.created_at or datetime.utcnow()
+        for resolution in resolutions:
+            key = (delta.event_id, resolution, floor_time(created_at, resolution))
+            counters = buckets.setdefault(key, _empty_counters())
+            counters['orders'] += int(delta.orders or 0)
+            counters['tickets_sold'] += int(delta.tickets_sold or 0)
+            counters['revenue'] += Decimal(str(delta.revenue or 0))
+            counters['check_ins'] += int(delta.checked_in or 0)
+    return buckets
+
+def apply_deltas_to_buckets(deltas):
+    """Add claimed analytics deltas to minute, hour and day buckets (caller commits).
+    
+    Runs inside the analytics rollup transaction, so the time series and
+    the lifetime totals always move together. Writing every resolution up
+    front keeps reads to a single range scan however long the event runs.
+    """
+    buckets = _bucket_deltas(deltas, RESOLUTIONS)
+    if not buckets:
+        return
+        
+    existing = {
+        (bucket.event_id, bucket.resolution, bucket.bucket_start): bucket
+        for bucket in EventMetricBucket.query.filter(
+            EventMetricBucket.event_id.in_({key[0] for key in buckets}),
+            EventMetricBucket.bucket_start.in_({key[2] for key in buckets})
+        ).order_by(EventMetricBucket.bucket_id).with_for_update().all()
+    }
+    for key in sorted(buckets):
+        counters = buckets[key]
+        bucket = existing.get(key)
+        if bucket is None:
+            event_id, resolution, bucket_start = key
+            bucket = EventMetricBucket(
+                event_id=event_id,
+                resolution=resolution,
+                bucket_start=bucket_start,
+                orders=0,
+                tickets_sold=0,
+                revenue=0,
+                check_ins=0
+            )
+            db.session.add(bucket)
+        bucket.orders = (bucket.orders or 0) + counters['orders']
+        bucket.tickets_sold = (bucket.tickets_sold or 0) + counters['tickets_sold']
+        bucket.revenue = Decimal(str(bucket.revenue or 0)) + counters['revenue']
+        bucket.check_ins = (bucket.check_ins or 0) + counters['check_ins']
+
+def query_event_timeseries(event_id, resolution, start, end):
+    """Non-empty buckets of an event in [start, end), oldest first.
+    
+    Deltas the rollup has not reached yet are bucketed on the fly, so the
+    series matches the analytics snapshot exactly.
+    """
+    start = floor_time(start, resolution)
+    points = {}
+    for bucket in EventMetricBucket.query.filter(
+        EventMetricBucket.event_id == event_id,
+        EventMetricBucket.resolution == resolution,
+        EventMetricBucket.bucket_start >= start,
+        EventMetricBucket.bucket_start < end
+    ).order_by(EventMetricBucket.bucket_start).all():
+        points[bucket.bucket_start] = {
+            'orders': bucket.orders,
+            'tickets_sold': bucket.tickets_sold,
+            'revenue': Decimal(str(bucket.revenue or 0)),
+            'check_ins': bucket.check_ins
+        }
+        
+    pending = AnalyticsDelta.query.filter(
+        AnalyticsDelta.event_id == event_id,
+        AnalyticsDelta.created_at >= start,
+        AnalyticsDelta.created_at < end
+    ).all()
+    for (_, _, bucket_start), counters in _bucket_deltas(pending, [resolution]).items():
+        point = points.setdefault(bucket_start, _empty_counters())
+        for metric, value in counters.items():
+            point[metric] += value
+            
+    return [
+        {
+            'bucket_start': bucket_start.isoformat(),
+            'orders': point['orders'],
+            'tickets_sold': point['tickets_sold'],
+            'revenue': float(point['revenue']),
+            'check_ins': point['check_ins']
+        }
+        for bucket_start, point in sorted(points.items())
+    ]
+
+def prune_metric_buckets():
+    """Drop minute and hour buckets past their retention; day buckets are kept"""
+    now = datetime.utcnow()
+    deleted = 0
+    for resolution, days in retention_days().items():
+        deleted += EventMetricBucket.query.filter(
+            EventMetricBucket.resolution == resolution,
+            EventMetricBucket.bucket_start < now - timedelta(days=days)
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
@@ -0,0 +1,246 @@
+import json
+import math
+import threading
+import time
+from functools import wraps
+from flask import current_app, request, jsonify
+from flask_jwt_extended import get_jwt_identity
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+QUEUE_TOKEN_HEADER = 'X-Queue-Token'
+
+def advance_room(room, issued, now):
+    """Move a room's admission frontier forward to `now`.
+    
+    The frontier grows at admit_rate from the last admitted sequence but
+    never past the last sequence issued, so capacity nobody was queued for
+    is not banked and released as a burst when a surge arrives.
+    """
+    frontier = room['admitted'] + max(0.0, now - room['advanced_at']) * room['admit_rate']
+    room['admitted'] = min(float(issued), frontier)
+    room['advanced_at'] = now
+    return room
+
+class MemoryQueueBackend:
+    """In-process queue state (single worker / tests)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rooms = {}
+        self._sequences = {}
+        
+    def get_room(self, event_id):
+        with self._lock:
+            room = self._rooms.get(event_id)
+            return dict(room) if room else None
+            
+    def save_room(self, event_id, room):
+        with self._lock:
+            self._rooms[event_id] = dict(room)
+            
+    def delete_room(self, event_id):
+        with self._lock:
+            self._rooms.pop(event_id, None)
+            self._sequences.pop(event_id, None)
+            
+    def last_sequence(self, event_id):
+        with self._lock:
+            return self._sequences.get(event_id, 0)
+            
+    def join(self, event_id, now):
+        """Advance the room and issue the next sequence in one step (None without a room)"""
+        with self._lock:
+            room = self._rooms.get(event_id)
+            if room is None:
+                return None
+            issued = self._sequences.get(event_id, 0)
+            advance_room(room, issued, now)
+            self._sequences[event_id] = issued + 1
+            return issued + 1
+
+class RedisQueueBackend:
+    """Queue state shared between workers through Redis (or a compatible stand-in)"""
+    
+    def __init__(self, client, prefix='waiting_room'):
+        self.client = client
+        self.prefix = prefix
+        
+    def _key(self, event_id, name):
+        return f"{self.prefix}:{event_id}:{name}"
+        
+    def get_room(self, event_id):
+        raw = self.client.get(self._key(event_id, 'room'))
+        return json.loads(raw) if raw else None
+        
+    def save_room(self, event_id, room):
+        self.client.set(self._key(event_id, 'room'), json.dumps(room))
+        
+    def delete_room(self, event_id):
+        self.client.delete(self._key(event_id, 'room'), self._key(event_id, 'seq'))
+        
+    def last_sequence(self, event_id):
+        return int(self.client.get(self._key(event_id, 'seq')) or 0)
+        
+    def join(self, event_id, now):
+        """Advance the room and issue the next sequence in one transaction (None without a room)"""
+        from redis.exceptions import WatchError
+        room_key, seq_key = self._key(event_id, 'room'), self._key(event_id, 'seq')
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(room_key, seq_key)
+                    raw = pipe.get(room_key)
+                    if not raw:
+                        pipe.unwatch()
+                        return None
+                    room = advance_room(json.loads(raw), int(pipe.get(seq_key) or 0), now)
+                    pipe.multi()
+                    pipe.set(room_key, json.dumps(room))
+                    pipe.incr(seq_key)
+                    return int(pipe.execute()[1])
+                except WatchError:
+                    # Another worker joined or re-rated the room meanwhile
+                    continue
+
+class WaitingRoom:
+    """Admission queue placed in front of ticket purchases for hot on-sales.
+    
+    Buyers join and receive a signed token carrying their queue sequence.
+    Admission is time based: while buyers are queued, `admit_rate` sequence
+    numbers per second become admitted, so no worker has to move the queue
+    and every process can answer position queries from the shared state.
+    Each join first moves the frontier up to the join time, capped at the
+    sequences issued so far, which is what keeps idle time from counting.
+    """
+    
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        if app is not None:
+            self.init_app(app)
+            
+    def init_app(self, app):
+        if self.backend is None:
+            if app.config.get('WAITING_ROOM_BACKEND') == 'redis':
+                import redis
+                self.backend = RedisQueueBackend(redis.Redis.from_url(app.config['WAITING_ROOM_REDIS_URL']))
+            else:
+                self.backend = MemoryQueueBackend()
+        app.extensions['waiting_room'] = self
+        
+    def _serializer(self):
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='waiting-room')
+        
+    def _admitted_upto(self, room, issued, now):
+        """Highest sequence number admitted so far"""
+        return int(advance_room(dict(room), issued, now)['admitted'])
+        
+    def get_room(self, event_id):
+        return self.backend.get_room(event_id)
+        
+    def open_room(self, event_id, admit_rate):
+        """Open (or re-rate) the waiting room for an event"""
+        now = time.time()
+        issued = self.backend.last_sequence(event_id)
+        room = self.backend.get_room(event_id)
+        room = {
+            'event_id': event_id,
+            'admit_rate': float(admit_rate),
+            'opened_at': room['opened_at'] if room else now,
+            # Buyers already admitted at the old rate stay admitted
+            'admitted': advance_room(room, issued, now)['admitted'] if room else float(issued),
+            'advanced_at': now
+        }
+        self.backend.save_room(event_id, room)
+        return room
+        
+    def close_room(self, event_id):
+        self.backend.delete_room(event_id)
+        
+    def join(self, event_id, user_id):
+        """Enter the queue, returns a signed token or None when no room is open"""
+        now = time.time()
+        sequence = self.backend.join(event_id, now)
+        if sequence is None:
+            return None
+        return self._serializer().dumps({'e': event_id, 's': sequence, 'u': user_id, 't': now})
+        
+    def status(self, event_id, user_id, token):
+        """Return the queue status for a token (or an error message)"""
+        # Sequence first: a join landing in between then only lowers the cap
+        issued = self.backend.last_sequence(event_id)
+        room = self.backend.get_room(event_id)
+        if not room:
+            return {'event_id': event_id, 'active': False, 'admitted': True}, None
+            
+        try:
+            payload = self._serializer().loads(
+                token or '',
+                max_age=current_app.config.get('WAITING_ROOM_TOKEN_MAX_AGE', 7200)
+            )
+        except SignatureExpired:
+            return None, 'Queue token has expired, please rejoin'
+        except BadSignature:
+            return None, 'Invalid queue token'
+            
+        if payload.get('e') != event_id or payload.get('u') != user_id:
+            return None, 'Queue token is not valid for this event'
+            
+        now = time.time()
+        sequence = payload['s']
+        admitted_upto = self._admitted_upto(room, issued, now)
+        position = max(0, sequence - admitted_upto)
+        rate = room['admit_rate']
+        
+        result = {
+            'event_id': event_id,
+            'active': True,
+            'admitted': position == 0,
+            'position': position,
+            'estimated_wait_seconds': int(math.ceil(position / rate)) if rate > 0 and position else 0,
+            'admit_rate': rate
+        }
+        
+        if position == 0:
+            # Admitted buyers get a limited window to reach checkout, counted
+            # from when the frontier passed their sequence (never before joining)
+            admitted_at = max(
+                payload.get('t', 0),
+                room['advanced_at'] + (sequence - room['admitted']) / rate if rate > 0 else now
+            )
+            window = current_app.config.get('WAITING_ROOM_ADMISSION_WINDOW', 900)
+            if now > admitted_at + window:
+                return None, 'Admission window has expired, please rejoin'
+            result['admission_expires_in'] = int(admitted_at + window - now)
+            
+        return result, None
+
+waiting_room = WaitingRoom()
+
+def admission_required(f):
+    """Reject purchases for events with an open waiting room unless the buyer was admitted"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        # Bulk orders stream their body and pass the event as a query parameter
+        data = request.get_json(silent=True) or {}
+        try:
+            event_id = int(data.get('event_id', request.args.get('event_id')))
+        except Exception:
+            return f(*args, **kwargs)
+            
+        if not waiting_room.get_room(event_id):
+            return f(*args, **kwargs)
+            
+        user_id = int(get_jwt_identity())
+        status, error = waiting_room.status(event_id, user_id, request.headers.get(QUEUE_TOKEN_HEADER))
+        if error:
+            return jsonify({'error': error, 'waiting_room': True}), 403
+        if not status['admitted']:
+            response = jsonify({
+                'error': 'You are in the waiting room for this event',
+                'waiting_room': status
+            })
+            response.headers['Retry-After'] = str(max(1, status['estimated_wait_seconds']))
+            return response, 429
+            
+        return f(*args, **kwargs)
+    return decorated